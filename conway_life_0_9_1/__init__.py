@@ -8,6 +8,7 @@ Licence: you can modify and reditribute this file as you wish.
 import bpy
 
 from .goldriver import GOLDriver
+from .golview.blenderrenderer import BlenderRenderer
 
 bl_info = {
     "name": "Conway's Life Generator",
@@ -30,10 +31,28 @@ class ObjectGenerateConwayLife(bpy.types.Operator):
         driver.go()
         return {'FINISHED'}
 
+class ObjectImportConwayLifeBake(bpy.types.Operator):
+    """Import a Conway's Life bake written by golbake.py"""
+    bl_idname = "object.conway_life_import_bake"
+    bl_label = "Import Conway's Life Bake"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filepath = bpy.props.StringProperty(subtype='FILE_PATH')
+
+    def execute(self, context):
+        BlenderRenderer.from_bake(self.filepath)
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
 def register():
     bpy.utils.register_class(ObjectGenerateConwayLife)
+    bpy.utils.register_class(ObjectImportConwayLifeBake)
 
 def unregister():
+    bpy.utils.unregister_class(ObjectImportConwayLifeBake)
     bpy.utils.unregister_class(ObjectGenerateConwayLife)
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import contextlib
+import multiprocessing
+import os
+import sys
+
+from goldriver import GOLDriver
+
+"""Used only to bake simulations from the command line, without Blender. The
+bake files are imported into Blender with the "Import Conway's Life Bake"
+operator, which keyframes them without running the simulation.
+"""
+
+
+def usage():
+    print("usage: python %s <config file> <bake file> [seed ...]" %
+          sys.argv[0])
+    print("where:")
+    print("\tconfig file - config file with the simulation settings")
+    print("\tbake file - bake file to write; with more than one seed, %s in "
+          "the name is replaced by the seed")
+    print("\tseed - optional random seeds to bake, in parallel; defaults to "
+          "the config file's RandomSeed")
+    sys.exit("invalid arguments")
+
+
+def bake(cfg_path, bake_path, seed=None):
+    """Runs one simulation headless and writes its bake file.
+
+    :param cfg_path: config file with the simulation settings
+    :param bake_path: the bake file to write
+    :param seed: optional RandomSeed to use instead of the config file's
+    :return: bake_path
+    """
+    cfg = GOLDriver.load_config(cfg_path)
+    if seed is not None:
+        cfg.set('Universe', 'RandomSeed', seed)
+    cfg.set('Rendering', 'Renderer', 'bake')
+    cfg.set('Rendering', 'PauseAfterRandomize', '0')
+    if not cfg.has_section('Bake'):
+        cfg.add_section('Bake')
+    cfg.set('Bake', 'Path', bake_path)
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            GOLDriver(cfg).go()
+    return bake_path
+
+
+def main():
+    if len(sys.argv) < 3:
+        usage()
+    cfg_path = sys.argv[1]
+    bake_path = sys.argv[2]
+    seeds = sys.argv[3:]
+    if not os.path.exists(cfg_path):
+        sys.exit("config file {} not found".format(cfg_path))
+    if len(seeds) <= 1:
+        print(bake(cfg_path, bake_path, seeds[0] if seeds else None))
+        return
+    if '%s' not in bake_path:
+        sys.exit("bake file name needs a %s to bake several seeds")
+    jobs = [(cfg_path, bake_path % seed, seed) for seed in seeds]
+    cfg = GOLDriver.load_config(cfg_path)
+    if cfg.get('Universe', 'Engine', fallback='object') == "parallel":
+        # the parallel engine starts its own worker processes
+        for job in jobs:
+            print(bake(*job))
+        return
+    with multiprocessing.Pool(min(len(jobs), os.cpu_count() or 1)) as pool:
+        for path in pool.starmap(bake, jobs):
+            print(path)
+
+
+if __name__ == "__main__":
+    main()
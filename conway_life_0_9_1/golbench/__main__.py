@@ -0,0 +1,126 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import argparse
+import json
+import sys
+
+from golbench import benchmarks
+
+"""Used only to run the benchmarks from the command line:
+
+    python3 -m golbench run --sizes 64,256 --output results.json
+    python3 -m golbench compare baseline.json results.json
+"""
+
+
+def csv(cast):
+    """:return: an argparse type which splits a comma separated list"""
+    return lambda text: [cast(value) for value in text.split(",") if value]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="golbench", description="Benchmarks the Game of Life engines, "
+        "renderers and transition log.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("--engines", type=csv(str),
+                     default=list(benchmarks.ENGINES),
+                     help="engines to time (default: all)")
+    run.add_argument("--sizes", type=csv(int), default=[64, 256],
+                     help="board sizes (default: 64,256)")
+    run.add_argument("--densities", type=csv(float), default=[0.4],
+                     help="seeding densities (default: 0.4)")
+    run.add_argument("--generations", type=int, default=50,
+                     help="generations per run (default: 50)")
+    run.add_argument("--renderers", type=csv(str), default=[],
+                     help="renderers to time: console, ansi, blender")
+    run.add_argument("--log-records", type=int, default=0,
+                     help="also time a transition log of this many records")
+    run.add_argument("--ensemble-runs", type=int, default=0,
+                     help="also time ensembles of this many universes")
+    run.add_argument("--randomizer", default="sequential",
+                     help="how the engines seed their boards: sequential or "
+                          "counter (default: sequential)")
+    run.add_argument("--no-memory", action="store_true",
+                     help="skip the peak memory runs")
+    run.add_argument("--repeat", type=int, default=1,
+                     help="runs per benchmark, keeping the best (default: 1)")
+    run.add_argument("--output", help="write the results to this JSON file")
+    run.add_argument("--baseline",
+                     help="compare the results against this JSON file")
+    run.add_argument("--threshold", type=float, default=0.1,
+                     help="tolerated fractional slowdown (default: 0.1)")
+
+    compare = commands.add_parser("compare",
+                                  help="compare two results files")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.1,
+                         help="tolerated fractional slowdown (default: 0.1)")
+    return parser.parse_args(argv)
+
+
+def print_record(result):
+    metrics = ["%s=%.4g" % (key, value) for key, value in
+               sorted(result.items()) if key.endswith("_per_s") or
+               key.endswith("_s") or key.endswith("_bytes")]
+    print("%s  %s" % (result['name'], "  ".join(metrics)))
+
+
+def report(regressions):
+    """Prints the regressions.
+
+    :return: the process exit status, non-zero if anything regressed
+    """
+    for name, key, was, value, change in regressions:
+        print("REGRESSION %s %s: %.4g -> %.4g (%.1f%% worse)" %
+              (name, key, was, value, change * 100))
+    if not regressions:
+        print("no regressions")
+    return 1 if regressions else 0
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.command == "compare":
+        return report(benchmarks.compare(load(args.baseline),
+                                         load(args.current), args.threshold))
+
+    results = benchmarks.run(args.engines, args.sizes, args.densities,
+                             args.generations, args.renderers,
+                             args.log_records, not args.no_memory,
+                             args.repeat, print_record, args.ensemble_runs,
+                             args.randomizer)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        return report(benchmarks.compare(load(args.baseline), results,
+                                         args.threshold))
+    return 0
+
+
+sys.exit(main())
@@ -0,0 +1,393 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import configparser
+import contextlib
+import importlib.util
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+from golbench import stubbpy
+
+# the stub must be in place before the renderers are imported
+bpy = stubbpy.install()
+
+from goldriver import GOLDriver
+from golmodel.transitionlog import TransitionLog
+
+try:
+    from golcontrol.ensemble import Ensemble
+except ImportError:
+    Ensemble = None
+
+"""Timings of the engines, renderers and transition log. Every benchmark
+returns a flat dict of parameters and metrics; metrics whose names end in
+"_per_s" are better when higher, those ending in "_s" or "_bytes" are better
+when lower.
+"""
+
+ENGINES = ("object", "numpy", "parallel", "sparse", "hashlife", "bitpacked")
+NUMPY_ENGINES = ("numpy", "parallel")
+
+
+def engine_available(engine):
+    """:return: True if the engine's dependencies are installed"""
+    if engine in NUMPY_ENGINES:
+        return importlib.util.find_spec('numpy') is not None
+    return engine in ENGINES
+
+
+@contextlib.contextmanager
+def quiet():
+    """Sends stdout to the null device, so console output is produced (and
+    paid for) without being shown.
+    """
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            yield
+
+
+def create_driver(engine, size, generations, renderer="console", seed=0,
+                  ConsoleMode="plain", **options):
+    """Builds a GOLDriver from a temporary config file.
+
+    :param engine: the [Universe] Engine setting
+    :param size: the [Universe] Size setting
+    :param generations: the [Universe] GenerationCount setting
+    :param renderer: the [Rendering] Renderer setting
+    :param seed: the [Universe] RandomSeed setting
+    :param ConsoleMode: the [Rendering] ConsoleMode setting
+    :param options: further [Universe] settings
+    :return: the driver
+    """
+    cfg = configparser.RawConfigParser()
+    cfg.optionxform = str
+    cfg['Universe'] = dict(GenerationCount=generations, Size=size,
+                           RandomSeed=seed, Engine=engine, **options)
+    cfg['Rendering'] = dict(Renderer=renderer, ConsoleMode=ConsoleMode,
+                            PauseAfterRandomize=0)
+    fd, path = tempfile.mkstemp(suffix=".cfg")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            cfg.write(f)
+        with quiet():
+            return GOLDriver(path)
+    finally:
+        os.remove(path)
+
+
+def bench_engine(engine, size, density, generations, memory=True,
+                 randomizer="sequential"):
+    """Times one engine: building the driver, seeding the board and advancing
+    it. Peak memory is measured on a second run under tracemalloc, which
+    would otherwise slow the timed run; memory shared between worker
+    processes (the parallel engine) is not counted.
+
+    :param engine: the engine to time
+    :param size: cells per side of the board
+    :param density: fraction of cells alive after seeding
+    :param generations: number of generations to advance
+    :param memory: if False the peak memory is not measured
+    :param randomizer: the [Universe] Randomizer setting; it is only part of
+      the record when it is not the default
+    :return: the benchmark record
+    """
+    start = time.perf_counter()
+    driver = create_driver(engine, size, generations, Randomizer=randomizer)
+    startup = time.perf_counter() - start
+    universe = driver.universe
+    sim = driver.simulation
+
+    start = time.perf_counter()
+    universe.randomize(density)
+    randomize = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(generations):
+        sim.advance()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    sim.close()
+
+    result = dict(benchmark="engine", engine=engine, size=size,
+                  density=density, generations=generations, startup_s=startup,
+                  randomize_s=randomize, advance_s=elapsed,
+                  generations_per_s=generations / elapsed,
+                  cells_per_s=generations * size * size / elapsed,
+                  transitions=len(universe.log))
+    if randomizer != "sequential":
+        result['randomizer'] = randomizer
+    if memory:
+        tracemalloc.start()
+        try:
+            driver = create_driver(engine, size, generations,
+                                   Randomizer=randomizer)
+            driver.universe.randomize(density)
+            for _ in range(generations):
+                driver.simulation.advance()
+            driver.simulation.close()
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def bench_console_render(size, density, frames, mode="plain"):
+    """Times ConsoleRenderer.render over a run, with the output sent to the
+    null device. Only the render calls are timed.
+
+    :param size: cells per side of the board
+    :param density: fraction of cells alive after seeding
+    :param frames: number of frames to render
+    :param mode: the [Rendering] ConsoleMode setting
+    :return: the benchmark record
+    """
+    driver = create_driver("object", size, frames, ConsoleMode=mode)
+    driver.universe.randomize(density)
+    renderer = driver.renderer
+    elapsed = 0.0
+    with quiet():
+        for _ in range(frames):
+            start = time.perf_counter()
+            renderer.render(driver.universe)
+            elapsed += time.perf_counter() - start
+            driver.simulation.advance()
+        renderer.close()
+    elapsed = max(elapsed, 1e-9)
+    return dict(benchmark="console", mode=mode, size=size, density=density,
+                frames=frames, render_s=elapsed, frames_per_s=frames / elapsed,
+                cells_per_s=frames * size * size / elapsed)
+
+
+def bench_blender_render(engine, size, density, generations):
+    """Times the Blender renderer against the stub bpy module: building the
+    per-cell scene objects, then laying down the keyframes of a run (counted
+    as keyframe points, one per animated channel).
+
+    :param engine: the engine to simulate with
+    :param size: cells per side of the board
+    :param density: fraction of cells alive after seeding
+    :param generations: number of generations to simulate and keyframe
+    :return: the benchmark record
+    """
+    if not isinstance(bpy, stubbpy.StubBpy):
+        raise Exception("the blender benchmark must not run inside Blender")
+    bpy.reset()
+    start = time.perf_counter()
+    driver = create_driver(engine, size, generations, renderer="blender")
+    setup = time.perf_counter() - start
+    driver.universe.randomize(density)
+    for _ in range(generations):
+        driver.simulation.advance()
+    driver.simulation.close()
+
+    start = time.perf_counter()
+    with quiet():
+        driver.renderer.render(driver.universe)
+        driver.renderer.close()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    keys = driver.renderer.keyframe_count
+    return dict(benchmark="blender", engine=engine, size=size,
+                density=density, generations=generations, setup_s=setup,
+                render_s=elapsed, keyframes=keys,
+                keyframes_per_s=keys / elapsed,
+                bpy_calls=sum(bpy.calls.values()))
+
+
+def bench_transition_log(records, batch=1000):
+    """Times the transition bookkeeping: appending records one at a time
+    (object engine), extending a generation at a time (array engines) and
+    building the per-cell index on the first history lookup.
+
+    :param records: number of records to write
+    :param batch: records per generation when extending
+    :return: the benchmark record
+    """
+    cells = 1 << 16
+    log = TransitionLog()
+    start = time.perf_counter()
+    for i in range(records):
+        log.append(i // batch, i % cells, i & 1)
+    append = max(time.perf_counter() - start, 1e-9)
+
+    log = TransitionLog()
+    ids = [i % cells for i in range(batch)]
+    start = time.perf_counter()
+    for generation in range(records // batch):
+        log.extend(generation, ids, generation & 1)
+    extend = max(time.perf_counter() - start, 1e-9)
+
+    start = time.perf_counter()
+    log.cell_history(0)
+    index = time.perf_counter() - start
+    return dict(benchmark="log", records=records, batch=batch,
+                append_s=append, append_per_s=records / append,
+                extend_s=extend, extend_per_s=records / extend,
+                index_s=index)
+
+
+def bench_ensemble(size, density, runs, generations, batch_size=64,
+                   processes=1):
+    """Times an ensemble of independent runs, one per seed, stepped together
+    in batches. Runs stop early once they settle, so the throughput is
+    counted in whole universes rather than generations.
+
+    :param size: cells per side of every board
+    :param density: randomize() threshold of every board
+    :param runs: number of universes
+    :param generations: generations per universe at most
+    :param batch_size: universes stepped together
+    :param processes: worker processes
+    :return: the benchmark record
+    """
+    ensemble = Ensemble([str(seed) for seed in range(runs)], [size],
+                        [density], generations, batch_size=batch_size,
+                        processes=processes)
+    summary = ensemble.run()
+    return dict(benchmark="ensemble", size=size, density=density, runs=runs,
+                generations=generations, batch_size=batch_size,
+                processes=processes, elapsed_s=summary['elapsed_s'],
+                universes_per_s=summary['universes_per_s'],
+                settled=summary['settled'])
+
+
+def best_of(repeat, bench, *args, **kwargs):
+    """Runs a benchmark several times and keeps the best value of every
+    metric, which filters out most of the noise of a busy machine.
+
+    :param repeat: number of runs
+    :param bench: the benchmark function
+    :return: the merged benchmark record
+    """
+    best = bench(*args, **kwargs)
+    for _ in range(repeat - 1):
+        result = bench(*args, **kwargs)
+        for key, value in result.items():
+            if key.endswith("_per_s"):
+                best[key] = max(best[key], value)
+            elif key.endswith("_s") or key.endswith("_bytes"):
+                best[key] = min(best[key], value)
+    return best
+
+
+def record_name(result):
+    """:return: a name which identifies a benchmark and its parameters, used
+      to match records between runs
+    """
+    params = ["%s=%s" % (key, value) for key, value in sorted(result.items())
+              if not (key.endswith("_s") or key.endswith("_bytes") or
+                      key in ("benchmark", "transitions", "keyframes",
+                              "bpy_calls", "settled"))]
+    return "%s[%s]" % (result['benchmark'], ",".join(params))
+
+
+def run(engines=ENGINES, sizes=(64, 256), densities=(0.4,), generations=50,
+        renderers=(), log_records=0, memory=True, repeat=1, progress=None,
+        ensemble_runs=0, randomizer="sequential"):
+    """Runs the sweep.
+
+    :param engines: engines to time; ones whose dependencies are missing are
+      skipped
+    :param sizes: board sizes
+    :param densities: seeding densities
+    :param generations: generations per engine run
+    :param renderers: any of "console", "ansi" and "blender"
+    :param log_records: if above 0, also time a transition log of this size
+    :param memory: if False peak memory is not measured
+    :param repeat: runs per benchmark, keeping the best
+    :param progress: optional callable given each record as it completes
+    :param ensemble_runs: if above 0, also time ensembles of this many
+      universes (needs numpy)
+    :param randomizer: the [Universe] Randomizer the engines seed their
+      boards with
+    :return: a results document, ready to be written as JSON
+    """
+    results = []
+
+    def add(result):
+        result['name'] = record_name(result)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+
+    for engine in engines:
+        if not engine_available(engine):
+            print("skipping the %s engine, its dependencies are missing" %
+                  engine)
+            continue
+        for size in sizes:
+            for density in densities:
+                add(best_of(repeat, bench_engine, engine, size, density,
+                            generations, memory, randomizer))
+    for size in sizes:
+        for density in densities:
+            if "console" in renderers:
+                add(best_of(repeat, bench_console_render, size, density,
+                            generations))
+            if "ansi" in renderers:
+                add(best_of(repeat, bench_console_render, size, density,
+                            generations, "ansi"))
+            if "blender" in renderers:
+                add(best_of(repeat, bench_blender_render, "object", size,
+                            density, generations))
+            if ensemble_runs > 0 and Ensemble is not None:
+                add(best_of(repeat, bench_ensemble, size, density,
+                            ensemble_runs, generations))
+    if log_records > 0:
+        add(best_of(repeat, bench_transition_log, log_records))
+    return dict(python=platform.python_version(),
+                implementation=platform.python_implementation(),
+                platform=platform.platform(), cpus=os.cpu_count(),
+                time=time.strftime("%Y-%m-%dT%H:%M:%S"), results=results)
+
+
+def compare(baseline, current, threshold=0.1, floor=0.005):
+    """Compares two results documents.
+
+    :param baseline: the saved results
+    :param current: the new results
+    :param threshold: fractional change tolerated before a metric counts as
+      a regression
+    :param floor: durations (metrics ending in "_s") shorter than this many
+      seconds in both documents are too noisy to compare and are ignored
+    :return: (name, metric, baseline value, current value, change) for every
+      metric of a benchmark found in both documents that got worse by more
+      than threshold; change is the fraction by which it got worse
+    """
+    old = dict((result['name'], result) for result in baseline['results'])
+    regressions = []
+    for result in current['results']:
+        base = old.get(result['name'])
+        if base is None:
+            continue
+        for key, value in sorted(result.items()):
+            was = base.get(key)
+            if not was or not isinstance(value, (int, float)):
+                continue
+            if key.endswith("_per_s"):
+                change = (was - value) / was
+            elif key.endswith("_s") and max(was, value) < floor:
+                continue
+            elif key.endswith("_s") or key.endswith("_bytes"):
+                change = (value - was) / was
+            else:
+                continue
+            if change > threshold:
+                regressions.append((result['name'], key, was, value, change))
+    return regressions
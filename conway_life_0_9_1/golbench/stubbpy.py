@@ -0,0 +1,94 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import sys
+import types
+from collections import Counter
+
+
+class StubObject(object):
+    """Stands in for any Blender object, collection, operator or property.
+    Every attribute and item is another StubObject, created on first access
+    and kept, and calling one counts the call by attribute name and returns a
+    fresh StubObject, so scene setup and keyframing code runs unchanged.
+    """
+
+    def __init__(self, module, name):
+        """:param module: the StubBpy module that counts calls
+        :param name: the attribute name this object was reached through
+        """
+        object.__setattr__(self, '_module', module)
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_items', {})
+
+    def __getattr__(self, name):
+        child = StubObject(self._module, name)
+        object.__setattr__(self, name, child)
+        return child
+
+    def __getitem__(self, key):
+        child = self._items.get(key)
+        if child is None:
+            child = self._items[key] = StubObject(self._module, self._name)
+        return child
+
+    def __call__(self, *args, **kwargs):
+        self._module.calls[self._name] += 1
+        return StubObject(self._module, self._name)
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def __len__(self):
+        return len(self._items)
+
+
+class StubBpy(types.ModuleType):
+    """A headless stand-in for Blender's bpy module, used to time the Blender
+    renderer outside Blender. calls counts every bpy call by name, e.g.
+    calls['keyframe_insert'].
+    """
+
+    def __init__(self):
+        super(StubBpy, self).__init__('bpy')
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        child = StubObject(self, name)
+        setattr(self, name, child)
+        return child
+
+    def reset(self):
+        """Clears the call counts."""
+        self.calls.clear()
+
+
+def install():
+    """Makes "import bpy" return a StubBpy, unless a real bpy is already
+    loaded.
+
+    :return: the bpy module in use
+    """
+    bpy = sys.modules.get('bpy')
+    if bpy is None:
+        try:
+            import bpy
+        except ImportError:
+            bpy = sys.modules['bpy'] = StubBpy()
+    return bpy
@@ -0,0 +1,44 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+from golcontrol.simulation import Simulation
+
+
+class BitSimulation(Simulation):
+    """Computes each generation of a BitUniverse a whole row at a time with
+    bitwise logic.
+    """
+
+    def supports(self, rule):
+        """The bitwise logic is written for B3/S23 alone; the adders do not
+        tell four neighbours from any higher count.
+        """
+        return rule.is_life()
+
+    def advance(self):
+        """A cell lives on when it has exactly two neighbours and is alive, or
+        exactly three neighbours, i.e. when the twos bit is set, nothing of
+        weight four or more is set, and either the ones bit or the cell is.
+        """
+        self.generation += 1
+        universe = self.universe
+        count_bits = universe.get_neighbour_count_bits
+        grid = []
+        for row, cur in enumerate(universe.grid):
+            ones, twos, fours = count_bits(row)
+            grid.append(twos & ~fours & (ones | cur))
+        self.births, self.deaths = universe.commit(self.generation, grid)
@@ -0,0 +1,187 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import random
+import struct
+import threading
+import zlib
+
+
+class Checkpoint(object):
+    """Everything needed to resume a simulation exactly where it left off:
+    the packed cells, the generation, the state of the random module and how
+    far the transition log had got, including the transitions an unbounded
+    universe made outside its viewport, which are counted but not logged.
+
+    On disk a checkpoint is a fixed header followed by the random state and
+    the zlib-compressed cells:
+
+      magic, version, engine, rows, cols, generation, log count, log offset,
+      random state version, gauss flag, gauss value, cells length,
+      outside transitions,
+      624 + 1 uint32 words of Mersenne Twister state, compressed cells
+
+    Version 1 checkpoints, which lack the outside transitions, can still be
+    read.
+    """
+
+    MAGIC = b'GOLCKPT1'
+    VERSION = 2
+    PREFIX = struct.Struct('<8sH')
+    HEADER = struct.Struct('<8sH16sIIQQqBBdQQ')
+    HEADER_V1 = struct.Struct('<8sH16sIIQQqBBdQ')
+    MT_STATE = struct.Struct('<625I')
+
+    def __init__(self, engine, rows, cols, generation, cells, random_state,
+                 log_count=0, log_offset=-1, outside_transitions=0):
+        """:param engine: name of the engine which produced the cells
+        :param rows: rows in the universe
+        :param cols: columns in the universe
+        :param generation: the generation the cells belong to
+        :param cells: the universe's pack_cells() output
+        :param random_state: random.getstate() at that generation
+        :param log_count: number of transitions recorded so far
+        :param log_offset: size of the streamed transition log file, or -1 if
+          the log was held in memory
+        :param outside_transitions: transitions made outside the viewport of
+          an unbounded sparse or HashLife universe
+        """
+        self.engine = engine
+        self.rows = rows
+        self.cols = cols
+        self.generation = generation
+        self.cells = cells
+        self.random_state = random_state
+        self.log_count = log_count
+        self.log_offset = log_offset
+        self.outside_transitions = outside_transitions
+
+    @classmethod
+    def capture(cls, engine, universe, sim):
+        """Takes a checkpoint of a running simulation. Only cheap copies are
+        made here; compression happens in write().
+
+        :param engine: name of the engine in use
+        :param universe: the universe being simulated
+        :param sim: the simulation advancing it
+        """
+        log = universe.log
+        return cls(engine, universe.rows, universe.cols, sim.generation,
+                   universe.pack_cells(), random.getstate(), len(log),
+                   log.tell(), getattr(universe, 'outside_transitions', 0))
+
+    def restore(self, universe, sim):
+        """Puts a universe and simulation back into the checkpointed state.
+
+        :param universe: a freshly created universe of the same engine and size
+        :param sim: the simulation advancing it
+        """
+        if (universe.rows, universe.cols) != (self.rows, self.cols):
+            raise Exception("checkpoint is for a %dx%d universe, not %dx%d" %
+                            (self.rows, self.cols, universe.rows,
+                             universe.cols))
+        universe.unpack_cells(self.cells)
+        if hasattr(universe, 'outside_transitions'):
+            universe.outside_transitions = self.outside_transitions
+        sim.generation = self.generation
+        random.setstate(self.random_state)
+
+    def write(self, path):
+        """Writes the checkpoint to a file.
+
+        :param path: the file to write
+        """
+        version, mt, gauss = self.random_state
+        cells = zlib.compress(self.cells)
+        header = self.HEADER.pack(self.MAGIC, self.VERSION,
+                                  self.engine.encode('ascii'), self.rows,
+                                  self.cols, self.generation, self.log_count,
+                                  self.log_offset, version, gauss is not None,
+                                  gauss or 0.0, len(cells),
+                                  self.outside_transitions)
+        with open(path, 'wb') as f:
+            f.write(header)
+            f.write(self.MT_STATE.pack(*mt))
+            f.write(cells)
+
+    @classmethod
+    def read(cls, path):
+        """Reads a checkpoint written by write().
+
+        :param path: the file to read
+        :return: the Checkpoint
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, file_version = cls.PREFIX.unpack_from(data, 0)
+        if magic != cls.MAGIC or file_version not in (1, cls.VERSION):
+            raise Exception("%s is not a version 1 or %d checkpoint" %
+                            (path, cls.VERSION))
+        header = cls.HEADER if file_version == cls.VERSION else cls.HEADER_V1
+        fields = header.unpack_from(data, 0)
+        (magic, file_version, engine, rows, cols, generation, log_count,
+         log_offset, version, has_gauss, gauss, size) = fields[:12]
+        outside_transitions = fields[12] if len(fields) > 12 else 0
+        offset = header.size
+        mt = cls.MT_STATE.unpack_from(data, offset)
+        offset += cls.MT_STATE.size
+        cells = zlib.decompress(data[offset:offset + size])
+        random_state = (version, mt, gauss if has_gauss else None)
+        return cls(engine.rstrip(b'\0').decode('ascii'), rows, cols,
+                   generation, cells, random_state, log_count, log_offset,
+                   outside_transitions)
+
+    def __repr__(self):
+        return "{}[engine={}, rows={}, cols={}, generation={}]".format(
+            self.__class__.__name__, self.engine, self.rows, self.cols,
+            self.generation)
+
+
+class CheckpointWriter(object):
+    """Writes checkpoints on a background thread so that compression and disk
+    writes do not stall the simulation. At most one write is in flight; a new
+    checkpoint waits for the previous one to finish.
+    """
+
+    def __init__(self, path_pattern):
+        """:param path_pattern: path of the checkpoint files, with %d standing
+          for the generation
+        """
+        self.path_pattern = path_pattern
+        self.__thread = None
+
+    def write(self, checkpoint):
+        """Starts writing a checkpoint in the background.
+
+        :param checkpoint: the Checkpoint to write
+        :return: the path being written
+        """
+        self.wait()
+        if '%d' in self.path_pattern:
+            path = self.path_pattern % checkpoint.generation
+        else:
+            path = self.path_pattern
+        self.__thread = threading.Thread(target=checkpoint.write,
+                                         args=(path,))
+        self.__thread.start()
+        return path
+
+    def wait(self):
+        """Blocks until the checkpoint being written (if any) is on disk."""
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
@@ -0,0 +1,139 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+from array import array
+from collections import OrderedDict, deque
+
+from golmodel.splitmix import splitmix64
+
+
+class CycleDetector(object):
+    """Detects when a universe returns to a state it has been in before.
+
+    The state is summarized by a Zobrist hash: the XOR of a random 64-bit key
+    for every living cell. Each transition toggles one cell, so the hash is
+    kept up to date by XORing in the key of every cell written to the
+    universe's TransitionLog, without ever looking at unchanged cells. The
+    hashes of the last history generations are kept in a table, along with
+    the transitions of those generations so that a detected cycle can be
+    played forward without simulating it.
+    """
+
+    def __init__(self, universe, generation=0, history=256, seed=0):
+        """:param universe: a bounded universe, already seeded
+        :param generation: the generation the universe is currently at
+        :param history: number of generations to remember
+        :param seed: varies the Zobrist keys
+        """
+        self.universe = universe
+        self.history = history
+        self.salt = splitmix64(seed)
+        self.period = None
+        self.cycle_start = None
+        self.hashes = OrderedDict()
+        self.changes = deque(maxlen=history)
+        self.__pending = ([], [], [])
+
+        flags = universe.get_alive_flags()
+        self.hash = 0
+        pos = flags.find(1)
+        while pos >= 0:
+            self.hash ^= self.key(pos)
+            pos = flags.find(1, pos + 1)
+        self.hashes[self.hash] = generation
+        universe.log.listeners.append(self.record)
+
+    def key(self, cell):
+        """:return: the Zobrist key of a cell"""
+        return splitmix64(cell ^ self.salt)
+
+    def record(self, generation, cells, states):
+        """TransitionLog listener: folds a batch of transitions into the hash
+        and keeps them for the current generation.
+        """
+        h = self.hash
+        salt = self.salt
+        for cell in cells:
+            h ^= splitmix64(cell ^ salt)
+        self.hash = h
+        gens, pending_cells, pending_states = self.__pending
+        gens.extend([generation] * len(cells))
+        pending_cells.extend(cells)
+        pending_states.extend(states)
+
+    def update(self, generation):
+        """Called once a generation has been committed.
+
+        :param generation: the generation just committed
+        :return: the period of the cycle if the state has been seen before,
+          otherwise None
+        """
+        gens, cells, states = self.__pending
+        self.changes.append((array('I', gens), array('I', cells),
+                             array('b', states)))
+        self.__pending = ([], [], [])
+        seen = self.hashes.get(self.hash)
+        if seen is not None:
+            self.cycle_start = seen
+            self.period = generation - seen
+            return self.period
+        self.hashes[self.hash] = generation
+        if len(self.hashes) > self.history:
+            self.hashes.popitem(last=False)
+        return None
+
+    def cycle_transitions(self):
+        """:return: {generation: [(cells, states), ...]} for every generation of
+          the detected cycle
+        """
+        result = {}
+        for gens, cells, states in self.changes:
+            for generation, cell, state in zip(gens, cells, states):
+                if generation > self.cycle_start:
+                    batch = result.setdefault(generation, ([], []))
+                    batch[0].append(cell)
+                    batch[1].append(state)
+        return result
+
+    def extrapolate(self, first_generation, last_generation, listener=None):
+        """Writes the transitions of a range of generations to the universe's
+        log by repeating the detected cycle. Call close() first so that the
+        written transitions are not fed back into the hash.
+
+        :param first_generation: the first generation to fill in, which must
+          come after the cycle was detected
+        :param last_generation: the final generation of the run
+        :param listener: optional callable given the generation and the new
+          states of every generation filled in, including those without any
+          transitions
+        :return: the number of generations filled in
+        """
+        log = self.universe.log
+        cycle = self.cycle_transitions()
+        start = self.cycle_start
+        for generation in range(first_generation, last_generation + 1):
+            source = start + ((generation - start - 1) % self.period) + 1
+            cells, states = cycle.get(source, ((), ()))
+            log.extend(generation, cells, states)
+            if listener is not None:
+                listener(generation, states)
+        return max(last_generation - first_generation + 1, 0)
+
+    def close(self):
+        """Stops listening to the universe's log."""
+        if self.record in self.universe.log.listeners:
+            self.universe.log.listeners.remove(self.record)
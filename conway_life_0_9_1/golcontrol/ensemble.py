@@ -0,0 +1,277 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import multiprocessing
+import os
+import random
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from golcontrol.numpysimulation import NumpySimulation
+from golmodel.numpyuniverse import NumpyUniverse
+from golmodel.randomfield import RandomField
+from golmodel.rule import LIFE
+
+
+def parse_seeds(text):
+    """Reads a list of seeds such as "1-100, 250, abc". Ranges of integers
+    are inclusive; anything else is used as it is, like RandomSeed.
+
+    :return: the seeds, as strings
+    """
+    seeds = []
+    for token in text.replace(",", " ").split():
+        low, sep, high = token.partition("-")
+        if sep and low.isdigit() and high.isdigit():
+            seeds.extend(str(seed) for seed in range(int(low), int(high) + 1))
+        else:
+            seeds.append(token)
+    return seeds
+
+
+class EnsembleRun(object):
+    """One member of an ensemble: its parameters and, once simulated, its
+    statistics. A run ends when its board repeats one of its recent states
+    (a still life, an oscillator or nothing at all) or when the generation
+    count is reached.
+    """
+
+    def __init__(self, index, seed, size, threshold,
+                 randomizer="sequential"):
+        """:param index: position of the run in the ensemble
+        :param seed: RandomSeed of the run
+        :param size: cells per side of the board
+        :param threshold: randomize() threshold of the initial layout
+        :param randomizer: the [Universe] Randomizer the layout is drawn with,
+          "sequential" or "counter"
+        """
+        self.index = index
+        self.seed = seed
+        self.size = size
+        self.threshold = threshold
+        self.randomizer = randomizer
+        self.generations = 0        # generations simulated
+        self.lifetime = None        # first generation of the final cycle
+        self.period = None
+        self.initial_population = 0
+        self.population = 0
+        self.transitions = 0        # cell changes after the initial layout
+
+    def seed_cells(self):
+        """Lays the board out exactly as GOLDriver would with this run's
+        RandomSeed, Size, threshold and Randomizer.
+
+        :return: 2D uint8 array of cell states
+        """
+        random.seed(self.seed)
+        universe = NumpyUniverse(self.size, self.size)
+        if self.randomizer == "counter":
+            universe.random_field = RandomField(self.seed)
+        universe.randomize(self.threshold)
+        return universe.cells
+
+    def record(self):
+        """:return: the run's statistics as a flat dict"""
+        return dict(run=self.index, seed=self.seed, size=self.size,
+                    threshold=self.threshold, generations=self.generations,
+                    settled=self.lifetime is not None, lifetime=self.lifetime,
+                    period=self.period,
+                    initial_population=self.initial_population,
+                    population=self.population, transitions=self.transitions)
+
+    def __repr__(self):
+        return "{}[run={}, seed={}, size={}, threshold={}]".format(
+            self.__class__.__name__, self.index, self.seed, self.size,
+            self.threshold)
+
+
+def simulate_batch(runs, generation_count, rule=LIFE, history=16):
+    """Simulates runs of the same size together, as one 3D array with a
+    board per run, applying the rule exactly as NumpySimulation does. Every
+    board's state is hashed each generation; a board which repeats one of its
+    last history states has settled and is dropped from the array, so the
+    work shrinks as the batch settles.
+
+    :param runs: EnsembleRuns, all of the same size
+    :param generation_count: generations to simulate at most
+    :param rule: the golmodel.rule.Rule to apply
+    :param history: generations remembered per board when looking for a
+      repeat
+    :return: the runs, with their statistics filled in
+    """
+    cells = np.stack([run.seed_cells() for run in runs])
+    lut = np.frombuffer(rule.table, dtype=np.uint8)
+    active = list(runs)
+    seen = []
+    for run, board in zip(active, cells):
+        run.initial_population = int(np.count_nonzero(board == 1))
+        seen.append(OrderedDict([(hash(board.tobytes()), 0)]))
+
+    for generation in range(1, generation_count + 1):
+        nbs = NumpySimulation.count_neighbours(cells, rule)
+        if rule.states > 2:
+            next_cells = NumpySimulation.lookup_cells(cells, nbs, lut,
+                                                      rule.stride)
+        else:
+            born, died = NumpySimulation.evolve_cells(cells, nbs, rule)
+            next_cells = cells | born.view(np.uint8)
+            next_cells &= ~died.view(np.uint8)
+        changed = np.count_nonzero(
+            (next_cells != cells).reshape(len(active), -1), axis=1)
+        cells = next_cells
+
+        settled = []
+        for i, run in enumerate(active):
+            run.transitions += int(changed[i])
+            key = hash(cells[i].tobytes())
+            start = seen[i].get(key)
+            if start is not None:
+                run.lifetime = start
+                run.period = generation - start
+                settled.append(i)
+                continue
+            seen[i][key] = generation
+            if len(seen[i]) > history:
+                seen[i].popitem(last=False)
+        if settled:
+            for i in settled:
+                _finish(active[i], cells[i], generation)
+            keep = np.ones(len(active), dtype=bool)
+            keep[settled] = False
+            cells = cells[keep]
+            active = [run for run, k in zip(active, keep) if k]
+            seen = [s for s, k in zip(seen, keep) if k]
+            if not active:
+                break
+    for run, board in zip(active, cells):
+        _finish(run, board, generation_count)
+    return runs
+
+
+def _finish(run, board, generation):
+    """Fills in the statistics which come from a run's final board."""
+    run.generations = generation
+    run.population = int(np.count_nonzero(board == 1))
+
+
+def _simulate_batch(args):
+    """Pool entry point for simulate_batch()."""
+    return simulate_batch(*args)
+
+
+class Ensemble(object):
+    """Simulates many independent universes: every combination of a list of
+    seeds, board sizes and randomize() thresholds. Runs of the same size are
+    stepped together in batches (see simulate_batch()), and the batches are
+    spread over a pool of worker processes. Each run's statistics are written
+    to the sinks as soon as its batch finishes.
+    """
+
+    def __init__(self, seeds, sizes, thresholds, generation_count, rule=None,
+                 batch_size=64, history=16, processes=1,
+                 randomizer="sequential"):
+        """:param seeds: RandomSeeds to run
+        :param sizes: board sizes to run each seed at
+        :param thresholds: randomize() thresholds to run each seed at
+        :param generation_count: generations to simulate each run for at most
+        :param rule: the golmodel.rule.Rule to apply (B3/S23 if not given)
+        :param batch_size: runs stepped together in one array
+        :param history: generations remembered per run when looking for a
+          repeat
+        :param processes: worker processes, 0 for one per CPU, 1 to simulate
+          in this process
+        :param randomizer: the [Universe] Randomizer the initial layouts are
+          drawn with, "sequential" or "counter"
+        """
+        if randomizer not in ("sequential", "counter"):
+            raise Exception("unsupported randomizer '%r'" % randomizer)
+        combinations = [(seed, size, threshold) for size in sizes
+                        for threshold in thresholds for seed in seeds]
+        self.runs = [EnsembleRun(i, *combination, randomizer=randomizer)
+                     for i, combination in enumerate(combinations)]
+        self.generation_count = generation_count
+        self.rule = rule if rule is not None else LIFE
+        self.batch_size = max(batch_size, 1)
+        self.history = history
+        self.processes = processes if processes > 0 else os.cpu_count() or 1
+        self.elapsed = 0.0
+
+    def batches(self):
+        """:return: the runs split into batches of at most batch_size runs of
+          the same size
+        """
+        result = []
+        for run in self.runs:
+            if result and len(result[-1]) < self.batch_size and \
+                    result[-1][0].size == run.size:
+                result[-1].append(run)
+            else:
+                result.append([run])
+        return result
+
+    def run(self, sinks=()):
+        """Simulates every run.
+
+        :param sinks: golcontrol.profiler sinks which receive one record per
+          run, in the order the batches finish
+        :return: the summary, see summary()
+        """
+        jobs = [(batch, self.generation_count, self.rule, self.history)
+                for batch in self.batches()]
+        start = time.perf_counter()
+        if self.processes == 1 or len(jobs) == 1:
+            self.__collect(map(_simulate_batch, jobs), sinks)
+        else:
+            with multiprocessing.Pool(min(self.processes, len(jobs))) as pool:
+                self.__collect(pool.imap_unordered(_simulate_batch, jobs),
+                               sinks)
+        self.elapsed = time.perf_counter() - start
+        for sink in sinks:
+            sink.close()
+        return self.summary()
+
+    def __collect(self, batches, sinks):
+        """Writes the records of the finished batches, and keeps the runs
+        that came back from worker processes.
+        """
+        for batch in batches:
+            for run in batch:
+                self.runs[run.index] = run
+                record = run.record()
+                for sink in sinks:
+                    sink.write(record)
+
+    def summary(self):
+        """:return: the throughput and totals of the whole ensemble"""
+        runs = self.runs
+        elapsed = max(self.elapsed, 1e-9)
+        settled = [run for run in runs if run.lifetime is not None]
+        return dict(universes=len(runs), elapsed_s=self.elapsed,
+                    universes_per_s=len(runs) / elapsed,
+                    generations=sum(run.generations for run in runs),
+                    settled=len(settled),
+                    mean_lifetime=(sum(run.lifetime for run in settled) /
+                                   len(settled)) if settled else None,
+                    mean_population=(sum(run.population for run in runs) /
+                                     len(runs)) if runs else None)
+
+    def __repr__(self):
+        return "{}[runs={}, generations={}, rule={}]".format(
+            self.__class__.__name__, len(self.runs), self.generation_count,
+            self.rule)
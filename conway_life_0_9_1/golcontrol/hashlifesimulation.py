@@ -0,0 +1,47 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+from golcontrol.simulation import Simulation
+
+
+class HashLifeSimulation(Simulation):
+    """Advances a HashLifeUniverse, which can skip any number of generations
+    at once.
+    """
+
+    def supports(self, rule):
+        """The rule is built into the universe's quadtree, whose memoized
+        results are only valid for that rule.
+        """
+        return rule == self.universe.hashlife.rule
+
+    def advance(self):
+        """Advances to the next generation."""
+        self.advance_to(self.generation + 1)
+
+    def advance_to(self, generation):
+        """Jumps straight to the given generation without visiting the ones in
+        between. births and deaths are the net change between the two states.
+
+        :param generation: the generation to advance to
+        """
+        count = generation - self.generation
+        if count < 0:
+            raise Exception("cannot go back to generation %d from %d" %
+                            (generation, self.generation))
+        self.generation = generation
+        self.births, self.deaths = self.universe.jump(generation, count)
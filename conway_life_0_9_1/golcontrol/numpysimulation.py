@@ -0,0 +1,136 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import numpy as np
+
+from golcontrol.simulation import Simulation
+from golmodel.numpyuniverse import neighbour_counts, summed_area_counts
+from golmodel.rule import LIFE
+
+
+class NumpySimulation(Simulation):
+    """Computes a whole generation at once over a NumpyUniverse.
+
+    Two-state rules are applied as birth and death masks, each built by
+    comparing the neighbour counts against the runs of consecutive counts in
+    the rule, so B3/S23 costs exactly the comparisons it always did. Rules
+    with more states look every cell's next state up in the rule's table.
+    Rules with a larger neighbourhood count it from a summed-area table.
+    """
+
+    def __init__(self, universe, rule=None):
+        """:param rule: the golmodel.rule.Rule to apply"""
+        Simulation.__init__(self, universe, rule)
+        self.lut = np.frombuffer(self.rule.table, dtype=np.uint8)
+
+    def advance(self):
+        """Computes the birth and death masks for the entire grid from the
+        array of neighbour counts and commits them in one pass.
+        """
+        self.generation += 1
+        universe = self.universe
+        cells = universe.cells
+        nbs = self.count_neighbours(cells, self.rule)
+        if self.rule.states > 2:
+            next_cells = self.lookup_cells(cells, nbs, self.lut,
+                                           self.rule.stride)
+            self.births, self.deaths = self.count_changes(cells, next_cells)
+            universe.swap(self.generation, next_cells)
+            return
+        born, died = self.evolve_cells(cells, nbs, self.rule)
+        self.births = int(np.count_nonzero(born))
+        self.deaths = int(np.count_nonzero(died))
+        universe.commit(self.generation, born, died)
+
+    @staticmethod
+    def count_neighbours(cells, rule):
+        """Counts the living (state 1) cells in the rule's neighbourhood of
+        every cell in a block.
+
+        :param cells: uint8 array of cell states
+        :param rule: the golmodel.rule.Rule being applied
+        :return: an array shaped like cells holding neighbour counts
+        """
+        if rule.states > 2:
+            cells = (cells == 1).view(np.uint8)
+        if rule.neighbourhood.is_standard():
+            return neighbour_counts(cells)
+        return summed_area_counts(cells, rule.neighbourhood)
+
+    @staticmethod
+    def count_mask(nbs, runs, top=8):
+        """:param nbs: neighbour counts
+        :param runs: (lowest, highest) runs of counts, from Rule.runs()
+        :param top: the largest count possible
+        :return: boolean mask of the cells whose count falls in any run
+        """
+        mask = None
+        for low, high in runs:
+            if low == high:
+                match = nbs == low
+            elif low == 0:
+                match = nbs <= high
+            elif high == top:
+                match = nbs >= low
+            else:
+                match = (nbs >= low) & (nbs <= high)
+            mask = match if mask is None else mask | match
+        if mask is None:
+            return np.zeros(nbs.shape, dtype=bool)
+        return mask
+
+    @staticmethod
+    def evolve_cells(cells, nbs, rule=LIFE):
+        """Applies a two-state rule to a block of cells.
+
+        :param cells: uint8 array of cell states
+        :param nbs: neighbour counts for the same cells
+        :param rule: the golmodel.rule.Rule to apply
+        :return: (born, died) boolean masks
+        """
+        top = rule.stride - 1
+        alive = cells.astype(bool)
+        born = ~alive & NumpySimulation.count_mask(nbs, rule.birth_runs, top)
+        died = alive & NumpySimulation.count_mask(nbs, rule.death_runs, top)
+        return born, died
+
+    @staticmethod
+    def lookup_cells(cells, nbs, lut, stride=9, out=None):
+        """Applies a rule of any number of states to a block of cells with one
+        gather from its table.
+
+        :param cells: uint8 array of cell states
+        :param nbs: counts of the living (state 1) neighbours of the cells
+        :param lut: the rule's table as a uint8 array
+        :param stride: the rule's stride, one more than the largest count
+        :param out: optional array to write the next states to
+        :return: uint8 array of the next states
+        """
+        if len(lut) <= 256 and nbs.dtype == np.uint8:
+            index = cells * np.uint8(stride)
+        else:
+            index = cells.astype(np.int32) * stride
+        index += nbs
+        return lut.take(index, out=out)
+
+    @staticmethod
+    def count_changes(cells, next_cells):
+        """:return: (births, deaths) between two generations of a block"""
+        alive = cells == 1
+        next_alive = next_cells == 1
+        return (int(np.count_nonzero(next_alive & ~alive)),
+                int(np.count_nonzero(alive & ~next_alive)))
@@ -0,0 +1,225 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import multiprocessing
+import os
+import time
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+from golcontrol.numpysimulation import NumpySimulation
+from golcontrol.simulation import Simulation
+
+
+def _band_worker(index, workers, names, shape, band, conn, rule):
+    """Worker process body. Maps the two grid buffers and the counts table
+    from shared memory once, then computes its band of rows every time the
+    main process sends it the buffer to read from, and answers when the band
+    is written. The halo rows above and below the band are read straight out
+    of the shared source buffer, so nothing but those two small messages is
+    pickled between generations. The worker stops when sent -1 or when the
+    main process goes away.
+
+    :param index: worker number, used as the row in the counts table
+    :param workers: total number of workers
+    :param names: shared memory names of the two grid buffers and the counts
+      table
+    :param shape: (rows, cols) of the grid
+    :param band: (first row, last row + 1) owned by this worker
+    :param conn: this worker's end of a pipe to the main process
+    :param rule: the golmodel.rule.Rule to apply
+    """
+    shms = [shared_memory.SharedMemory(name=name) for name in names]
+    grids = [np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+             for shm in shms[:2]]
+    counts = np.ndarray((workers, 2), dtype=np.int64, buffer=shms[2].buf)
+    r0, r1 = band
+    halo = rule.neighbourhood.radius
+    top = max(r0 - halo, 0)
+    bottom = min(r1 + halo, shape[0])
+    lut = np.frombuffer(rule.table, dtype=np.uint8)
+    block = cells = dst = None
+    try:
+        while True:
+            src = conn.recv()
+            if src < 0:
+                break
+            block = grids[src][top:bottom]
+            cells = block[r0 - top:r1 - top]
+            dst = grids[1 - src][r0:r1]
+            nbs = NumpySimulation.count_neighbours(block, rule)[
+                r0 - top:r1 - top]
+            if rule.states > 2:
+                NumpySimulation.lookup_cells(cells, nbs, lut, rule.stride,
+                                             out=dst)
+                counts[index] = NumpySimulation.count_changes(cells, dst)
+            else:
+                born, died = NumpySimulation.evolve_cells(cells, nbs, rule)
+                np.bitwise_or(cells, born.view(np.uint8), out=dst)
+                np.bitwise_and(dst, ~died.view(np.uint8), out=dst)
+                counts[index, 0] = np.count_nonzero(born)
+                counts[index, 1] = np.count_nonzero(died)
+            conn.send(index)
+    except (EOFError, OSError):
+        pass    # the main process gave up on the pool
+    del grids, counts, block, cells, dst
+    for shm in shms:
+        shm.close()
+
+
+class ParallelSimulation(Simulation):
+    """Advances a NumpyUniverse with a pool of worker processes, each of
+    which owns a band of rows. The grid is double-buffered in shared memory:
+    workers read the current generation from one buffer and write the next
+    into the other, then the buffers trade places. The result is identical to
+    the serial simulations.
+
+    The main process waits at most timeout seconds for the workers to finish
+    a generation, and notices straight away if one of them exits. Either way
+    the pool is shut down and an exception says what went wrong.
+    """
+
+    TIMEOUT = 60.0
+    GRACE = 1.0     # seconds a failed pool is given to stop by itself
+
+    def __init__(self, universe, workers=None, rule=None, timeout=TIMEOUT):
+        """:param workers: number of worker processes (defaults to the number
+          of CPUs, and is never more than the number of rows)
+        :param rule: the golmodel.rule.Rule to apply
+        :param timeout: seconds to wait for the workers to finish a
+          generation
+        """
+        Simulation.__init__(self, universe, rule)
+        self.timeout = timeout
+        if workers is None or workers < 1:
+            workers = os.cpu_count() or 1
+        self.workers = min(workers, universe.rows)
+        shape = universe.cells.shape
+        sizes = (universe.cells.nbytes, universe.cells.nbytes,
+                 self.workers * 16)
+        self.__shms = [shared_memory.SharedMemory(create=True, size=size)
+                       for size in sizes]
+        self.__grids = [np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+                        for shm in self.__shms[:2]]
+        self.__counts = np.ndarray((self.workers, 2), dtype=np.int64,
+                                   buffer=self.__shms[2].buf)
+        self.__src = 0
+        self.__grids[0][...] = universe.cells
+        universe.cells = self.__grids[0]
+
+        names = [shm.name for shm in self.__shms]
+        self.__conns = []
+        self.__procs = []
+        for i in range(self.workers):
+            band = (universe.rows * i // self.workers,
+                    universe.rows * (i + 1) // self.workers)
+            conn, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(
+                target=_band_worker, daemon=True,
+                args=(i, self.workers, names, shape, band, child, self.rule))
+            proc.start()
+            child.close()
+            self.__conns.append(conn)
+            self.__procs.append(proc)
+
+    def advance(self):
+        """Releases the workers on the current buffer, waits for every band to
+        be written, then swaps the buffers.
+        """
+        self.generation += 1
+        universe = self.universe
+        if universe.cells is not self.__grids[self.__src]:
+            # the universe was changed outside of the simulation
+            self.__grids[self.__src][...] = universe.cells
+            universe.cells = self.__grids[self.__src]
+        for conn in self.__conns:
+            try:
+                conn.send(self.__src)
+            except OSError:
+                pass    # the worker has exited, which __wait() reports
+        self.__wait()
+        self.births = int(self.__counts[:, 0].sum())
+        self.deaths = int(self.__counts[:, 1].sum())
+        self.__src = 1 - self.__src
+        universe.swap(self.generation, self.__grids[self.__src])
+
+    def __wait(self):
+        """Waits for every worker to answer, giving up after timeout seconds
+        or as soon as a worker exits.
+        """
+        pending = {conn: proc for conn, proc in
+                   zip(self.__conns, self.__procs)}
+        sentinels = {proc.sentinel: proc for proc in self.__procs}
+        deadline = time.monotonic() + self.timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            ready = connection.wait(list(pending) + list(sentinels),
+                                    max(remaining, 0))
+            if not ready:
+                self.__stop(self.GRACE)
+                raise Exception("parallel band workers did not finish a "
+                                "generation within %.1fs" % self.timeout)
+            for obj in ready:
+                proc = sentinels.get(obj)
+                if proc is None:
+                    try:
+                        obj.recv()
+                        del pending[obj]
+                        continue
+                    except EOFError:    # the worker closed its pipe
+                        proc = pending[obj]
+                proc.join()
+                index = self.__procs.index(proc)
+                self.__stop(self.GRACE)
+                raise Exception("parallel band worker %d exited with code "
+                                "%d" % (index, proc.exitcode))
+
+    def close(self):
+        """Stops the workers and releases the shared memory. The universe is
+        left holding a private copy of the last generation. Workers which do
+        not stop when told to are killed. Safe to call more than once.
+        """
+        self.__stop(self.timeout)
+
+    def __stop(self, wait):
+        """Implements close().
+
+        :param wait: seconds given to each worker to stop before it is killed
+        """
+        if not self.__procs:
+            return
+        self.universe.cells = self.universe.cells.copy()
+        for conn in self.__conns:
+            try:
+                conn.send(-1)
+            except OSError:
+                pass    # the worker has gone already
+        # a worker still busy with a generation finishes it first
+        for proc in self.__procs:
+            proc.join(wait)
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+        for conn in self.__conns:
+            conn.close()
+        self.__conns = []
+        self.__procs = []
+        del self.__grids, self.__counts
+        for shm in self.__shms:
+            shm.close()
+            shm.unlink()
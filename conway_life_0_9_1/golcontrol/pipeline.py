@@ -0,0 +1,166 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import queue
+import threading
+import time
+
+
+class Frame(object):
+    """An immutable snapshot of one generation. A renderer can draw it in
+    place of the universe, as it has the universe's rows, cols,
+    lifeform_count and get_alive_flags(). It also refers to the universe's
+    TransitionLog, which is shared rather than copied and so is only
+    complete once the run has finished (renderers which read it, such as
+    the bake and Blender renderers, do so in close()).
+    """
+
+    __slots__ = ('generation', 'rows', 'cols', 'lifeform_count', 'flags',
+                 'births', 'deaths', 'log')
+
+    def __init__(self, generation, rows, cols, flags, births=0, deaths=0,
+                 log=None):
+        """:param generation: the generation shown
+        :param rows: rows in the universe
+        :param cols: columns in the universe
+        :param flags: get_alive_flags() of the universe at that generation
+        :param births: cells born since the previous frame
+        :param deaths: cells which died since the previous frame
+        :param log: the universe's TransitionLog
+        """
+        for name, value in (('generation', generation), ('rows', rows),
+                            ('cols', cols), ('lifeform_count', rows * cols),
+                            ('flags', bytes(flags)), ('births', births),
+                            ('deaths', deaths), ('log', log)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("frames are immutable")
+
+    @classmethod
+    def capture(cls, sim):
+        """Takes a snapshot of the generation a simulation has reached.
+
+        :param sim: the Simulation
+        :return: the Frame
+        """
+        universe = sim.universe
+        return cls(sim.generation, universe.rows, universe.cols,
+                   universe.get_alive_flags(), sim.births, sim.deaths,
+                   universe.log)
+
+    def get_alive_flags(self):
+        """:return: one byte per cell in row-major order, 1 if alive and 0
+          otherwise
+        """
+        return self.flags
+
+    def __repr__(self):
+        return "{}[generation={}, rows={}, cols={}, births={}, deaths={}]" \
+            .format(self.__class__.__name__, self.generation, self.rows,
+                    self.cols, self.births, self.deaths)
+
+
+class Pipeline(object):
+    """Runs a generator on a worker thread ahead of its consumer, passing
+    what it yields through a queue of at most depth items. The producer
+    blocks when the queue is full, so at most depth + 2 items (those
+    queued, the one being produced and the one being consumed) exist at
+    once. Iterating over the pipeline yields the items in order; an
+    exception raised by the generator is raised again in the consumer.
+
+    Every time the consumer finds the queue empty it has stalled, waiting
+    for the producer; stalls and stall_s count how often and for how long.
+    """
+
+    DONE = object()
+    POLL = 0.1      # seconds between checks for close() by a blocked producer
+
+    def __init__(self, items, depth=4):
+        """:param items: the generator to run
+        :param depth: the most items queued ahead of the consumer
+        """
+        if depth < 1:
+            raise Exception("a pipeline needs a depth of at least 1")
+        self.depth = depth
+        self.received = 0
+        self.stalls = 0
+        self.stall_s = 0.0
+        self.__queue = queue.Queue(depth)
+        self.__closed = threading.Event()
+        self.__thread = threading.Thread(target=self.__produce, args=(items,),
+                                         daemon=True)
+        self.__thread.start()
+
+    def __put(self, item):
+        """Queues an item, giving up if the pipeline is closed meanwhile.
+
+        :return: False if the pipeline was closed
+        """
+        while not self.__closed.is_set():
+            try:
+                self.__queue.put(item, timeout=self.POLL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __produce(self, items):
+        """Body of the worker thread."""
+        try:
+            for item in items:
+                if not self.__put((item, None)):
+                    return
+        except BaseException as e:
+            self.__put((self.DONE, e))
+            return
+        self.__put((self.DONE, None))
+
+    def wait(self):
+        """Blocks until the producer has queued an item.
+
+        :return: the (item, exception) pair queued
+        """
+        return self.__queue.get()
+
+    def __iter__(self):
+        while True:
+            try:
+                item, error = self.__queue.get_nowait()
+            except queue.Empty:
+                start = time.perf_counter()
+                item, error = self.wait()
+                if item is not self.DONE:
+                    self.stalls += 1
+                    self.stall_s += time.perf_counter() - start
+            if item is self.DONE:
+                self.__thread.join()
+                if error is not None:
+                    raise error
+                return
+            self.received += 1
+            yield item
+
+    def close(self):
+        """Stops the producer at its next item and waits for it to finish."""
+        self.__closed.set()
+        self.__thread.join()
+
+    def __repr__(self):
+        return "{}[depth={}, received={}, stalls={}, stall_s={:.4f}]".format(
+            self.__class__.__name__, self.depth, self.received, self.stalls,
+            self.stall_s)
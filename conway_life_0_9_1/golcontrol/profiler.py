@@ -0,0 +1,258 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import abc
+import contextlib
+import csv
+import json
+import threading
+import time
+import tracemalloc
+
+
+class ProfileSink(object):
+    """Receives the per-generation records of a Profiler."""
+
+    @abc.abstractmethod
+    def write(self, record):
+        """:param record: a flat dict of counters for one generation"""
+        raise NotImplementedError
+
+    def close(self):
+        """Called once the run has finished."""
+        pass
+
+
+class CallbackSink(ProfileSink):
+    """Hands every record to a callable, for in-process consumers."""
+
+    def __init__(self, callback):
+        """:param callback: called with each record"""
+        self.callback = callback
+
+    def write(self, record):
+        self.callback(record)
+
+
+class JsonLinesSink(ProfileSink):
+    """Writes every record as one line of JSON."""
+
+    def __init__(self, path):
+        """:param path: the file to write, replaced if it exists"""
+        self.file = open(path, 'w')
+
+    def write(self, record):
+        self.file.write(json.dumps(record, sort_keys=True))
+        self.file.write("\n")
+
+    def close(self):
+        self.file.close()
+
+
+class CsvSink(ProfileSink):
+    """Writes the records as CSV rows, with a header taken from the first."""
+
+    def __init__(self, path):
+        """:param path: the file to write, replaced if it exists"""
+        self.file = open(path, 'w', newline='')
+        self.writer = None
+
+    def write(self, record):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, sorted(record))
+            self.writer.writeheader()
+        self.writer.writerow(record)
+
+    def close(self):
+        self.file.close()
+
+
+class Profiler(object):
+    """Per-phase timings and per-generation counters for a run.
+
+    Phases are timed by instrument(), which replaces a method of one object
+    with a wrapper that adds up its wall time, CPU time, calls and, when
+    allocations are traced, the net bytes it left allocated. Nothing is
+    wrapped unless a Profiler is created, so a run without one pays nothing.
+    Phases may nest (advance includes commit), in which case the outer phase
+    includes the inner one. CPU time is that of this process only, so work
+    done by worker processes shows up as wall time alone.
+
+    Counters are kept per thread, so a phase timed on a worker thread is
+    never reset halfway by record() on another. Every call to record() sends
+    the counters its thread gathered since the previous call to the sinks
+    along with the generation's births, deaths and population, then resets
+    them. Counters gathered on another thread are handed over with take()
+    and passed to record() for the generation they belong to.
+    """
+
+    COUNTERS = ("wall_s", "cpu_s", "calls", "alloc_bytes")
+
+    def __init__(self, sinks=(), allocations=False):
+        """:param sinks: the ProfileSinks to send records to
+        :param allocations: if True, allocations are traced with tracemalloc,
+          which slows the run down considerably
+        """
+        self.sinks = list(sinks)
+        self.allocations = allocations
+        self.population = 0
+        self.totals = {}
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__tracing = allocations and not tracemalloc.is_tracing()
+        if self.__tracing:
+            tracemalloc.start()
+
+    @property
+    def phases(self):
+        """{phase: [wall, cpu, calls, alloc]} gathered by the calling thread
+        since its previous record() or take()
+        """
+        phases = getattr(self.__local, 'phases', None)
+        if phases is None:
+            phases = self.__local.phases = {}
+        return phases
+
+    def __register(self, phase):
+        """Adds a phase to the totals, so that every record has its
+        counters.
+        """
+        with self.__lock:
+            if phase not in self.totals:
+                self.totals[phase] = [0.0, 0.0, 0, 0]
+
+    def __counters(self, phase):
+        """:return: the calling thread's running [wall, cpu, calls, alloc]
+          list of a phase
+        """
+        phases = self.phases
+        counters = phases.get(phase)
+        if counters is None:
+            counters = phases[phase] = [0.0, 0.0, 0, 0]
+        return counters
+
+    def instrument(self, obj, method, phase=None):
+        """Times every call to obj.method as the given phase.
+
+        :param obj: the object whose method should be timed
+        :param method: the method name
+        :param phase: the phase name; defaults to the method name
+        """
+        func = getattr(obj, method)
+        phase = phase or method
+        self.__register(phase)
+        counters_of = self.__counters
+        allocations = self.allocations
+        clock = time.perf_counter
+        cpu = time.process_time
+        traced = tracemalloc.get_traced_memory
+
+        def timed(*args, **kwargs):
+            mem = traced()[0] if allocations else 0
+            start = clock()
+            start_cpu = cpu()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                counters = counters_of(phase)
+                counters[0] += clock() - start
+                counters[1] += cpu() - start_cpu
+                counters[2] += 1
+                if allocations:
+                    counters[3] += traced()[0] - mem
+
+        setattr(obj, method, timed)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Times a block of code as the given phase."""
+        self.__register(name)
+        mem = tracemalloc.get_traced_memory()[0] if self.allocations else 0
+        start = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            counters = self.__counters(name)
+            counters[0] += time.perf_counter() - start
+            counters[1] += time.process_time() - start_cpu
+            counters[2] += 1
+            if self.allocations:
+                counters[3] += tracemalloc.get_traced_memory()[0] - mem
+
+    def take(self):
+        """Hands over the counters the calling thread gathered since its
+        previous record() or take(), and resets them.
+
+        :return: {phase: [wall, cpu, calls, alloc]}, to pass to record()
+        """
+        phases = self.phases
+        self.__local.phases = {}
+        return phases
+
+    def record(self, generation, births=0, deaths=0, taken=(),
+               extrapolated=False):
+        """Ends a generation, sending its record to the sinks.
+
+        :param generation: the generation just completed
+        :param births: cells born since the previous record
+        :param deaths: cells which died since the previous record
+        :param taken: take() results of other threads which belong to this
+          generation, added to the calling thread's counters
+        :param extrapolated: True if the generation was not simulated but
+          copied from a detected cycle
+        :return: the record
+        """
+        self.population += births - deaths
+        record = dict(generation=generation, births=births, deaths=deaths,
+                      population=self.population, extrapolated=extrapolated)
+        names = self.COUNTERS if self.allocations else self.COUNTERS[:3]
+        gathered = [self.take()]
+        gathered.extend(taken)
+        with self.__lock:
+            for phase, totals in self.totals.items():
+                counters = [0.0, 0.0, 0, 0]
+                for phases in gathered:
+                    if phase in phases:
+                        counters = [a + b for a, b in
+                                    zip(counters, phases[phase])]
+                for i, name in enumerate(names):
+                    record["%s_%s" % (phase, name)] = counters[i]
+                    totals[i] += counters[i]
+        if self.allocations:
+            record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        for sink in self.sinks:
+            sink.write(record)
+        return record
+
+    def summary(self):
+        """:return: {phase: {counter: total}} over every record so far"""
+        return dict((phase, dict(zip(self.COUNTERS, totals)))
+                    for phase, totals in self.totals.items())
+
+    def close(self):
+        """Closes the sinks and stops tracing allocations.
+
+        :return: the summary()
+        """
+        for sink in self.sinks:
+            sink.close()
+        if self.__tracing:
+            tracemalloc.stop()
+            self.__tracing = False
+        return self.summary()
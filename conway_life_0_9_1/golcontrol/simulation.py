@@ -15,16 +15,38 @@
 #  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 #
 # ##### END GPL LICENSE BLOCK #####
+from golcontrol.pipeline import Frame
+from golmodel.lifeform import LifeForm
+from golmodel.rule import LIFE
 
 
 class Simulation(object):
     """Computes the lives and deaths of lifeforms at each generation."""
 
-    def __init__(self, universe):
+    def __init__(self, universe, rule=None):
+        """:param rule: the golmodel.rule.Rule to apply (Conway's B3/S23 if
+          not given)
+        """
         self.universe = universe
+        self.rule = rule if rule is not None else LIFE
+        if not self.supports(self.rule):
+            raise Exception("%s cannot run the rule %s" %
+                            (self.__class__.__name__, self.rule))
         self.generation = 0
         self.births = 0
         self.deaths = 0
+        # the rule's table followed by a row for cells which have never been
+        # set (STATE_NONE), which stay unset unless they are born; indexing
+        # with STATE_NONE * stride + nbs counts back from the end into that row
+        self.stride = self.rule.stride
+        unset = tuple(LifeForm.STATE_ALIVE if n in self.rule.birth
+                      else LifeForm.STATE_NONE for n in range(self.stride))
+        self.table = tuple(self.rule.table) + unset
+        self.neighbours = None
+
+    def supports(self, rule):
+        """:return: True if this simulation can apply the given rule"""
+        return True
 
     def advance(self):
         """Walks the universe in a O(2n) traversal and advances to the next
@@ -33,27 +55,87 @@ class Simulation(object):
         self.generation += 1
         self.births = 0
         self.deaths = 0
+        self.tabulate_neighbours()
         for lf in self.universe:
-            nbs = self.universe.get_neighbour_count(lf)
-            if lf.is_alive():
-                if nbs < 2:
-                    lf.kill(self.generation)
-                    self.deaths += 1
-                elif nbs > 3:
-                    lf.kill(self.generation)
-                    self.deaths += 1
-            else:
-                if nbs == 3:
-                    lf.birth(self.generation)
-                    self.births += 1
+            self.evolve(lf)
         self.__commit()
 
+    def tabulate_neighbours(self):
+        """Builds the summed-area table that evolve() reads neighbour counts
+        from, when the rule counts a larger neighbourhood than the universe's
+        own get_neighbour_count() does. Called once per generation, before
+        any LifeForm is evolved.
+        """
+        neighbourhood = self.rule.neighbourhood
+        if not neighbourhood.is_standard():
+            universe = self.universe
+            self.neighbours = neighbourhood.tabulate(
+                universe.get_alive_flags(), universe.rows, universe.cols)
+
+    def evolve(self, lf):
+        """Applies the rule to a single LifeForm by looking its next state up
+        in the rule's table, marking it to change on the next commit.
+
+        :param lf: the LifeForm to evolve
+        :return: True if the LifeForm will change state
+        """
+        universe = self.universe
+        if self.neighbours is None:
+            nbs = universe.get_neighbour_count(lf)
+        else:
+            nbs = self.neighbours.count(lf.row, lf.col)
+        state = universe.states[lf.lfid]
+        next_state = self.table[(state * self.stride) + nbs]
+        if next_state == state:
+            return False
+        lf.transition(self.generation, next_state)
+        if next_state == LifeForm.STATE_ALIVE:
+            self.births += 1
+        elif state == LifeForm.STATE_ALIVE:
+            self.deaths += 1
+        return True
+
+    def advance_to(self, generation):
+        """Advances one generation at a time until the given generation is
+        reached. births and deaths are totalled over every generation stepped.
+
+        :param generation: the generation to advance to
+        """
+        births = 0
+        deaths = 0
+        while self.generation < generation:
+            self.advance()
+            births += self.births
+            deaths += self.deaths
+        self.births = births
+        self.deaths = deaths
+
+    def frames(self, count, step=1):
+        """Runs the simulation as a generator: advances it count times, step
+        generations at a time, and yields a golcontrol.pipeline.Frame of each
+        generation reached. Nothing is computed until the next frame is
+        asked for, and a frame stays the same however far the simulation has
+        run on since.
+
+        :param count: number of frames
+        :param step: generations advanced per frame
+        """
+        for _ in range(count):
+            if step == 1:
+                self.advance()
+            else:
+                self.advance_to(self.generation + step)
+            yield Frame.capture(self)
+
+    def close(self):
+        """Releases any resources held by the simulation. Called by the driver
+        once the simulation has finished.
+        """
+        pass
+
     def __commit(self):
-        """Performs a O(n) traversal which updates all LifeForms to the new
+        """Performs a O(n) bulk copy which updates all LifeForms to the new
           state which was previously computed during a simulation advancement
           pass.
         """
-        for x in range(0, self.universe.rows):
-            for y in range(0, self.universe.cols):
-                lf = self.universe.get_life_form(x, y)
-                lf.commit()
+        self.universe.commit()
@@ -0,0 +1,49 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+from golcontrol.simulation import Simulation
+
+
+class SparseSimulation(Simulation):
+    """Computes each generation of a SparseUniverse by visiting only living
+    cells and their neighbours.
+    """
+
+    def supports(self, rule):
+        """Only two-state rules without birth on zero neighbours can be run,
+        as the universe holds nothing but the set of living cells, and the
+        universe only counts the eight adjacent cells.
+        """
+        return rule.states == 2 and 0 not in rule.birth and \
+            rule.neighbourhood.is_standard()
+
+    def advance(self):
+        """Applies the rules to every cell which has at least one living
+        neighbour, plus every living cell (which may die of loneliness).
+        """
+        self.generation += 1
+        live = self.universe.live
+        nbs = self.universe.get_neighbour_counts()
+        in_bounds = self.universe.in_bounds
+        birth = self.rule.birth
+        survival = self.rule.survival
+        born = [pos for pos, cnt in nbs.items()
+                if cnt in birth and pos not in live and in_bounds(*pos)]
+        died = [pos for pos in live if nbs.get(pos, 0) not in survival]
+        self.births = len(born)
+        self.deaths = len(died)
+        self.universe.commit(self.generation, born, died)
@@ -0,0 +1,102 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+from golcontrol.simulation import Simulation
+
+
+class TiledSimulation(Simulation):
+    """A Simulation which divides the universe into square tiles and only
+    evaluates the tiles which contain, or border, a LifeForm that changed in
+    the previous generation. Still lifes cost nothing once they settle, so
+    the work per generation follows the activity on the board.
+    """
+
+    def __init__(self, universe, tile_size=16, rule=None):
+        """:param tile_size: length of a side of a tile, in LifeForms
+        :param rule: the golmodel.rule.Rule to apply
+        """
+        Simulation.__init__(self, universe, rule)
+        self.tile_size = tile_size
+        self.tile_rows = -(-universe.rows // tile_size)
+        self.tile_cols = -(-universe.cols // tile_size)
+        self.tile_count = self.tile_rows * self.tile_cols
+        self.active_tiles = self.tile_count
+        self.__dirty = None
+
+    def supports(self, rule):
+        """Tiles are woken by changes in the cells bordering them, which only
+        covers rules counting the eight adjacent cells.
+        """
+        return rule.neighbourhood.is_standard()
+
+    def mark_all_active(self):
+        """Forces every tile to be evaluated on the next advance (needed after
+        the universe has been changed from outside the simulation).
+        """
+        self.__dirty = None
+
+    def advance(self):
+        """Evaluates every LifeForm in the active tiles, commits them, and
+        works out which tiles will be active in the next generation.
+        """
+        self.generation += 1
+        self.births = 0
+        self.deaths = 0
+        if self.__dirty is None:
+            tiles = [(tr, tc) for tr in range(self.tile_rows)
+                     for tc in range(self.tile_cols)]
+        else:
+            tiles = self.__dirty
+        self.active_tiles = len(tiles)
+
+        changed = []
+        evaluated = []
+        for tr, tc in tiles:
+            for lf in self.__tile_life_forms(tr, tc):
+                evaluated.append(lf)
+                if self.evolve(lf):
+                    changed.append(lf)
+        for lf in evaluated:
+            lf.commit()
+        self.__dirty = self.__find_dirty_tiles(changed)
+
+    def __tile_life_forms(self, tr, tc):
+        """Yields the LifeForms in the given tile."""
+        universe = self.universe
+        ts = self.tile_size
+        cols = range(tc * ts, min((tc + 1) * ts, universe.cols))
+        for row in range(tr * ts, min((tr + 1) * ts, universe.rows)):
+            for col in cols:
+                yield universe.get_life_form(row, col)
+
+    def __find_dirty_tiles(self, changed):
+        """:return: the tiles which contain or border any of the given
+          LifeForms
+        """
+        ts = self.tile_size
+        dirty = set()
+        for lf in changed:
+            trs = {tr for tr in ((lf.row - 1) // ts, lf.row // ts,
+                                 (lf.row + 1) // ts)
+                   if 0 <= tr < self.tile_rows}
+            tcs = {tc for tc in ((lf.col - 1) // ts, lf.col // ts,
+                                 (lf.col + 1) // ts)
+                   if 0 <= tc < self.tile_cols}
+            for tr in trs:
+                for tc in tcs:
+                    dirty.add((tr, tc))
+        return sorted(dirty)
@@ -25,8 +25,34 @@ try:
 except ImportError:
     print("cannot import BlenderRenderer in this context")
 
+try:
+    from golcontrol.numpysimulation import NumpySimulation
+    from golcontrol.parallelsimulation import ParallelSimulation
+    from golmodel.numpyuniverse import NumpyUniverse
+except ImportError:
+    print("cannot import the numpy engine in this context")
+
+from golview.bakerenderer import BakeRenderer
 from golview.consolerenderer import ConsoleRenderer
+from golview.imagerenderer import ImageRenderer
+from golview.streamrenderer import StreamRenderer
+from golcontrol.bitsimulation import BitSimulation
+from golcontrol.checkpoint import Checkpoint, CheckpointWriter
+from golcontrol.cycledetector import CycleDetector
+from golcontrol.hashlifesimulation import HashLifeSimulation
+from golcontrol.pipeline import Pipeline
+from golcontrol.profiler import CsvSink, JsonLinesSink, Profiler
 from golcontrol.simulation import Simulation
+from golcontrol.sparsesimulation import SparseSimulation
+from golcontrol.tiledsimulation import TiledSimulation
+from golmodel.bituniverse import BitUniverse
+from golmodel.hashlifeuniverse import HashLifeUniverse
+from golmodel.pattern import open_pattern
+from golmodel.randomfield import RandomField
+from golmodel.rule import Rule
+from golmodel.sparseuniverse import SparseUniverse
+from golmodel.transitionfile import StreamingTransitionLog
+from golmodel.transitionlog import TransitionLog
 from golmodel.universe import Universe
 
 
@@ -36,17 +62,67 @@ class GOLDriver(object):
     DEFAULT_CFG_PATH = "%s%sgolconfig.cfg" % (os.path.dirname(__file__), os.sep)
     FRAME_DELAY = 0.0417    # for 24fps
 
-    def __init__(self, cfg_path=DEFAULT_CFG_PATH):
+    def __init__(self, cfg_path=DEFAULT_CFG_PATH, checkpoint_path=None,
+                 profiler=None):
         """:param cfg_path: the path to a config file that specifies all the
-          simulation settings
+          simulation settings, or a config loaded with load_config()
+        :param checkpoint_path: optional checkpoint to resume from instead of
+          starting from a random layout or pattern
+        :param profiler: optional golcontrol.profiler.Profiler to instrument
+          the run with; by default one is created if the config file enables
+          profiling
         """
         self._cfg = GOLDriver.load_config(cfg_path)
         self.__preinit()
+        self._checkpoint = None
+        if checkpoint_path is not None:
+            self._checkpoint = Checkpoint.read(checkpoint_path)
         self._generation_count = self._cfg.getint('Universe', 'GenerationCount')
-        val = self._cfg.getint('Universe', 'Size')
-        self._universe = Universe(val, val)
-        self._sim = Simulation(self._universe)
+        self._generation_step = self._cfg.getint('Universe', 'GenerationStep',
+                                                 fallback=1)
+        self._engine = self._cfg.get('Universe', 'Engine', fallback='object')
+        self._tile_size = self._cfg.getint('Universe', 'TileSize', fallback=0)
+        self._rule = Rule.parse(self._cfg.get('Universe', 'Rule',
+                                              fallback='B3/S23'))
+        self._pattern = self.create_pattern_reader()
+        self._pattern_origin = (0, 0)
+        self._universe = self.create_universe()
+        self._universe.random_field = self.create_random_field()
+        self._sim = self.create_simulation()
         self._renderer = self.create_renderer()
+        self._cycle_action = self._cfg.get('Universe', 'CycleDetection',
+                                           fallback='off')
+        self._pipeline_depth = self._cfg.getint('Rendering', 'PipelineDepth',
+                                                fallback=0)
+        self._checkpoint_interval = self._cfg.getint('Checkpoint', 'Interval',
+                                                     fallback=0)
+        self._checkpoints = None
+        if self._checkpoint_interval > 0:
+            if self._rule.states > 2:
+                raise Exception("checkpoints only hold two-state rules, not "
+                                "%s" % self._rule)
+            self._checkpoints = CheckpointWriter(
+                self._cfg.get('Checkpoint', 'Path'))
+        self._profiler = profiler
+        if self._profiler is None:
+            self._profiler = self.create_profiler()
+        if self._profiler is not None:
+            self.instrument(self._profiler)
+
+    @property
+    def universe(self):
+        """The universe created by create_universe()."""
+        return self._universe
+
+    @property
+    def simulation(self):
+        """The simulation created by create_simulation()."""
+        return self._sim
+
+    @property
+    def renderer(self):
+        """The renderer created by create_renderer()."""
+        return self._renderer
 
     def __preinit(self):
         """Initialization tasks which *must* be performed before anything else.
@@ -59,43 +135,499 @@ class GOLDriver(object):
         """Loads the config file at the specified path.
 
         :param cfg_path: complete path to a config file containing all the
-          settings for the simulation
+          settings for the simulation, or a config which is already loaded
         """
+        if isinstance(cfg_path, configparser.RawConfigParser):
+            return cfg_path
         cfg = configparser.RawConfigParser()
         cfg.read_file(open(cfg_path))  # confirm file exists
         cfg.read(cfg_path)
         return cfg
 
+    def create_universe(self):
+        """Factory method which instantiates the Universe backend for the
+        engine specified by the config file.
+        """
+        val = self._cfg.getint('Universe', 'Size')
+        if self._pattern is not None:
+            val = self.place_pattern(val)
+        log = self.create_transition_log()
+        if self._engine == "object":
+            return Universe(val, val, log)
+        elif self._engine in ("numpy", "parallel"):
+            return NumpyUniverse(val, val, log)
+        elif self._engine == "sparse":
+            bounded = self._cfg.getboolean('Universe', 'Bounded', fallback=True)
+            return SparseUniverse(val, val, bounded, log)
+        elif self._engine == "hashlife":
+            max_nodes = self._cfg.getint('Universe', 'HashLifeCacheSize',
+                                         fallback=1000000)
+            return HashLifeUniverse(val, val, max_nodes, log, self._rule)
+        elif self._engine == "bitpacked":
+            return BitUniverse(val, val, log)
+        else:
+            raise Exception("unsupported engine '%r'" % self._engine)
+
+    def create_random_field(self):
+        """Factory method which instantiates the RandomField the universe is
+        randomized from when the config file selects the "counter"
+        randomizer. The "sequential" randomizer (the default) draws from the
+        random module cell by cell, as it always has, and needs none.
+        """
+        randomizer = self._cfg.get('Universe', 'Randomizer',
+                                   fallback='sequential')
+        if randomizer == "sequential":
+            return None
+        elif randomizer == "counter":
+            return RandomField(self._cfg.get('Universe', 'RandomSeed',
+                                             fallback=None))
+        else:
+            raise Exception("unsupported randomizer '%r'" % randomizer)
+
+    def create_pattern_reader(self):
+        """Factory method which instantiates the PatternReader for the pattern
+        file the config file seeds the universe from, if it names one. The
+        pattern's size is read (and reported) here, before the universe is
+        allocated.
+        """
+        path = self._cfg.get('Pattern', 'Path', fallback='')
+        if not path:
+            return None
+        reader = open_pattern(path, self._cfg.get('Pattern', 'Format',
+                                                  fallback='auto'))
+        rows, cols = reader.bounds()
+        print("pattern %s is %dx%d cells" % (path, rows, cols))
+        if reader.rule:
+            try:
+                rule = Rule.parse(reader.rule.split(':')[0])
+            except Exception:
+                rule = None
+            if rule != self._rule:
+                print("pattern %s is for the rule %s, running %s" %
+                      (path, reader.rule, self._rule))
+        return reader
+
+    def place_pattern(self, size):
+        """Works out where the pattern goes from its Position setting and
+        checks that it fits in a bounded universe.
+
+        :param size: the configured universe size; 0 sizes the universe to
+          fit the pattern
+        :return: the size to create the universe with
+        """
+        rows, cols = self._pattern.bounds()
+        if size == 0:
+            size = max(rows, cols, 1)
+        position = self._cfg.get('Pattern', 'Position', fallback='centre')
+        if position == "centre":
+            self._pattern_origin = ((size - rows) // 2, (size - cols) // 2)
+        else:
+            self._pattern_origin = tuple(int(v) for v in position.split(','))
+        top, left = self._pattern_origin
+        bounded = self._engine != "hashlife" and (
+            self._engine != "sparse" or
+            self._cfg.getboolean('Universe', 'Bounded', fallback=True))
+        if bounded and (top < 0 or left < 0 or top + rows > size or
+                        left + cols > size):
+            raise Exception("a %dx%d pattern at %d, %d does not fit in a "
+                            "%dx%d universe" % (rows, cols, top, left, size,
+                                                size))
+        return size
+
+    def create_transition_log(self):
+        """Factory method which instantiates the transition log: in memory, or
+        streamed to TransitionLogPath if the config file specifies one.
+        """
+        path = self._cfg.get('Universe', 'TransitionLogPath', fallback='')
+        if path:
+            if self._checkpoint is not None and \
+                    self._checkpoint.log_offset >= 0:
+                return StreamingTransitionLog(path,
+                                              self._checkpoint.log_offset,
+                                              self._checkpoint.log_count)
+            return StreamingTransitionLog(path)
+        return TransitionLog()
+
+    def create_simulation(self):
+        """Factory method which instantiates the Simulation that knows how to
+        advance the universe created by create_universe().
+        """
+        rule = self._rule
+        if self._engine == "object":
+            if self._tile_size > 0:
+                return TiledSimulation(self._universe, self._tile_size, rule)
+            return Simulation(self._universe, rule)
+        elif self._engine == "numpy":
+            return NumpySimulation(self._universe, rule)
+        elif self._engine == "parallel":
+            workers = self._cfg.getint('Universe', 'Workers', fallback=0)
+            return ParallelSimulation(self._universe, workers, rule)
+        elif self._engine == "sparse":
+            return SparseSimulation(self._universe, rule)
+        elif self._engine == "hashlife":
+            return HashLifeSimulation(self._universe, rule)
+        elif self._engine == "bitpacked":
+            return BitSimulation(self._universe, rule)
+        else:
+            raise Exception("unsupported engine '%r'" % self._engine)
+
     def create_renderer(self):
         """Factory method which instantiates the correct renderer specified
         by the config file.
         """
         rtype = self._cfg.get('Rendering', 'Renderer')
         if rtype == "console":
-            return ConsoleRenderer()
+            return ConsoleRenderer(self._cfg.get('Rendering', 'ConsoleMode',
+                                                 fallback='plain'))
         elif rtype == "blender":
             return BlenderRenderer(self._universe)
+        elif rtype == "bake":
+            return BakeRenderer(
+                self._cfg.get('Bake', 'Path', fallback='golbake.bin'),
+                self._engine, self._generation_count * self._generation_step,
+                self._cfg.get('Universe', 'RandomSeed', fallback=''))
+        elif rtype == "image":
+            cfg = self._cfg
+            return ImageRenderer(
+                cfg.get('Image', 'Path', fallback='golframe_%05d.png'),
+                cfg.get('Image', 'Format', fallback='png'),
+                cfg.getint('Image', 'Scale', fallback=1),
+                cfg.getint('Image', 'Stride', fallback=1),
+                cfg.get('Image', 'Animation', fallback=''),
+                cfg.getint('Image', 'FrameRate', fallback=24))
+        elif rtype == "stream":
+            cfg = self._cfg
+            return StreamRenderer(
+                cfg.get('Stream', 'Address', fallback='unix:golstream.sock'),
+                cfg.getint('Stream', 'KeyframeInterval', fallback=30),
+                cfg.getint('Stream', 'Backlog', fallback=8))
         else:
             raise Exception("unsupported renderer '%r'" % rtype)
 
-    def sim_loop(self):
-        """Runs the simulation."""
-        frame_delay = self._renderer.get_frame_delay()
+    def create_profiler(self):
+        """Factory method which instantiates a Profiler if the config file
+        enables profiling. Records go to a CSV file if Output ends in .csv,
+        to a JSON-lines file if any other Output is given.
+        """
+        if not self._cfg.getboolean('Profiling', 'Enabled', fallback=False):
+            return None
+        sinks = []
+        path = self._cfg.get('Profiling', 'Output', fallback='')
+        if path.endswith(".csv"):
+            sinks.append(CsvSink(path))
+        elif path:
+            sinks.append(JsonLinesSink(path))
+        allocations = self._cfg.getboolean('Profiling', 'Allocations',
+                                           fallback=False)
+        return Profiler(sinks, allocations)
 
-        for i in range(0, self._generation_count):
+    def instrument(self, profiler):
+        """Times the phases of the run with the given profiler: randomize (or
+        load, when seeded from a pattern), advance (which includes commit),
+        advance_to, commit, render, checkpoint and sleep.
+
+        :param profiler: a golcontrol.profiler.Profiler
+        """
+        profiler.instrument(self._universe, 'randomize')
+        if self._pattern is not None:
+            profiler.instrument(self, 'load_pattern', 'load')
+        profiler.instrument(self._sim, 'advance')
+        profiler.instrument(self._sim, 'advance_to')
+        if hasattr(self._universe, 'commit'):
+            profiler.instrument(self._universe, 'commit')
+        profiler.instrument(self._renderer, 'render')
+        profiler.instrument(self, 'write_checkpoint', 'checkpoint')
+        profiler.instrument(self, 'pause', 'sleep')
+
+    def pause(self, seconds):
+        """Sleeps between frames so that the simulation can be watched.
+
+        :param seconds: time to sleep
+        """
+        time.sleep(seconds)
+
+    def state_at(self, generation):
+        """Advances the simulation straight to the given generation. Engines
+        which can skip generations (hashlife) do so without computing the
+        ones in between.
+
+        :param generation: the generation whose state is desired
+        :return: the universe, holding the state at that generation
+        """
+        self._sim.advance_to(generation)
+        return self._universe
+
+    def create_cycle_detector(self):
+        """Factory method which instantiates a CycleDetector if the config
+        file asks for one, the universe is bounded and the rule has only two
+        states.
+        """
+        if self._cycle_action == "off":
+            return None
+        if self._cycle_action not in ("stop", "extrapolate"):
+            raise Exception("unsupported cycle detection '%r'" %
+                            self._cycle_action)
+        if not getattr(self._universe, 'bounded', True):
+            print("cycle detection needs a bounded universe, disabled")
+            return None
+        if self._rule.states > 2:
+            print("cycle detection needs a two-state rule, disabled")
+            return None
+        history = self._cfg.getint('Universe', 'CycleHistory', fallback=256)
+        return CycleDetector(self._universe, self._sim.generation, history)
+
+    def extrapolate_cycle(self, detector):
+        """Finishes the run without simulating it, by repeating the cycle the
+        detector found. The universe is advanced for real by less than one
+        period, so that it ends in the state of the final generation, and the
+        transitions of the remaining generations are copied from the cycle.
+        With profiling on, every generation gets its record, the copied ones
+        marked as extrapolated.
+
+        :param detector: a CycleDetector which has found a cycle
+        """
+        last = self._generation_count * self._generation_step
+        profiler = self._profiler
+        records = []    # (generation, births, deaths, extrapolated, counters)
+        for _ in range((last - self._sim.generation) % detector.period):
             self._sim.advance()
-            print("\ngeneration %d  -  births: %d  -  deaths: %d" %
-                  (i, self._sim.births, self._sim.deaths))
+            if profiler is not None:
+                records.append((self._sim.generation, self._sim.births,
+                                self._sim.deaths, False, profiler.take()))
+        listener = None
+        if profiler is not None:
+            def listener(generation, states):
+                records.append((generation, states.count(1), states.count(0),
+                                True, {}))
+        filled = detector.extrapolate(self._sim.generation + 1, last,
+                                      listener)
+        self._sim.generation = last
+        print("extrapolated %d generations" % filled)
+        self._renderer.render(self._universe)
+        if profiler is not None and records:
+            # the final render belongs to the final generation
+            final = profiler.take()
+            for i, (generation, births, deaths, extrapolated,
+                    taken) in enumerate(records):
+                if i == len(records) - 1:
+                    taken = (taken, final)
+                else:
+                    taken = (taken,)
+                profiler.record(generation, births, deaths, taken,
+                                extrapolated)
+
+    def sim_loop(self, start=0):
+        """Runs the simulation. Each iteration advances GenerationStep
+        generations.
+
+        :param start: the iteration to start from (non-zero when resuming)
+        """
+        if self._pipeline_depth > 0:
+            self.pipelined_loop(start)
+            return
+        frame_delay = self._renderer.get_frame_delay()
+        detector = self.create_cycle_detector()
+        if self._profiler is not None:
+            flags = self._universe.get_alive_flags()
+            self._profiler.population = flags.count(1)
+            self._profiler.record(self._sim.generation)
+
+        for i in range(start, self._generation_count):
+            started = time.perf_counter()
+            if self._generation_step == 1:
+                self._sim.advance()
+            else:
+                self.state_at((i + 1) * self._generation_step)
+            self._renderer.status(
+                "\ngeneration %d  -  births: %d  -  deaths: %d" %
+                (i, self._sim.births, self._sim.deaths))
+            if isinstance(self._sim, TiledSimulation):
+                self._renderer.status("active tiles: %d / %d" %
+                                      (self._sim.active_tiles,
+                                       self._sim.tile_count))
             self._renderer.render(self._universe)
-            if frame_delay > 0.0:
-                time.sleep(frame_delay)
+            if self._checkpoints is not None and \
+                    self._sim.generation % self._checkpoint_interval == 0:
+                self.write_checkpoint()
+            cycle = detector is not None and \
+                detector.update(self._sim.generation) is not None
+            if cycle:
+                print("cycle of period %d detected at generation %d" %
+                      (detector.period, self._sim.generation))
+                detector.close()
+            elif frame_delay > 0.0:
+                # the frame delay is a frame period, so time already spent
+                # on this frame comes off it
+                elapsed = time.perf_counter() - started
+                self.pause(max(frame_delay - elapsed, 0.0))
+            if self._profiler is not None:
+                self._profiler.record(self._sim.generation, self._sim.births,
+                                      self._sim.deaths)
+            if cycle:
+                if self._cycle_action == "extrapolate":
+                    self.extrapolate_cycle(detector)
+                break
+        self.finish(detector)
+
+    def pipelined_loop(self, start=0):
+        """Runs the simulation as sim_loop() does, but on a worker thread
+        which runs up to PipelineDepth frames ahead of the renderer, so that
+        simulating and rendering overlap. The renderer draws immutable
+        golcontrol.pipeline.Frames instead of the universe, and memory is
+        bounded by the depth. How often the renderer had to wait for a frame
+        is reported at the end.
+
+        :param start: the iteration to start from (non-zero when resuming)
+        """
+        frame_delay = self._renderer.get_frame_delay()
+        detector = self.create_cycle_detector()
+        generation = self._sim.generation
+        if self._profiler is not None:
+            flags = self._universe.get_alive_flags()
+            self._profiler.population = flags.count(1)
+
+        pipeline = Pipeline(self.__simulate_ahead(start, detector),
+                            self._pipeline_depth)
+        if self._profiler is not None:
+            # the producer's timings are its own thread's, so its head start
+            # does not leak into the initial record
+            self._profiler.instrument(pipeline, 'wait', 'stall')
+            self._profiler.record(generation)
+        try:
+            for frame, status, cycle, taken in pipeline:
+                started = time.perf_counter()
+                for text in status:
+                    self._renderer.status(text)
+                self._renderer.render(frame)
+                if cycle:
+                    # this was the producer's last frame, so the universe
+                    # is no longer changing under us
+                    print("cycle of period %d detected at generation %d" %
+                          (detector.period, frame.generation))
+                    detector.close()
+                elif frame_delay > 0.0:
+                    elapsed = time.perf_counter() - started
+                    self.pause(max(frame_delay - elapsed, 0.0))
+                if self._profiler is not None:
+                    self._profiler.record(frame.generation, frame.births,
+                                          frame.deaths, taken)
+                if cycle and self._cycle_action == "extrapolate":
+                    self.extrapolate_cycle(detector)
+        finally:
+            pipeline.close()
+        self.finish(detector)
+        print("renderer stalled on %d of %d frames, waiting %.3fs" %
+              (pipeline.stalls, pipeline.received, pipeline.stall_s))
+
+    def __simulate_ahead(self, start, detector):
+        """The producer of pipelined_loop(), run on the pipeline's thread:
+        advances the simulation, writes checkpoints and looks for cycles,
+        yielding (frame, status lines, cycle found, profiler counters) for
+        every iteration. The counters are the take() of the phases timed on
+        this thread for the frame, so the consumer can record them with it.
+        It stops at the frame where a cycle is found, which the consumer deals
+        with.
+        """
+        frames = self._sim.frames(self._generation_count - start,
+                                  self._generation_step)
+        for i, frame in enumerate(frames, start):
+            status = ["\ngeneration %d  -  births: %d  -  deaths: %d" %
+                      (i, frame.births, frame.deaths)]
+            if isinstance(self._sim, TiledSimulation):
+                status.append("active tiles: %d / %d" %
+                              (self._sim.active_tiles, self._sim.tile_count))
+            if self._checkpoints is not None and \
+                    frame.generation % self._checkpoint_interval == 0:
+                self.write_checkpoint()
+            cycle = detector is not None and \
+                detector.update(frame.generation) is not None
+            taken = ()
+            if self._profiler is not None:
+                taken = (self._profiler.take(),)
+            yield frame, status, cycle, taken
+            if cycle:
+                return
+
+    def finish(self, detector=None):
+        """Cleans up once the simulation has finished: closes the cycle
+        detector, the simulation and the renderer, and reports the totals.
 
+        :param detector: the CycleDetector of the run, if any
+        """
+        if detector is not None:
+            detector.close()
+        if self._checkpoints is not None:
+            self._checkpoints.wait()
+        self._sim.close()
+        self._renderer.close()
+        self._universe.log.close()
         cnt = self._universe.get_transition_count()
         print("total transitions: ", cnt)
+        if self._profiler is not None:
+            self.print_profile(self._profiler.close())
+
+    @staticmethod
+    def print_profile(summary):
+        """Prints the time spent in each phase of the run.
+
+        :param summary: a golcontrol.profiler.Profiler summary()
+        """
+        print("\n%-12s %10s %10s %8s" % ("phase", "wall (s)", "cpu (s)",
+                                          "calls"))
+        for phase, totals in sorted(summary.items()):
+            print("%-12s %10.4f %10.4f %8d" % (phase, totals['wall_s'],
+                                               totals['cpu_s'],
+                                               totals['calls']))
+
+    def write_checkpoint(self):
+        """Captures the simulation state and writes it in the background.
+
+        :return: the path of the checkpoint being written
+        """
+        checkpoint = Checkpoint.capture(self._engine, self._universe,
+                                        self._sim)
+        return self._checkpoints.write(checkpoint)
+
+    def resume(self):
+        """Restores the checkpoint given to the constructor and continues the
+        simulation from it. A log streamed to disk carries on from where the
+        checkpoint left it; an in-memory log starts with the state of every
+        cell at the checkpoint's generation.
+        """
+        checkpoint = self._checkpoint
+        if checkpoint.engine != self._engine:
+            raise Exception("checkpoint was written by the '%s' engine" %
+                            checkpoint.engine)
+        checkpoint.restore(self._universe, self._sim)
+        if checkpoint.log_offset < 0:
+            self._universe.log.extend(checkpoint.generation,
+                                      range(self._universe.lifeform_count),
+                                      self._universe.get_alive_flags())
+        self._renderer.render(self._universe)
+        self.sim_loop(self._sim.generation // self._generation_step)
+
+    def load_pattern(self):
+        """Seeds the universe from the pattern file, streaming its runs of
+        cells straight into the universe.
+        """
+        top, left = self._pattern_origin
+        self._universe.load_runs(self._pattern.runs(top, left))
 
     def go(self):
         """Performs all setup and then runs the simulation"""
-        self._universe.randomize()
-        self._renderer.render(self._universe)
-        time.sleep(self._cfg.getint('Rendering', 'PauseAfterRandomize'))
-        self.sim_loop()
+        try:
+            if self._checkpoint is not None:
+                self.resume()
+                return
+            if self._pattern is not None:
+                self.load_pattern()
+            else:
+                self._universe.randomize()
+            self._renderer.render(self._universe)
+            self.pause(self._cfg.getint('Rendering', 'PauseAfterRandomize'))
+            self.sim_loop()
+        finally:
+            # finish() has closed it already unless the run failed or was
+            # interrupted; closing stops worker processes and frees shared
+            # memory
+            self._sim.close()
@@ -0,0 +1,89 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import os
+import sys
+
+from golcontrol.ensemble import Ensemble, parse_seeds
+from golcontrol.profiler import CsvSink, JsonLinesSink
+from goldriver import GOLDriver
+from golmodel.rule import Rule
+
+"""Used only to run ensembles from the command line: many independent
+universes, one per combination of the [Ensemble] Seeds, Sizes and Thresholds,
+with one line of statistics per universe written to the results file.
+"""
+
+
+def usage():
+    print("usage: python %s <config file> [results file]" % sys.argv[0])
+    print("where:")
+    print("\tconfig file - config file with the [Universe] and [Ensemble] "
+          "settings")
+    print("\tresults file - file to write the per-run statistics to: CSV if "
+          "it ends in .csv, otherwise JSON lines; defaults to the config "
+          "file's [Ensemble] Output")
+    sys.exit("invalid arguments")
+
+
+def create_ensemble(cfg):
+    """Builds the Ensemble described by a config.
+
+    :param cfg: a config loaded with GOLDriver.load_config()
+    :return: the Ensemble
+    """
+    rule = Rule.parse(cfg.get('Universe', 'Rule', fallback='B3/S23'))
+    seeds = parse_seeds(cfg.get('Ensemble', 'Seeds', fallback='0-99'))
+    sizes = [int(size) for size in
+             cfg.get('Ensemble', 'Sizes',
+                     fallback=cfg.get('Universe', 'Size')).split(",")]
+    thresholds = [float(threshold) for threshold in
+                  cfg.get('Ensemble', 'Thresholds',
+                          fallback='0.4').split(",")]
+    return Ensemble(seeds, sizes, thresholds,
+                    cfg.getint('Universe', 'GenerationCount'), rule,
+                    cfg.getint('Ensemble', 'BatchSize', fallback=64),
+                    cfg.getint('Ensemble', 'CycleHistory', fallback=16),
+                    cfg.getint('Ensemble', 'Processes', fallback=1),
+                    cfg.get('Universe', 'Randomizer', fallback='sequential'))
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        usage()
+    cfg_path = sys.argv[1]
+    if not os.path.exists(cfg_path):
+        sys.exit("config file {} not found".format(cfg_path))
+    cfg = GOLDriver.load_config(cfg_path)
+    if len(sys.argv) == 3:
+        output = sys.argv[2]
+    else:
+        output = cfg.get('Ensemble', 'Output', fallback='golensemble.jsonl')
+    ensemble = create_ensemble(cfg)
+    if output.endswith(".csv"):
+        sink = CsvSink(output)
+    else:
+        sink = JsonLinesSink(output)
+    summary = ensemble.run([sink])
+    print("%d universes in %.2fs (%.1f universes/s), %d settled" %
+          (summary['universes'], summary['elapsed_s'],
+           summary['universes_per_s'], summary['settled']))
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
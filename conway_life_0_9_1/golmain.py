@@ -24,20 +24,26 @@ from goldriver import GOLDriver
 
 
 def usage():
-    print("usage: python %s <config file>")
+    print("usage: python %s <config file> <checkpoint>")
     print("where:")
     print("\tconfig file - optional config file (defaults to golconfig.cfg)")
+    print("\tcheckpoint - optional checkpoint file to resume from")
     sys.exit("invalid arguments")
 
 driver = None
 
 if len(sys.argv) <= 1:
     driver = GOLDriver()
-elif len(sys.argv) == 2:
+elif len(sys.argv) <= 3:
     cfg_path = sys.argv[1]
     if not os.path.exists(cfg_path):
         sys.exit("config file {} not found".format(cfg_path))
-    driver = GOLDriver(cfg_path)
+    checkpoint_path = None
+    if len(sys.argv) == 3:
+        checkpoint_path = sys.argv[2]
+        if not os.path.exists(checkpoint_path):
+            sys.exit("checkpoint file {} not found".format(checkpoint_path))
+    driver = GOLDriver(cfg_path, checkpoint_path)
 else:
     usage()
 
@@ -0,0 +1,155 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate, chain
+
+
+class Bake(object):
+    """A finished simulation reduced to what a renderer needs: the grid size,
+    the seed it was run from and every cell's transitions, so that it can be
+    keyframed without running the simulation again.
+
+    The transitions are held grouped by cell: offsets[cell] to
+    offsets[cell + 1] index the cell's generations and states. On disk a bake
+    is a fixed header and the seed, followed by the zlib-compressed offsets,
+    generations and states arrays (little endian). Generations are stored as
+    signed differences from the previous transition's, which are small within
+    a cell and so compress well.
+
+      magic, version, engine, rows, cols, generations, transition count,
+      seed length, seed (utf-8), compressed arrays
+    """
+
+    MAGIC = b'GOLBAKE1'
+    VERSION = 1
+    HEADER = struct.Struct('<8sH16sIIIQH')
+
+    def __init__(self, engine, rows, cols, generations, seed, offsets,
+                 transition_generations, states):
+        """:param engine: name of the engine which ran the simulation
+        :param rows: rows in the universe
+        :param cols: columns in the universe
+        :param generations: number of generations simulated
+        :param seed: the RandomSeed setting, as a string
+        :param offsets: array('I') of rows * cols + 1 offsets into
+          transition_generations and states
+        :param transition_generations: array('I') of transition generations,
+          grouped by cell and increasing within each cell
+        :param states: array('b') of the state each transition moved to
+        """
+        self.engine = engine
+        self.rows = rows
+        self.cols = cols
+        self.generations = generations
+        self.seed = seed
+        self.offsets = offsets
+        self.transition_generations = transition_generations
+        self.states = states
+
+    @classmethod
+    def from_log(cls, engine, universe, generations, seed):
+        """Groups a universe's transition log by cell with a counting sort.
+
+        :param engine: name of the engine in use
+        :param universe: the universe, once the simulation has finished
+        :param generations: number of generations simulated
+        :param seed: the RandomSeed setting, as a string
+        :return: the Bake
+        """
+        count = universe.lifeform_count
+        offsets = array('I', bytes(4 * (count + 1)))
+        for _, cell, _ in universe.log:
+            offsets[cell + 1] += 1
+        offsets = array('I', accumulate(offsets))
+        total = offsets[-1]
+        gens = array('I', bytes(4 * total))
+        states = array('b', bytes(total))
+        fill = offsets[:-1]
+        for generation, cell, state in universe.log:
+            pos = fill[cell]
+            gens[pos] = generation
+            states[pos] = state
+            fill[cell] = pos + 1
+        return cls(engine, universe.rows, universe.cols, generations, seed,
+                   offsets, gens, states)
+
+    def cell_history(self, cell):
+        """:return: (generations, states) of one cell's transitions"""
+        start = self.offsets[cell]
+        end = self.offsets[cell + 1]
+        return (self.transition_generations[start:end],
+                self.states[start:end])
+
+    def write(self, path):
+        """Writes the bake to a file.
+
+        :param path: the file to write
+        """
+        gens = self.transition_generations
+        deltas = array('i', [generation - previous for generation, previous
+                             in zip(gens, chain((0,), gens))])
+        offsets = array('I', self.offsets)
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+            deltas.byteswap()
+        data = zlib.compress(offsets.tobytes() + deltas.tobytes() +
+                             self.states.tobytes())
+        seed = self.seed.encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION,
+                                     self.engine.encode('ascii'), self.rows,
+                                     self.cols, self.generations,
+                                     len(self.states), len(seed)))
+            f.write(seed)
+            f.write(data)
+
+    @classmethod
+    def read(cls, path):
+        """Reads a bake written by write().
+
+        :param path: the file to read
+        :return: the Bake
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        (magic, version, engine, rows, cols, generations, total,
+         seed_size) = cls.HEADER.unpack_from(data, 0)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise Exception("%s is not a version %d bake" %
+                            (path, cls.VERSION))
+        offset = cls.HEADER.size
+        seed = data[offset:offset + seed_size].decode('utf-8')
+        arrays = zlib.decompress(data[offset + seed_size:])
+        count = rows * cols
+        offsets = array('I', arrays[:4 * (count + 1)])
+        deltas = array('i', arrays[4 * (count + 1):4 * (count + 1 + total)])
+        states = array('b', arrays[4 * (count + 1 + total):])
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+            deltas.byteswap()
+        gens = array('I', accumulate(deltas))
+        return cls(engine.rstrip(b'\0').decode('ascii'), rows, cols,
+                   generations, seed, offsets, gens, states)
+
+    def __repr__(self):
+        return "{}[engine={}, rows={}, cols={}, generations={}, seed={}]".format(
+            self.__class__.__name__, self.engine, self.rows, self.cols,
+            self.generations, self.seed)
@@ -0,0 +1,275 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import random
+
+from golmodel.cellview import CellView
+from golmodel.packing import DIGITS_TO_FLAGS, FLAGS_TO_DIGITS, pack_flags, \
+    unpack_flags
+from golmodel.transitionlog import TransitionLog
+
+
+# the set bit positions of every byte value, for unpacking rows to cell ids
+BYTE_BITS = tuple(tuple(b for b in range(8) if (v >> b) & 1)
+                  for v in range(256))
+
+
+def popcount(bits):
+    """:return: the number of set bits in a non-negative int"""
+    return bin(bits).count("1")
+
+
+class BitUniverse(object):
+    """A Universe which packs each row of cells into a single Python int, one
+    bit per cell (bit n is column n). A 10000x10000 board takes about 12MB.
+
+    Neighbour counts are produced a whole row at a time by a network of
+    bitwise full adders, so every Python-level operation works on all the
+    cells of a row at once.
+    """
+
+    def __init__(self, rows=10, cols=10, log=None):
+        """:param log: the TransitionLog to record transitions in (a new one
+          is created if not given)
+        """
+        self.rows = rows
+        self.cols = cols
+        self.lifeform_count = rows * cols
+        self.mask = (1 << cols) - 1
+        self.grid = [0] * rows
+        self.log = log if log is not None else TransitionLog()
+        self.random_field = None    # a RandomField to randomize from
+        self.__seeded = False
+
+    def __iter__(self):
+        for i in range(self.lifeform_count):
+            yield CellView(self, i, i // self.cols, i % self.cols)
+
+    def randomize(self, thresh=0.4, do_kills=True):
+        """Randomly kill or birth cells in the universe. Draws from the global
+        random module in the same order as Universe.randomize() so that a
+        given RandomSeed produces the same board with either engine.
+
+        :param thresh: normalized floating threshold that describes the
+          likelihood that each cell will be alive rather than dead
+        :param do_kills: if True, cells that were randomly selected for death
+          will be killed, otherwise they are left alone
+
+        When random_field is set, the whole layout is drawn from it at once
+        and each row is packed from its flags in one go, instead of drawing
+        from the random module cell by cell.
+        """
+        rnd = random.random
+        cols = self.cols
+        flags = None
+        if self.random_field is not None:
+            flags = self.random_field.next_flags(thresh, self.lifeform_count)
+        grid = []
+        for row in range(self.rows):
+            if flags is not None:
+                start = row * cols
+                born = int.from_bytes(pack_flags(flags[start:start + cols]),
+                                      'little')
+            else:
+                born = 0
+                for col in range(cols):
+                    if rnd() <= thresh:
+                        born |= 1 << col
+            cur = self.grid[row]
+            if do_kills:
+                new = born
+                died = self.mask & ~born
+            else:
+                new = cur | born
+                died = 0
+            if not self.__seeded:
+                self.__record(0, row, born, died)
+            elif new != cur:
+                self.__record(0, row, new & ~cur, cur & ~new)
+            grid.append(new)
+        self.grid = grid
+        self.__seeded = True
+
+    def load_runs(self, runs):
+        """Replaces the layout with the given runs of cells, every other cell
+        being dead, and records the cells which change as randomize() does.
+        Each run is or-ed into its row as one mask.
+
+        :param runs: (row, col, length, state) of every run of living cells,
+          such as golmodel.pattern.PatternReader.runs() yields
+        """
+        grid = [0] * self.rows
+        for row, col, length, state in runs:
+            if state != CellView.STATE_ALIVE:
+                raise Exception("the bitpacked engine only holds two states")
+            grid[row] |= ((1 << length) - 1) << col
+        for row, new in enumerate(grid):
+            cur = self.grid[row]
+            if not self.__seeded:
+                self.__record(0, row, new, self.mask & ~new)
+            elif new != cur:
+                self.__record(0, row, new & ~cur, cur & ~new)
+        self.grid = grid
+        self.__seeded = True
+
+    def get_life_form(self, row, col):
+        """Gets a view of the cell at the given position in the grid.
+
+        :param row: desired cell's row
+        :param col: desired cell's column
+        :return: a CellView for row x column
+        """
+        return CellView(self, (row * self.cols) + col, row, col)
+
+    def get_state(self, row, col):
+        """:return: the state of the cell at row x column"""
+        return (self.grid[row] >> col) & 1
+
+    def get_row_bits(self, row):
+        """:return: the packed cells of the given row"""
+        return self.grid[row]
+
+    def get_neighbour_count_bits(self, row):
+        """Adds up the eight neighbour bit-planes of a row with carry-save
+        full adders.
+
+        :param row: the desired row of analysis
+        :return: (ones, twos, fours) bit-planes of the neighbour count for
+          every cell in the row, where fours is set for any count of 4 or more
+        """
+        mask = self.mask
+        grid = self.grid
+        above = grid[row - 1] if row > 0 else 0
+        cur = grid[row]
+        below = grid[row + 1] if row < self.rows - 1 else 0
+
+        n0 = (above << 1) & mask
+        n1 = above
+        n2 = above >> 1
+        n3 = (cur << 1) & mask
+        n4 = cur >> 1
+        n5 = (below << 1) & mask
+        n6 = below
+        n7 = below >> 1
+
+        # three full adders and a half adder produce the ones column
+        xa = n0 ^ n1
+        sa = xa ^ n2
+        ca = (n0 & n1) | (n2 & xa)
+        xb = n3 ^ n4
+        sb = xb ^ n5
+        cb = (n3 & n4) | (n5 & xb)
+        sc = n6 ^ n7
+        cc = n6 & n7
+        xd = sa ^ sb
+        ones = xd ^ sc
+        cd = (sa & sb) | (sc & xd)
+
+        # the four carries of weight two
+        xe = ca ^ cb
+        te = xe ^ cc
+        ce = (ca & cb) | (cc & xe)
+        twos = te ^ cd
+        cf = te & cd
+        return ones, twos, ce | cf
+
+    def commit(self, generation, grid):
+        """Replaces the grid with the next generation and records the cells
+        which changed.
+
+        :param generation: the generation being committed
+        :param grid: the packed rows of the next generation
+        :return: (births, deaths) between the old and the new grid
+        """
+        births = 0
+        deaths = 0
+        for row, (cur, new) in enumerate(zip(self.grid, grid)):
+            if cur != new:
+                born = new & ~cur
+                died = cur & ~new
+                births += popcount(born)
+                deaths += popcount(died)
+                self.__record(generation, row, born, died)
+        self.grid = grid
+        return births, deaths
+
+    def __record(self, generation, row, born, died):
+        """Writes the cells of a row which were born or died to the log.
+
+        :param generation: the generation being committed
+        :param row: the row which changed
+        :param born: packed cells which became alive
+        :param died: packed cells which became dead
+        """
+        base = row * self.cols
+        width = (self.cols + 7) // 8
+        for bits, state in ((born, CellView.STATE_ALIVE),
+                            (died, CellView.STATE_DEAD)):
+            ids = []
+            for i, byte in enumerate(bits.to_bytes(width, 'little')):
+                if byte:
+                    first = base + (i * 8)
+                    ids.extend(first + b for b in BYTE_BITS[byte])
+            self.log.extend(generation, ids, state)
+
+    def get_alive_flags(self):
+        """:return: one byte per cell in row-major order, 1 if alive and 0
+          otherwise
+        """
+        spec = '0%db' % self.cols
+        digits = ''.join(format(bits, spec)[::-1] for bits in self.grid)
+        return digits.encode('ascii').translate(DIGITS_TO_FLAGS)
+
+    def pack_cells(self):
+        """:return: the state of every cell packed one bit per cell"""
+        return pack_flags(self.get_alive_flags())
+
+    def unpack_cells(self, data):
+        """Restores the grid from pack_cells() output without recording any
+        transitions.
+
+        :param data: bytes returned by pack_cells()
+        """
+        flags = unpack_flags(data, self.lifeform_count)
+        digits = flags.translate(FLAGS_TO_DIGITS)
+        cols = self.cols
+        self.grid = [int(digits[i:i + cols][::-1] or b'0', 2)
+                     for i in range(0, self.lifeform_count, cols)]
+        self.__seeded = True
+
+    def get_population(self):
+        """:return: the number of living cells"""
+        return sum(popcount(bits) for bits in self.grid)
+
+    def get_cell_transitions(self, row, col):
+        """:return: the (generation, state) transitions recorded for one cell"""
+        return self.log.cell_history((row * self.cols) + col)
+
+    def get_transition_count(self):
+        """Gets the total count of life/death transitions that have occurred
+          during the lifetime of the universe.
+
+        :return: the total number of life/death transitions that have occurred
+          so far in the simulation
+        """
+        return len(self.log)
+
+    def __repr__(self):
+        selfname = self.__class__.__name__
+        return "{}[rows={}, cols={}, lf_count={}]".format(selfname, self.rows,
+                                                          self.cols,
+                                                          self.lifeform_count)
@@ -0,0 +1,61 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+class CellView(object):
+    """Read-only stand-in for a LifeForm which asks its universe for its
+    state, so that renderers can keep using get_life_form() on universes
+    which do not store one object per cell.
+    """
+
+    __slots__ = ('universe', 'lfid', 'row', 'col')
+
+    STATE_NONE = -1
+    STATE_DEAD = 0
+    STATE_ALIVE = 1
+
+    def __init__(self, universe, lfid, row, col):
+        """:param universe: the universe which owns the cell's state
+        :param lfid: unique life form indentifier
+        :param row: row at which the cell exists
+        :param col: column at which the cell exists
+        """
+        self.universe = universe
+        self.lfid = lfid
+        self.row = row
+        self.col = col
+
+    @property
+    def state(self):
+        return self.universe.get_state(self.row, self.col)
+
+    @property
+    def transitions(self):
+        return self.universe.get_cell_transitions(self.row, self.col)
+
+    def is_alive(self):
+        """:returns: true if the cell is alive, false otherwise."""
+        return self.state == self.STATE_ALIVE
+
+    def get_transition_count(self):
+        """:return: a count of every dead/alive state transition recorded"""
+        return len(self.transitions)
+
+    def __repr__(self):
+        return "{}[lfid={},row={},col={}]".format(self.__class__.__name__,
+                                                  self.lfid, self.row, self.col)
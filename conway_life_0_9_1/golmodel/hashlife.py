@@ -0,0 +1,247 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+from golmodel.rule import LIFE
+
+
+class Node(object):
+    """A canonical quadtree node covering a 2^k x 2^k square. Quadrants are
+    a (north west), b (north east), c (south west) and d (south east). Nodes
+    are only ever created through HashLife.join() so that equal squares are
+    the same object, which lets results be memoized per node.
+    """
+
+    __slots__ = ('k', 'a', 'b', 'c', 'd', 'n', 'memo')
+
+    def __init__(self, k, a, b, c, d, n):
+        self.k = k
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = d
+        self.n = n          # living cells in the square
+        self.memo = None    # {j: centre advanced 2^j generations}
+
+    def __repr__(self):
+        return "{}[k={}, n={}]".format(self.__class__.__name__, self.k, self.n)
+
+
+class HashLife(object):
+    """Hashed quadtree engine which advances a pattern 2^j generations in a
+    single memoized recursion.
+
+    The canonical node table is bounded: once it holds more than max_nodes
+    nodes, collect() rebuilds it from the nodes reachable from the current
+    root and forgets every memoized result.
+    """
+
+    OFF = Node(0, None, None, None, None, 0)
+    ON = Node(0, None, None, None, None, 1)
+
+    def __init__(self, max_nodes=1000000, rule=None):
+        """:param max_nodes: size of the node table at which it is collected
+        :param rule: a two-state golmodel.rule.Rule without birth on zero
+          neighbours, counting the eight adjacent cells (Conway's B3/S23 if
+          not given)
+        """
+        self.rule = rule if rule is not None else LIFE
+        if self.rule.states != 2 or 0 in self.rule.birth or \
+                not self.rule.neighbourhood.is_standard():
+            raise Exception("HashLife cannot run the rule %s" % self.rule)
+        self.max_nodes = max_nodes
+        self.collections = 0
+        self._table = {}
+        self._zeros = [self.OFF]
+
+    def __len__(self):
+        return len(self._table)
+
+    def join(self, a, b, c, d):
+        """:return: the canonical node whose quadrants are a, b, c and d"""
+        key = (id(a), id(b), id(c), id(d))
+        node = self._table.get(key)
+        if node is None:
+            node = Node(a.k + 1, a, b, c, d, a.n + b.n + c.n + d.n)
+            self._table[key] = node
+        return node
+
+    def zero(self, k):
+        """:return: the empty node of level k"""
+        zeros = self._zeros
+        while len(zeros) <= k:
+            z = zeros[-1]
+            zeros.append(self.join(z, z, z, z))
+        return zeros[k]
+
+    def centre(self, m):
+        """:return: the level k-1 node at the centre of m"""
+        return self.join(m.a.d, m.b.c, m.c.b, m.d.a)
+
+    def pad(self, m):
+        """:return: a level k+1 node with m at its centre"""
+        z = self.zero(m.k - 1)
+        return self.join(self.join(z, z, z, m.a), self.join(z, z, m.b, z),
+                         self.join(z, m.c, z, z), self.join(m.d, z, z, z))
+
+    def build(self, cells, k, row=0, col=0):
+        """Builds a level k node from living cell coordinates.
+
+        :param cells: (row, col) of the living cells, relative to the top left
+          corner of the node and all inside it
+        :param k: level of the node to build
+        """
+        if not cells:
+            return self.zero(k)
+        if k == 0:
+            return self.ON
+        half = 1 << (k - 1)
+        quads = ([], [], [], [])
+        for r, c in cells:
+            quads[((r - row) >= half) * 2 + ((c - col) >= half)].append((r, c))
+        return self.join(self.build(quads[0], k - 1, row, col),
+                         self.build(quads[1], k - 1, row, col + half),
+                         self.build(quads[2], k - 1, row + half, col),
+                         self.build(quads[3], k - 1, row + half, col + half))
+
+    def expand(self, m, row=0, col=0):
+        """Yields the (row, col) of every living cell in m.
+
+        :param row: row of m's top left corner
+        :param col: column of m's top left corner
+        """
+        if m.n == 0:
+            return
+        if m.k == 0:
+            yield (row, col)
+            return
+        half = 1 << (m.k - 1)
+        yield from self.expand(m.a, row, col)
+        yield from self.expand(m.b, row, col + half)
+        yield from self.expand(m.c, row + half, col)
+        yield from self.expand(m.d, row + half, col + half)
+
+    def life_4x4(self, m):
+        """Base case: advances the centre 2x2 of a level 2 node by one
+        generation.
+        """
+        table = self.rule.table
+        grid = [[0] * 4 for _ in range(4)]
+        for r, c in self.expand(m):
+            grid[r][c] = 1
+        quads = []
+        for r in (1, 2):
+            for c in (1, 2):
+                nbs = (grid[r - 1][c - 1] + grid[r - 1][c] + grid[r - 1][c + 1] +
+                       grid[r][c - 1] + grid[r][c + 1] +
+                       grid[r + 1][c - 1] + grid[r + 1][c] + grid[r + 1][c + 1])
+                if table[(grid[r][c] * 9) + nbs]:
+                    quads.append(self.ON)
+                else:
+                    quads.append(self.OFF)
+        return self.join(*quads)
+
+    def successor(self, m, j):
+        """:return: the level k-1 centre of m advanced 2^j generations, where
+          j is at most k-2
+        """
+        if m.n == 0:
+            return m.a
+        if m.memo is not None and j in m.memo:
+            return m.memo[j]
+        if m.k == 2:
+            s = self.life_4x4(m)
+        else:
+            join = self.join
+            a, b, c, d = m.a, m.b, m.c, m.d
+            c1 = self.successor(a, j)
+            c2 = self.successor(join(a.b, b.a, a.d, b.c), j)
+            c3 = self.successor(b, j)
+            c4 = self.successor(join(a.c, a.d, c.a, c.b), j)
+            c5 = self.successor(join(a.d, b.c, c.b, d.a), j)
+            c6 = self.successor(join(b.c, b.d, d.a, d.b), j)
+            c7 = self.successor(c, j)
+            c8 = self.successor(join(c.b, d.a, c.d, d.c), j)
+            c9 = self.successor(d, j)
+            if j < m.k - 2:
+                s = join(join(c1.d, c2.c, c4.b, c5.a),
+                         join(c2.d, c3.c, c5.b, c6.a),
+                         join(c4.d, c5.c, c7.b, c8.a),
+                         join(c5.d, c6.c, c8.b, c9.a))
+            else:
+                s = join(self.successor(join(c1, c2, c4, c5), j),
+                         self.successor(join(c2, c3, c5, c6), j),
+                         self.successor(join(c4, c5, c7, c8), j),
+                         self.successor(join(c5, c6, c8, c9), j))
+        if m.memo is None:
+            m.memo = {}
+        m.memo[j] = s
+        return s
+
+    def advance(self, m, row, col, generations):
+        """Advances a pattern by any number of generations, one power of two
+        at a time, padding the root so that nothing can escape it.
+
+        :param m: root node of the pattern
+        :param row: row of m's top left corner
+        :param col: column of m's top left corner
+        :param generations: number of generations to advance
+        :return: (node, row, col) describing the advanced pattern
+        """
+        j = generations.bit_length() - 1
+        while j >= 0:
+            if generations & (1 << j):
+                # everything must sit in the centre quarter so that after
+                # 2^j <= 2^(k-3) generations it is still within the centre half
+                while m.k < max(j + 3, 3) or \
+                        self.centre(self.centre(m)).n != m.n:
+                    half = 1 << (m.k - 1)
+                    m = self.pad(m)
+                    row -= half
+                    col -= half
+                quarter = 1 << (m.k - 2)
+                m = self.successor(m, j)
+                row += quarter
+                col += quarter
+                if len(self._table) > self.max_nodes:
+                    self.collect(m)
+            j -= 1
+        return m, row, col
+
+    def collect(self, root):
+        """Garbage collects the node table, keeping only the nodes reachable
+        from root and dropping every memoized result.
+        """
+        for node in self._table.values():
+            node.memo = None
+        self._table = {}
+        self._zeros = [self.OFF]
+        stack = [root]
+        seen = set()
+        while stack:
+            node = stack.pop()
+            if node.k == 0 or id(node) in seen:
+                continue
+            seen.add(id(node))
+            key = (id(node.a), id(node.b), id(node.c), id(node.d))
+            self._table[key] = node
+            stack.extend((node.a, node.b, node.c, node.d))
+        self.collections += 1
+
+    def __repr__(self):
+        return "{}[nodes={}, max_nodes={}, collections={}]".format(
+            self.__class__.__name__, len(self._table), self.max_nodes,
+            self.collections)
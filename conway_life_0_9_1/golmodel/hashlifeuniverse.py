@@ -0,0 +1,95 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+from golmodel.hashlife import HashLife
+from golmodel.sparseuniverse import SparseUniverse
+
+
+class HashLifeUniverse(SparseUniverse):
+    """An unbounded Universe which is advanced by a HashLife quadtree rather
+    than cell by cell. The set of living cells is only expanded from the tree
+    after each jump, so reaching generation N costs roughly the same whether
+    N is a hundred or a million generations away.
+    """
+
+    MIN_LEVEL = 3
+
+    def __init__(self, rows=10, cols=10, max_nodes=1000000, log=None,
+                 rule=None):
+        """:param max_nodes: size of the canonical node table at which the
+          HashLife cache is garbage collected
+        :param log: the TransitionLog to record transitions in
+        :param rule: the golmodel.rule.Rule the tree computes
+        """
+        SparseUniverse.__init__(self, rows, cols, bounded=False, log=log)
+        self.hashlife = HashLife(max_nodes, rule)
+        self.root = None
+        self.root_row = 0
+        self.root_col = 0
+
+    def commit(self, generation, born, died):
+        """Applies births and deaths made outside of the tree (for example by
+        randomize()); the tree is rebuilt before the next jump.
+        """
+        SparseUniverse.commit(self, generation, born, died)
+        self.root = None
+
+    def unpack_cells(self, data):
+        """Restores the living cells; the tree is rebuilt before the next jump.
+        """
+        SparseUniverse.unpack_cells(self, data)
+        self.root = None
+
+    def __build_root(self):
+        """Builds the quadtree from the current set of living cells."""
+        if self.live:
+            row = min(r for r, _ in self.live)
+            col = min(c for _, c in self.live)
+            extent = max(max(r for r, _ in self.live) - row,
+                         max(c for _, c in self.live) - col) + 1
+        else:
+            row = col = 0
+            extent = 1
+        k = max(self.MIN_LEVEL, (extent - 1).bit_length())
+        self.root = self.hashlife.build(list(self.live), k, row, col)
+        self.root_row = row
+        self.root_col = col
+
+    def jump(self, generation, count):
+        """Advances the universe count generations in as few HashLife steps
+        as possible and records the net births and deaths.
+
+        :param generation: the generation which will have been reached
+        :param count: number of generations to advance
+        :return: (births, deaths) between the old and the new state
+        """
+        if self.root is None:
+            self.__build_root()
+        self.root, self.root_row, self.root_col = self.hashlife.advance(
+            self.root, self.root_row, self.root_col, count)
+        live = set(self.hashlife.expand(self.root, self.root_row,
+                                        self.root_col))
+        born = live - self.live
+        died = self.live - live
+        SparseUniverse.commit(self, generation, born, died)
+        return len(born), len(died)
+
+    def get_population(self):
+        """:return: the number of living cells"""
+        if self.root is not None:
+            return self.root.n
+        return len(self.live)
@@ -18,57 +18,95 @@
 
 
 class LifeForm(object):
-    """Life form model object for Life simulation."""
+    """Life form model object for Life simulation. A LifeForm is a flyweight
+    view onto one cell of its Universe: the current and next states live in
+    arrays owned by the Universe, so LifeForms cost nothing to keep around
+    and can be created on demand.
+    """
 
-    def __init__(self, lfid=0, row=0, col=0):
-        """:param lfid: unique life form indentifier
-        :param row: row at which the life form exists
-        :param col: column at which the life form exists
-        """
-        self.STATE_NONE = -1
-        self.STATE_DEAD = 0
-        self.STATE_ALIVE = 1
+    __slots__ = ('universe', 'lfid')
+
+    STATE_NONE = -1
+    STATE_DEAD = 0
+    STATE_ALIVE = 1
 
-        self.transitions = []
-        self.state = self.STATE_NONE
-        self.nextState = self.state
+    def __init__(self, universe, lfid=0):
+        """:param universe: the Universe which owns the life form's state
+        :param lfid: unique life form indentifier (its index in the universe)
+        """
+        self.universe = universe
         self.lfid = lfid
-        self.row = row
-        self.col = col
+
+    @property
+    def row(self):
+        """:return: row at which the life form exists"""
+        return self.lfid // self.universe.cols
+
+    @property
+    def col(self):
+        """:return: column at which the life form exists"""
+        return self.lfid % self.universe.cols
+
+    @property
+    def state(self):
+        return self.universe.states[self.lfid]
+
+    @state.setter
+    def state(self, value):
+        self.universe.states[self.lfid] = value
+
+    @property
+    def nextState(self):
+        return self.universe.next_states[self.lfid]
+
+    @nextState.setter
+    def nextState(self, value):
+        self.universe.next_states[self.lfid] = value
+
+    @property
+    def transitions(self):
+        """:return: the (generation, state) transitions recorded so far"""
+        return self.universe.log.cell_history(self.lfid)
 
     def is_alive(self):
         """:returns: true if the LifeForm is alive, false otherwise."""
-        if self.state == self.STATE_ALIVE:
-            return True
-        return False
+        return self.universe.states[self.lfid] == self.STATE_ALIVE
 
     def kill(self, generation):
         """Marks this LifeForm to transition to dead in next generation.
 
         :param generation: current generation (used to record transition vector)
         """
-        self.nextState = self.STATE_DEAD
-        if self.state != self.nextState:
-            self.transitions.append((generation, self.nextState))
+        self.transition(generation, self.STATE_DEAD)
 
     def birth(self, generation):
         """Marks this LifeForm to transition to alive on next commit.
 
         :param generation: current generation (used to record transition vector)
         """
-        self.nextState = self.STATE_ALIVE
-        if self.state != self.nextState:
-            self.transitions.append((generation, self.nextState))
+        self.transition(generation, self.STATE_ALIVE)
+
+    def transition(self, generation, state):
+        """Sets the next state and records the transition if it differs from
+        the current state.
+
+        :param generation: current generation (used to record transition vector)
+        :param state: the state to move to on the next commit
+        """
+        universe = self.universe
+        universe.next_states[self.lfid] = state
+        if universe.states[self.lfid] != state:
+            universe.log.append(generation, self.lfid, state)
 
     def commit(self):
         """Sets the current state to the state dictated by a previous call to
         kill() or birth()
         """
-        self.state = self.nextState
+        self.universe.states[self.lfid] = self.universe.next_states[self.lfid]
 
     def get_transition_count(self):
         """:return: a count of every dead/alive state transition recorded"""
-        return len(self.transitions)
+        return self.universe.log.get_transition_count(self.lfid)
 
     def transitions_to_string(self):
         """:return: a logging-suitable string describing the transitions
@@ -76,6 +114,13 @@ class LifeForm(object):
         """
         return ','.join(map(str, self.transitions))
 
+    def __eq__(self, other):
+        return isinstance(other, LifeForm) and \
+            self.universe is other.universe and self.lfid == other.lfid
+
+    def __hash__(self):
+        return hash((id(self.universe), self.lfid))
+
     def __repr__(self):
         return "{}[lfid={},row={},col={}]".format(self.__class__.__name__,
                                                   self.lfid, self.row, self.col)
@@ -0,0 +1,186 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+from array import array
+from itertools import accumulate
+from operator import add
+
+
+class Neighbourhood(object):
+    """The cells counted as neighbours of a cell: every cell within radius
+    rows and columns (Moore), or within radius steps along rows and columns
+    (von Neumann, a diamond), optionally including the cell itself. Radius 1
+    Moore without the centre is the neighbourhood of Conway's Life.
+    """
+
+    MOORE = "moore"
+    VON_NEUMANN = "vonneumann"
+
+    def __init__(self, radius=1, shape=MOORE, include_centre=False):
+        """:param radius: reach of the neighbourhood in cells
+        :param shape: MOORE or VON_NEUMANN
+        :param include_centre: if True the cell counts itself
+        """
+        if radius < 1:
+            raise Exception("a neighbourhood needs a radius of at least 1")
+        if shape not in (self.MOORE, self.VON_NEUMANN):
+            raise Exception("unsupported neighbourhood shape '%s'" % shape)
+        self.radius = radius
+        self.shape = shape
+        self.include_centre = include_centre
+        if shape == self.MOORE:
+            self.size = ((2 * radius) + 1) ** 2
+        else:
+            self.size = (2 * radius * (radius + 1)) + 1
+        if not include_centre:
+            self.size -= 1
+
+    def is_standard(self):
+        """:return: True for the radius 1 Moore neighbourhood without the
+          centre, which the engines count with their own hand-written code
+        """
+        return self == STANDARD
+
+    def offsets(self):
+        """:return: the (row, column) offsets of every cell in the
+          neighbourhood
+        """
+        r = self.radius
+        return [(dr, dc) for dr in range(-r, r + 1) for dc in range(-r, r + 1)
+                if (self.shape == self.MOORE or abs(dr) + abs(dc) <= r) and
+                (self.include_centre or dr or dc)]
+
+    def tabulate(self, flags, rows, cols):
+        """Builds the table which answers neighbour counts for one generation.
+
+        :param flags: one byte per cell in row-major order, 1 if alive
+        :param rows: rows in the grid
+        :param cols: columns in the grid
+        :return: a NeighbourhoodTable
+        """
+        return NeighbourhoodTable(self, flags, rows, cols)
+
+    def __eq__(self, other):
+        return isinstance(other, Neighbourhood) and \
+            (self.radius, self.shape, self.include_centre) == \
+            (other.radius, other.shape, other.include_centre)
+
+    def __hash__(self):
+        return hash((self.radius, self.shape, self.include_centre))
+
+    def __repr__(self):
+        return "{}[radius={}, shape={}, include_centre={}]".format(
+            self.__class__.__name__, self.radius, self.shape,
+            self.include_centre)
+
+
+STANDARD = Neighbourhood()
+
+
+class SummedAreaTable(object):
+    """Summed-area table (integral image) of a grid of 0/1 flags. Entry
+    (r, c) holds the number of flags set in the rows above r and the columns
+    left of c, so the count in any rectangle takes four lookups however big
+    the rectangle is.
+    """
+
+    def __init__(self, flags, rows, cols):
+        """:param flags: one byte per cell in row-major order
+        :param rows: rows in the grid
+        :param cols: columns in the grid
+        """
+        self.rows = rows
+        self.cols = cols
+        self.width = cols + 1
+        above = [0] * self.width
+        sums = array('l', above)
+        for row in range(rows):
+            line = accumulate(flags[row * cols:(row + 1) * cols], initial=0)
+            above = list(map(add, above, line))
+            sums.extend(above)
+        self.sums = sums
+
+    def box(self, top, left, bottom, right):
+        """Counts the flags set in rows top to bottom - 1 and columns left to
+        right - 1. The rectangle is clipped to the grid, so cells beyond the
+        edges count as unset.
+
+        :return: the count
+        """
+        top = max(top, 0)
+        left = max(left, 0)
+        bottom = min(bottom, self.rows)
+        right = min(right, self.cols)
+        if top >= bottom or left >= right:
+            return 0
+        sums = self.sums
+        upper = top * self.width
+        lower = bottom * self.width
+        return sums[lower + right] - sums[upper + right] - \
+            sums[lower + left] + sums[upper + left]
+
+
+class NeighbourhoodTable(object):
+    """Answers the neighbour count of any cell in O(1) for one generation.
+
+    Moore neighbourhoods are squares, counted straight from a summed-area
+    table of the grid. Von Neumann neighbourhoods are diamonds, which become
+    squares once the grid is turned by 45 degrees: cell (row, col) is placed
+    at (row + col, row - col + cols - 1) of a rows + cols - 1 square grid,
+    whose other cells stay empty, and the diamond is counted as a square of
+    the same radius in a summed-area table of that grid.
+    """
+
+    def __init__(self, neighbourhood, flags, rows, cols):
+        """:param neighbourhood: the Neighbourhood to count
+        :param flags: one byte per cell in row-major order, 1 if alive
+        :param rows: rows in the grid
+        :param cols: columns in the grid
+        """
+        self.radius = neighbourhood.radius
+        self.moore = neighbourhood.shape == Neighbourhood.MOORE
+        self.include_centre = neighbourhood.include_centre
+        self.flags = flags
+        self.cols = cols
+        if self.moore:
+            self.sums = SummedAreaTable(flags, rows, cols)
+        else:
+            size = rows + cols - 1
+            step = max(size - 1, 1)
+            turned = bytearray(size * size)
+            for row in range(rows):
+                # a row of the grid runs diagonally across the turned grid
+                start = (row * (size + 1)) + cols - 1
+                turned[start:start + (step * (cols - 1)) + 1:step] = \
+                    flags[row * cols:(row + 1) * cols]
+            self.sums = SummedAreaTable(turned, size, size)
+
+    def count(self, row, col):
+        """:return: the number of living cells in the neighbourhood of the
+          cell at row x column
+        """
+        r = self.radius
+        if self.moore:
+            u = row
+            v = col
+        else:
+            u = row + col
+            v = row - col + self.cols - 1
+        n = self.sums.box(u - r, v - r, u + r + 1, v + r + 1)
+        if not self.include_centre:
+            n -= self.flags[(row * self.cols) + col]
+        return n
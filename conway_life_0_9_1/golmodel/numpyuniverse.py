@@ -0,0 +1,260 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import random
+
+import numpy as np
+
+from golmodel.cellview import CellView
+from golmodel.neighbourhood import Neighbourhood
+from golmodel.transitionlog import TransitionLog
+
+
+def neighbour_counts(cells):
+    """Counts the living neighbours of every cell by summing the eight shifted
+    copies of the grid. Cells beyond the edge count as dead.
+
+    :param cells: uint8 array of cell states whose last two axes are the rows
+      and columns of the grid; any leading axes hold independent grids
+    :return: a uint8 array shaped like cells holding neighbour counts
+    """
+    c = cells
+    nbs = np.zeros_like(c)
+    nbs[..., 1:, :] += c[..., :-1, :]
+    nbs[..., :-1, :] += c[..., 1:, :]
+    nbs[..., :, 1:] += c[..., :, :-1]
+    nbs[..., :, :-1] += c[..., :, 1:]
+    nbs[..., 1:, 1:] += c[..., :-1, :-1]
+    nbs[..., 1:, :-1] += c[..., :-1, 1:]
+    nbs[..., :-1, 1:] += c[..., 1:, :-1]
+    nbs[..., :-1, :-1] += c[..., 1:, 1:]
+    return nbs
+
+
+def summed_area_counts(cells, neighbourhood):
+    """Counts the living cells in a larger neighbourhood of every cell with a
+    summed-area table of the grid, so that the cost does not depend on the
+    radius. The table is padded by the radius on every side with copies of
+    its edges, which clips each square to the grid, so the counts of all the
+    cells are four slices of it. Von Neumann neighbourhoods are counted on a
+    copy of the grid turned by 45 degrees, in which they are squares (see
+    golmodel.neighbourhood.NeighbourhoodTable). Cells beyond the edge count
+    as dead.
+
+    :param cells: uint8 array of 0/1 cell states whose last two axes are the
+      rows and columns of the grid; any leading axes hold independent grids
+    :param neighbourhood: the golmodel.neighbourhood.Neighbourhood to count
+    :return: an int32 array shaped like cells holding neighbour counts
+    """
+    rows, cols = cells.shape[-2:]
+    lead = cells.shape[:-2]
+    r = neighbourhood.radius
+    moore = neighbourhood.shape == Neighbourhood.MOORE
+    if moore:
+        grid = cells
+    else:
+        u = np.arange(rows).reshape(rows, 1)
+        v = np.arange(cols).reshape(1, cols)
+        u, v = u + v, u - v + (cols - 1)
+        size = rows + cols - 1
+        grid = np.zeros(lead + (size, size), dtype=np.uint8)
+        grid[..., u, v] = cells
+    height, width = grid.shape[-2:]
+    sums = np.zeros(lead + (height + 1, width + 1), dtype=np.int32)
+    np.cumsum(grid, axis=-1, dtype=np.int32, out=sums[..., 1:, 1:])
+    np.cumsum(sums[..., 1:, 1:], axis=-2, out=sums[..., 1:, 1:])
+    sums = np.pad(sums, ((0, 0),) * len(lead) + ((r, r), (r, r)),
+                  mode='edge')
+    d = (2 * r) + 1
+    counts = sums[..., d:d + height, d:d + width] - \
+        sums[..., :height, d:d + width]
+    counts -= sums[..., d:d + height, :width]
+    counts += sums[..., :height, :width]
+    if not moore:
+        counts = counts.reshape(lead + (-1,)).take((u * width) + v, axis=-1)
+    if not neighbourhood.include_centre:
+        counts -= cells
+    return counts
+
+
+class NumpyUniverse(object):
+    """A dense Universe which stores every cell as one byte of a contiguous
+    NumPy uint8 array (1 is alive, 0 is dead, and 2 upwards are the dying
+    states of Generations rules) instead of as LifeForm objects.
+    Transitions are written to the TransitionLog straight from the arrays.
+    """
+
+    def __init__(self, rows=10, cols=10, log=None):
+        """:param log: the TransitionLog to record transitions in (a new one
+          is created if not given)
+        """
+        self.rows = rows
+        self.cols = cols
+        self.lifeform_count = rows * cols
+        self.cells = np.zeros((rows, cols), dtype=np.uint8)
+        self.log = log if log is not None else TransitionLog()
+        self.random_field = None    # a RandomField to randomize from
+        self.__seeded = False
+
+    def __iter__(self):
+        for i in range(self.lifeform_count):
+            yield CellView(self, i, i // self.cols, i % self.cols)
+
+    def randomize(self, thresh=0.4, do_kills=True):
+        """Randomly kill or birth cells in the universe. Draws from the global
+        random module in the same order as Universe.randomize() so that a
+        given RandomSeed produces the same board with either engine.
+
+        :param thresh: normalized floating threshold that describes the
+          likelihood that each cell will be alive rather than dead
+        :param do_kills: if True, cells that were randomly selected for death
+          will be killed, otherwise they are left alone
+
+        When random_field is set, the whole layout is drawn from it at once
+        instead of from the random module.
+        """
+        if self.random_field is not None:
+            born = np.frombuffer(self.random_field.next_flags(
+                thresh, self.lifeform_count), dtype=np.bool_)
+        else:
+            rnd = random.random
+            draws = np.fromiter((rnd() for _ in range(self.lifeform_count)),
+                                dtype=np.float64, count=self.lifeform_count)
+            born = draws <= thresh
+        born = born.reshape(self.rows, self.cols)
+        if do_kills:
+            died = ~born
+        else:
+            died = np.zeros_like(born)
+        self.commit(0, born, died, record_all=not self.__seeded)
+        self.__seeded = True
+
+    def load_runs(self, runs):
+        """Replaces the layout with the given runs of cells, every other cell
+        being dead, and records the cells which change as randomize() does.
+        Each run is written into the grid as one slice.
+
+        :param runs: (row, col, length, state) of every run of cells which are
+          not dead, such as golmodel.pattern.PatternReader.runs() yields
+        """
+        cells = np.zeros_like(self.cells)
+        for row, col, length, state in runs:
+            cells[row, col:col + length] = state
+        if self.__seeded:
+            self.swap(0, cells)
+        else:
+            self.cells = cells
+            self.__record(0, np.arange(self.lifeform_count))
+        self.__seeded = True
+
+    def get_life_form(self, row, col):
+        """Gets a view of the cell at the given position in the grid.
+
+        :param row: desired cell's row
+        :param col: desired cell's column
+        :return: a CellView for row x column
+        """
+        return CellView(self, (row * self.cols) + col, row, col)
+
+    def get_state(self, row, col):
+        """:return: the state of the cell at row x column"""
+        return int(self.cells[row, col])
+
+    def get_neighbour_counts(self):
+        """Counts the living neighbours of every cell at once.
+
+        :return: a uint8 array shaped like the grid holding neighbour counts
+        """
+        return neighbour_counts(self.cells)
+
+    def commit(self, generation, born, died, record_all=False):
+        """Applies a generation's births and deaths to the grid and records the
+        resulting transitions.
+
+        :param generation: the generation being committed
+        :param born: boolean mask of cells which become alive
+        :param died: boolean mask of cells which become dead
+        :param record_all: if True, every masked cell is recorded even if its
+          state does not change (used for the initial layout)
+        """
+        if record_all:
+            changed = born | died
+        else:
+            changed = (born & (self.cells == 0)) | (died & (self.cells == 1))
+        np.bitwise_or(self.cells, born.view(np.uint8), out=self.cells)
+        np.bitwise_and(self.cells, ~died.view(np.uint8), out=self.cells)
+        self.__record(generation, np.flatnonzero(changed))
+
+    def swap(self, generation, cells):
+        """Replaces the grid with an already computed next generation and
+        records the cells which changed.
+
+        :param generation: the generation being committed
+        :param cells: uint8 array holding the next generation
+        """
+        idx = np.flatnonzero(self.cells != cells)
+        self.cells = cells
+        self.__record(generation, idx)
+
+    def __record(self, generation, idx):
+        """Writes the new state of each changed cell to the log.
+
+        :param generation: the generation being committed
+        :param idx: flat indices of the cells which changed
+        """
+        states = self.cells.ravel()[idx].astype(np.int8)
+        self.log.extend(generation, idx.astype(np.uint32), states)
+
+    def get_alive_flags(self):
+        """:return: one byte per cell in row-major order, 1 if alive and 0
+          otherwise (including the dying states of Generations rules)
+        """
+        return (self.cells == 1).tobytes()
+
+    def pack_cells(self):
+        """:return: the state of every cell packed one bit per cell"""
+        return np.packbits((self.cells == 1).ravel(),
+                           bitorder='little').tobytes()
+
+    def unpack_cells(self, data):
+        """Restores the grid from pack_cells() output without recording any
+        transitions. The grid is written in place.
+
+        :param data: bytes returned by pack_cells()
+        """
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8),
+                             count=self.lifeform_count, bitorder='little')
+        self.cells[...] = bits.reshape(self.rows, self.cols)
+
+    def get_cell_transitions(self, row, col):
+        """:return: the (generation, state) transitions recorded for one cell"""
+        return self.log.cell_history((row * self.cols) + col)
+
+    def get_transition_count(self):
+        """Gets the total count of life/death transitions that have occurred
+          during the lifetime of the universe.
+
+        :return: the total number of life/death transitions that have occurred
+          so far in the simulation
+        """
+        return len(self.log)
+
+    def __repr__(self):
+        selfname = self.__class__.__name__
+        return "{}[rows={}, cols={}, lf_count={}]".format(selfname, self.rows,
+                                                          self.cols,
+                                                          self.lifeform_count)
@@ -0,0 +1,55 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+"""Helpers for converting between per-cell flag bytes and packed bits.
+
+Flags are one byte per cell in row-major order, 1 for alive and 0 for
+anything else. Packed cells put cell n in bit n % 8 of byte n // 8, which is
+the same layout as numpy.packbits(..., bitorder='little').
+"""
+
+# translation tables used to move between flag bytes and binary digits
+ALIVE_FLAGS = bytes(1 if b == 1 else 0 for b in range(256))
+FLAGS_TO_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+DIGITS_TO_FLAGS = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def pack_flags(flags):
+    """Packs flag bytes into bits, eight cells per byte. The work is done by
+    int() parsing a string of binary digits, which runs at C speed.
+
+    :param flags: bytes of 0/1 flags, one per cell
+    :return: the packed bytes
+    """
+    if not flags:
+        return b''
+    digits = bytes(flags).translate(FLAGS_TO_DIGITS)[::-1]
+    return int(digits, 2).to_bytes((len(flags) + 7) // 8, 'little')
+
+
+def unpack_flags(data, count):
+    """Unpacks bits written by pack_flags().
+
+    :param data: the packed bytes
+    :param count: number of cells packed
+    :return: bytes of 0/1 flags, one per cell
+    """
+    if count == 0:
+        return b''
+    value = int.from_bytes(data, 'little')
+    digits = format(value, 'b').zfill(count)[::-1][:count]
+    return digits.encode('ascii').translate(DIGITS_TO_FLAGS)
@@ -0,0 +1,288 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+"""Readers for the common Life pattern file formats: RLE, Life 1.06 and
+plaintext.
+
+Files are read incrementally, so a pattern of many megabytes is never held in
+memory whole. A reader first reports the size of the pattern (from the RLE
+header, or a scan of the file for the other formats) so that the universe can
+be sized before any cells are stored, and then yields the living cells as
+horizontal runs, (row, col, length, state), which each universe writes
+straight into its own storage (see load_runs()).
+"""
+import os
+import re
+
+
+class PatternReader(object):
+    """Base class of the pattern readers. Subclasses implement scan(), which
+    sets rows and cols, and read_runs().
+    """
+
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, path):
+        """:param path: the pattern file"""
+        self.path = path
+        self.rows = None
+        self.cols = None
+        self.rule = None        # rulestring given by the file, if any
+
+    def bounds(self):
+        """Gets the size of the pattern without storing any of its cells.
+
+        :return: (rows, cols) of the pattern's bounding box
+        """
+        if self.rows is None:
+            self.scan()
+        return self.rows, self.cols
+
+    def scan(self):
+        """Finds the size of the pattern."""
+        raise NotImplementedError()
+
+    def read_runs(self):
+        """Yields (row, col, length, state) for every run of living cells,
+        relative to the top left corner of the bounding box.
+        """
+        raise NotImplementedError()
+
+    def runs(self, top=0, left=0):
+        """Yields (row, col, length, state) for every run of living cells
+        with the top left corner of the pattern placed at top x left.
+
+        :param top: row of the pattern's first row
+        :param left: column of the pattern's first column
+        """
+        if top == 0 and left == 0:
+            return self.read_runs()
+        return ((row + top, col + left, length, state)
+                for row, col, length, state in self.read_runs())
+
+    def __repr__(self):
+        return "{}[path={}, rows={}, cols={}]".format(
+            self.__class__.__name__, self.path, self.rows, self.cols)
+
+
+class RleReader(PatternReader):
+    """Reads run length encoded patterns. After any "#" comment lines, the
+    header gives the size and optionally the rule, "x = 3, y = 3, rule =
+    B3/S23", and the body is a stream of tokens, each an optional count and
+    a tag: "b" dead, "o" alive, "$" end of row and "!" end of pattern.
+    Generations patterns write "." for dead and "A", "B", ... for states 1,
+    2, ...; states above 24 are prefixed with "p" to "y". Tokens may be
+    split over lines, and the body is read in chunks of CHUNK_SIZE bytes.
+    """
+
+    HEADER = re.compile(r'^x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)'
+                        r'(?:\s*,\s*rule\s*=\s*(\S+))?', re.IGNORECASE)
+    TOKEN = re.compile(r'(\d*)([bo.$!]|[p-y]?[A-X])')
+    PARTIAL = re.compile(r'\d*[p-y]?')
+
+    def __init__(self, path):
+        PatternReader.__init__(self, path)
+        self.__body = 0         # file offset of the first line of the body
+
+    def scan(self):
+        """Reads the header; the body is not read."""
+        with open(self.path, 'r') as f:
+            while True:
+                line = f.readline()
+                if not line:
+                    raise Exception("%s has no RLE header" % self.path)
+                if line.startswith('#') or not line.strip():
+                    continue
+                match = self.HEADER.match(line.strip())
+                if match is None:
+                    raise Exception("%s has no RLE header" % self.path)
+                self.cols = int(match.group(1))
+                self.rows = int(match.group(2))
+                self.rule = match.group(3)
+                self.__body = f.tell()
+                return
+
+    def read_runs(self):
+        self.bounds()
+        row = 0
+        col = 0
+        pending = ''
+        with open(self.path, 'r') as f:
+            f.seek(self.__body)
+            while True:
+                chunk = f.read(self.CHUNK_SIZE)
+                text = pending + ''.join(chunk.split())
+                pos = 0
+                for match in self.TOKEN.finditer(text):
+                    if match.start() != pos:
+                        break
+                    pos = match.end()
+                    count, tag = match.groups()
+                    count = int(count) if count else 1
+                    if tag == '$':
+                        row += count
+                        col = 0
+                    elif tag == 'b' or tag == '.':
+                        col += count
+                    elif tag == '!':
+                        return
+                    else:
+                        if tag == 'o':
+                            state = 1
+                        elif len(tag) == 1:
+                            state = ord(tag) - 64
+                        else:
+                            state = ((ord(tag[0]) - 111) * 24) + \
+                                ord(tag[1]) - 64
+                        yield row, col, count, state
+                        col += count
+                pending = text[pos:]
+                if not self.PARTIAL.fullmatch(pending):
+                    raise Exception("unexpected %r in %s" % (pending[:10],
+                                                             self.path))
+                if not chunk:
+                    return
+
+
+class Life106Reader(PatternReader):
+    """Reads Life 1.06 patterns: a "#Life 1.06" line followed by the "x y"
+    coordinates of every living cell, one per line, which may be negative.
+    The bounding box is found by a first pass over the file; cells which
+    follow each other along a row are joined into runs.
+    """
+
+    def __init__(self, path):
+        PatternReader.__init__(self, path)
+        self.top = 0
+        self.left = 0
+
+    def __cells(self):
+        """Yields (x, y) of every cell listed in the file."""
+        with open(self.path, 'r') as f:
+            for line in f:
+                if line.startswith('#'):
+                    continue
+                fields = line.split()
+                if fields:
+                    yield int(fields[0]), int(fields[1])
+
+    def scan(self):
+        top = left = bottom = right = None
+        for x, y in self.__cells():
+            if top is None:
+                top = bottom = y
+                left = right = x
+            elif y < top:
+                top = y
+            elif y > bottom:
+                bottom = y
+            if x < left:
+                left = x
+            elif x > right:
+                right = x
+        if top is None:
+            self.top = self.left = self.rows = self.cols = 0
+        else:
+            self.top = top
+            self.left = left
+            self.rows = bottom - top + 1
+            self.cols = right - left + 1
+
+    def read_runs(self):
+        self.bounds()
+        top = self.top
+        left = self.left
+        row = col = None
+        length = 0
+        for x, y in self.__cells():
+            if y - top == row and x - left == col + length:
+                length += 1
+                continue
+            if length:
+                yield row, col, length, 1
+            row = y - top
+            col = x - left
+            length = 1
+        if length:
+            yield row, col, length, 1
+
+
+class PlaintextReader(PatternReader):
+    """Reads plaintext (.cells) patterns: "!" comment lines, then one line
+    per row with "O" (or "*") for a living cell and "." for a dead one. The
+    size is found by a first pass over the file.
+    """
+
+    ALIVE = re.compile(r'[O*]+')
+
+    def __rows(self):
+        """Yields every row of the pattern."""
+        with open(self.path, 'r') as f:
+            for line in f:
+                if not line.startswith('!'):
+                    yield line.rstrip()
+
+    def scan(self):
+        rows = cols = 0
+        for line in self.__rows():
+            rows += 1
+            cols = max(cols, len(line))
+        self.rows = rows
+        self.cols = cols
+
+    def read_runs(self):
+        alive = self.ALIVE
+        for row, line in enumerate(self.__rows()):
+            for match in alive.finditer(line):
+                yield row, match.start(), match.end() - match.start(), 1
+
+
+FORMATS = {
+    "rle": RleReader,
+    "life106": Life106Reader,
+    "plaintext": PlaintextReader,
+}
+EXTENSIONS = {
+    ".rle": "rle",
+    ".lif": "life106",
+    ".life": "life106",
+    ".cells": "plaintext",
+}
+
+
+def open_pattern(path, fmt='auto'):
+    """Creates the reader for a pattern file. With fmt "auto" the format is
+    chosen by the file's extension, or else by its first line.
+
+    :param path: the pattern file
+    :param fmt: "rle", "life106", "plaintext" or "auto"
+    :return: a PatternReader
+    """
+    if fmt == "auto":
+        fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        with open(path, 'r') as f:
+            first = f.readline()
+        if first.startswith('#Life 1.06'):
+            fmt = "life106"
+        elif first.startswith('!') or not first.strip(' \r\n.O*'):
+            fmt = "plaintext"
+        else:
+            fmt = "rle"
+    if fmt not in FORMATS:
+        raise Exception("unsupported pattern format '%s'" % fmt)
+    return FORMATS[fmt](path)
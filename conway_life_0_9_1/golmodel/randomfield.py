@@ -0,0 +1,109 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import hashlib
+import math
+import random
+
+from golmodel.splitmix import GOLDEN_GAMMA, MASK64, splitmix64
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class RandomField(object):
+    """Counter-based random layouts. Each randomize() is a numbered draw, and
+    the value drawn for a cell is the cell id's entry in a SplitMix64
+    sequence which starts from the seed and the draw number. It depends on
+    nothing else, so the same layout comes out whichever order the cells are
+    generated in and however they are split between tiles or workers, and
+    a whole field can be generated at once. With NumPy the field is
+    generated BLOCK cells at a time by array arithmetic; without it, cell by
+    cell with the same result.
+
+    As with random.random() <= thresh, a cell is alive when the top 53 bits
+    of its value, as a fraction of 2 ** 53, are at most the threshold.
+    """
+
+    BLOCK = 1 << 20
+
+    def __init__(self, seed=None):
+        """:param seed: an int, or a string such as the RandomSeed setting
+          which is hashed to one; if None a seed is taken from the random
+          module
+        """
+        if seed is None:
+            self.key = random.getrandbits(64)
+        elif isinstance(seed, int):
+            self.key = seed & MASK64
+        else:
+            digest = hashlib.sha512(str(seed).encode('utf-8')).digest()
+            self.key = int.from_bytes(digest[:8], 'little')
+        self.draws = 0
+
+    def flags(self, thresh, start, stop, draw=0):
+        """Generates part of a draw.
+
+        :param thresh: normalized floating threshold that describes the
+          likelihood that each cell will be alive rather than dead
+        :param start: first cell id
+        :param stop: cell id after the last
+        :param draw: the draw number
+        :return: one byte per cell, 1 if alive and 0 otherwise
+        """
+        base = splitmix64(self.key + (draw * GOLDEN_GAMMA))
+        limit = math.floor(thresh * (1 << 53))
+        if limit < 0 or stop <= start:
+            return bytes(max(stop - start, 0))
+        if np is None:
+            return bytes((splitmix64(base + (i * GOLDEN_GAMMA)) >> 11) <= limit
+                         for i in range(start, stop))
+        limit = np.uint64(min(limit, 1 << 53))
+        gamma = np.uint64(GOLDEN_GAMMA)
+        offset = np.uint64((base + GOLDEN_GAMMA) & MASK64)
+        out = np.empty(stop - start, dtype=np.bool_)
+        for lo in range(start, stop, self.BLOCK):
+            hi = min(lo + self.BLOCK, stop)
+            z = np.arange(lo, hi, dtype=np.uint64)
+            z *= gamma
+            z += offset
+            z ^= z >> np.uint64(30)
+            z *= np.uint64(0xBF58476D1CE4E5B9)
+            z ^= z >> np.uint64(27)
+            z *= np.uint64(0x94D049BB133111EB)
+            z ^= z >> np.uint64(31)
+            z >>= np.uint64(11)
+            np.less_equal(z, limit, out=out[lo - start:hi - start])
+        return out.tobytes()
+
+    def next_flags(self, thresh, count):
+        """Generates the next draw for a whole universe.
+
+        :param thresh: normalized floating threshold that describes the
+          likelihood that each cell will be alive rather than dead
+        :param count: number of cells in the universe
+        :return: one byte per cell, 1 if alive and 0 otherwise
+        """
+        flags = self.flags(thresh, 0, count, self.draws)
+        self.draws += 1
+        return flags
+
+    def __repr__(self):
+        return "{}[key={:#018x}, draws={}]".format(self.__class__.__name__,
+                                                   self.key, self.draws)
@@ -0,0 +1,209 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import re
+
+from golmodel.neighbourhood import STANDARD, Neighbourhood
+
+
+class Rule(object):
+    """A cellular automaton rule in the Life family, parsed from a rulestring
+    and compiled into a lookup table of next states.
+
+    Two-state rules are written "B3/S23": the neighbour counts at which a dead
+    cell is born, then the counts at which a living cell survives. The older
+    "23/3" (survival/birth) form is also read. "Generations" rules add a
+    number of states, "B2/S/C3" (or "/2/3"): a living cell which does not
+    survive does not die at once but passes through states 2, 3, ... up to
+    states - 1 before it is dead, and only living cells (state 1) are counted
+    as neighbours. "Larger than Life" rules count a bigger neighbourhood and
+    are written as in Golly, "R5,C0,M1,S34..58,B34..45,NM": the radius, the
+    number of states (0 or 2 for two states), 1 if the cell counts itself,
+    the survival and birth ranges, and NM for a Moore (square) or NN for a
+    von Neumann (diamond) neighbourhood. Some well known rules can be given
+    by name, see NAMES.
+
+    The table holds the next state of a cell for every (state, neighbour
+    count) at index state * stride + count, one byte per entry, where stride
+    is one more than the largest possible count (9 for Life).
+    """
+
+    NAMES = {
+        "life": "B3/S23",
+        "highlife": "B36/S23",
+        "daynight": "B3678/S34678",
+        "seeds": "B2/S",
+        "lifewithoutdeath": "B3/S012345678",
+        "maze": "B3/S12345",
+        "replicator": "B1357/S1357",
+        "briansbrain": "B2/S/C3",
+        "starwars": "B2/S345/C4",
+        "bosco": "R5,C0,M1,S34..58,B34..45,NM",
+        "majority": "R4,C0,M1,S41..81,B41..81,NM",
+    }
+    MAX_STATES = 128    # states are stored as signed bytes
+    TAGGED = re.compile(r'^B([0-8]*)/S([0-8]*)(?:/C?(\d+))?$')
+    SURVIVAL_BIRTH = re.compile(r'^([0-8]*)/([0-8]*)(?:/(\d+))?$')
+    RANGE = re.compile(r'^(\d+)(?:\.\.(\d+))?$')
+    SHAPES = {"M": Neighbourhood.MOORE, "N": Neighbourhood.VON_NEUMANN}
+
+    def __init__(self, birth=(3,), survival=(2, 3), states=2,
+                 neighbourhood=STANDARD):
+        """:param birth: neighbour counts at which a dead cell is born
+        :param survival: neighbour counts at which a living cell survives
+        :param states: number of states, 2 for a two-state rule
+        :param neighbourhood: the golmodel.neighbourhood.Neighbourhood whose
+          living cells are counted
+        """
+        if not 2 <= states <= self.MAX_STATES:
+            raise Exception("a rule must have between 2 and %d states" %
+                            self.MAX_STATES)
+        self.birth = frozenset(birth)
+        self.survival = frozenset(survival)
+        self.states = states
+        self.neighbourhood = neighbourhood
+        self.stride = neighbourhood.size + 1
+        if max(self.birth | self.survival, default=0) >= self.stride:
+            raise Exception("a neighbourhood of %d cells cannot hold the "
+                            "counts of the rule" % neighbourhood.size)
+        self.table = self.__compile()
+        self.birth_runs = self.runs(self.birth)
+        self.death_runs = self.runs(set(range(self.stride)) - self.survival)
+
+    @classmethod
+    def parse(cls, text):
+        """Reads a rulestring or rule name.
+
+        :param text: e.g. "B36/S23", "23/3", "B2/S/C3",
+          "R5,C0,M1,S34..58,B34..45,NM" or "highlife"
+        :return: the Rule
+        """
+        key = re.sub(r'[^a-z0-9]', '', text.lower())
+        rulestring = cls.NAMES.get(key, text).replace(' ', '').upper()
+        if rulestring.startswith('R'):
+            return cls.__parse_larger(text, rulestring)
+        match = cls.TAGGED.match(rulestring)
+        if match is not None:
+            birth, survival, states = match.groups()
+        else:
+            match = cls.SURVIVAL_BIRTH.match(rulestring)
+            if match is None:
+                raise Exception("unsupported rule '%s'" % text)
+            survival, birth, states = match.groups()
+        return cls(map(int, birth), map(int, survival),
+                   int(states) if states else 2)
+
+    @classmethod
+    def __parse_larger(cls, text, rulestring):
+        """Reads a "Larger than Life" rulestring. S and B may be repeated to
+        give more than one range each.
+        """
+        fields = {'R': 1, 'C': 0, 'M': 0, 'N': Neighbourhood.MOORE}
+        counts = {'S': set(), 'B': set()}
+        try:
+            for token in rulestring.split(','):
+                letter, value = token[0], token[1:]
+                if letter in counts:
+                    if value:
+                        low, high = cls.RANGE.match(value).groups()
+                        counts[letter].update(
+                            range(int(low), int(high or low) + 1))
+                elif letter == 'N':
+                    fields[letter] = cls.SHAPES[value]
+                else:
+                    if letter not in fields:
+                        raise KeyError(letter)
+                    fields[letter] = int(value)
+        except (AttributeError, KeyError, IndexError, ValueError):
+            raise Exception("unsupported rule '%s'" % text)
+        neighbourhood = Neighbourhood(fields['R'], fields['N'],
+                                      fields['M'] == 1)
+        return cls(counts['B'], counts['S'], max(fields['C'], 2),
+                   neighbourhood)
+
+    @staticmethod
+    def runs(counts):
+        """Splits a set of neighbour counts into runs of consecutive counts,
+        so that membership can be tested with a few comparisons.
+
+        :return: a tuple of (lowest, highest) count pairs
+        """
+        result = []
+        for count in sorted(counts):
+            if result and result[-1][1] == count - 1:
+                result[-1] = (result[-1][0], count)
+            else:
+                result.append((count, count))
+        return tuple(result)
+
+    def __compile(self):
+        """:return: the table of next states"""
+        stride = self.stride
+        dying = 2 if self.states > 2 else 0
+        table = bytearray(self.states * stride)
+        for count in range(stride):
+            table[count] = 1 if count in self.birth else 0
+            table[stride + count] = 1 if count in self.survival else dying
+            for state in range(2, self.states):
+                table[(state * stride) + count] = (state + 1) % self.states
+        return bytes(table)
+
+    def next_state(self, state, count):
+        """:return: the state following state when the cell has count living
+          neighbours
+        """
+        return self.table[(state * self.stride) + count]
+
+    def is_life(self):
+        """:return: True if this is Conway's B3/S23"""
+        return self == LIFE
+
+    def __eq__(self, other):
+        return isinstance(other, Rule) and self.table == other.table and \
+            self.neighbourhood == other.neighbourhood
+
+    def __hash__(self):
+        return hash((self.table, self.neighbourhood))
+
+    def __str__(self):
+        if not self.neighbourhood.is_standard():
+            return self.__larger_str()
+        text = "B%s/S%s" % ("".join(map(str, sorted(self.birth))),
+                            "".join(map(str, sorted(self.survival))))
+        if self.states > 2:
+            text += "/C%d" % self.states
+        return text
+
+    def __larger_str(self):
+        """:return: the rule as a "Larger than Life" rulestring"""
+        nh = self.neighbourhood
+        shape = "M" if nh.shape == Neighbourhood.MOORE else "N"
+        states = self.states if self.states > 2 else 0
+        parts = ["R%d" % nh.radius, "C%d" % states,
+                 "M%d" % nh.include_centre]
+        for letter, counts in (("S", self.survival), ("B", self.birth)):
+            parts.extend(letter + ("%d" % low if low == high else
+                                   "%d..%d" % (low, high))
+                         for low, high in self.runs(counts))
+        parts.append("N" + shape)
+        return ",".join(parts)
+
+    def __repr__(self):
+        return "{}[{}]".format(self.__class__.__name__, self)
+
+
+LIFE = Rule()
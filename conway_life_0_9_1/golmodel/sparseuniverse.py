@@ -0,0 +1,266 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import random
+from array import array
+from collections import Counter
+from itertools import compress, repeat
+
+from golmodel.cellview import CellView
+from golmodel.packing import pack_flags, unpack_flags
+from golmodel.transitionlog import TransitionLog
+
+# swaps 0 and 1 flags
+INVERT = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
+class SparseUniverse(object):
+    """A Universe which stores only the coordinates of living cells. Memory and
+    time scale with the live population instead of the board area, which
+    suits gliders and spaceships crossing mostly empty space.
+
+    rows and cols describe the viewport which is seeded by randomize() and
+    drawn by renderers. When the universe is bounded, nothing can live outside
+    the viewport (as with Universe); when unbounded, patterns are free to
+    leave it and the board has no fixed size. Only transitions inside the
+    viewport are written to the TransitionLog; the rest are just counted.
+    """
+
+    NEIGHBOUR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1),
+                         (0, -1), (0, 1),
+                         (1, -1), (1, 0), (1, 1))
+
+    def __init__(self, rows=10, cols=10, bounded=True, log=None):
+        """:param log: the TransitionLog to record transitions in (a new one
+          is created if not given)
+        """
+        self.rows = rows
+        self.cols = cols
+        self.bounded = bounded
+        self.lifeform_count = rows * cols
+        self.live = set()           # (row, col) of every living cell
+        self.log = log if log is not None else TransitionLog()
+        self.outside_transitions = 0
+        self.random_field = None    # a RandomField to randomize from
+        self.__seeded = False
+
+    def __iter__(self):
+        for i in range(self.lifeform_count):
+            yield CellView(self, i, i // self.cols, i % self.cols)
+
+    def randomize(self, thresh=0.4, do_kills=True):
+        """Randomly kill or birth cells in the viewport. Draws from the global
+        random module in the same order as Universe.randomize() so that a
+        given RandomSeed produces the same board with either engine.
+
+        :param thresh: normalized floating threshold that describes the
+          likelihood that each cell will be alive rather than dead
+        :param do_kills: if True, cells that were randomly selected for death
+          will be killed, otherwise they are left alone
+
+        When random_field is set, the whole layout is drawn from it at once
+        instead of from the random module.
+        """
+        if self.random_field is not None:
+            self.__randomize_field(thresh, do_kills)
+            return
+        rnd = random.random
+        born = []
+        died = []
+        seeded_dead = []
+        for row in range(self.rows):
+            for col in range(self.cols):
+                pos = (row, col)
+                if rnd() > thresh:
+                    if do_kills and pos in self.live:
+                        died.append(pos)
+                    elif do_kills and not self.__seeded:
+                        seeded_dead.append((row * self.cols) + col)
+                elif pos not in self.live:
+                    born.append(pos)
+        self.commit(0, born, died)
+        self.log.extend(0, seeded_dead, CellView.STATE_DEAD)
+        self.__seeded = True
+
+    def __randomize_field(self, thresh, do_kills):
+        """randomize() from random_field: the living cells are picked out of
+        the drawn flags at C speed rather than visited one by one.
+        """
+        count = self.lifeform_count
+        rows = self.rows
+        cols = self.cols
+        flags = self.random_field.next_flags(thresh, count)
+        born = list(map(divmod, compress(range(count), flags), repeat(cols)))
+        live = self.live
+        died = []
+        seeded_dead = []
+        if live:
+            drawn = set(born)
+            born = [pos for pos in born if pos not in live]
+            if do_kills:
+                died = [(r, c) for r, c in live if 0 <= r < rows and
+                        0 <= c < cols and (r, c) not in drawn]
+        if do_kills and not self.__seeded:
+            seeded_dead = compress(range(count), flags.translate(INVERT))
+            if live:
+                seeded_dead = [i for i in seeded_dead
+                               if divmod(i, cols) not in live]
+        self.commit(0, born, died)
+        self.log.extend(0, seeded_dead, CellView.STATE_DEAD)
+        self.__seeded = True
+
+    def load_runs(self, runs):
+        """Replaces the living cells with the given runs of cells and records
+        the cells which change as randomize() does.
+
+        :param runs: (row, col, length, state) of every run of living cells,
+          such as golmodel.pattern.PatternReader.runs() yields
+        """
+        live = set()
+        for row, col, length, state in runs:
+            if state != CellView.STATE_ALIVE:
+                raise Exception("the sparse engine only holds two states")
+            live.update(zip(repeat(row, length), range(col, col + length)))
+        if self.bounded:
+            live = {pos for pos in live if self.in_bounds(*pos)}
+        self.commit(0, live - self.live, self.live - live)
+        if not self.__seeded:
+            flags = self.get_alive_flags()
+            self.log.extend(0, [i for i, flag in enumerate(flags) if not flag],
+                            CellView.STATE_DEAD)
+        self.__seeded = True
+
+    def get_life_form(self, row, col):
+        """Gets a view of the cell at the given position in the viewport.
+
+        :param row: desired cell's row
+        :param col: desired cell's column
+        :return: a CellView for row x column
+        """
+        return CellView(self, (row * self.cols) + col, row, col)
+
+    def get_state(self, row, col):
+        """:return: the state of the cell at row x column"""
+        if (row, col) in self.live:
+            return CellView.STATE_ALIVE
+        return CellView.STATE_DEAD
+
+    def in_bounds(self, row, col):
+        """:return: True if a cell may live at row x column"""
+        if not self.bounded:
+            return True
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def get_neighbour_counts(self):
+        """Counts neighbours by letting every living cell add one to each of
+        its eight neighbours. Cells with no living neighbours never appear.
+
+        :return: a Counter mapping (row, col) to living neighbour count
+        """
+        offsets = self.NEIGHBOUR_OFFSETS
+        return Counter((r + dr, c + dc) for r, c in self.live
+                       for dr, dc in offsets)
+
+    def commit(self, generation, born, died):
+        """Applies a generation's births and deaths and records them.
+
+        :param generation: the generation being committed
+        :param born: (row, col) of the cells which become alive
+        :param died: (row, col) of the cells which become dead
+        """
+        self.live.difference_update(died)
+        self.live.update(born)
+        self.__record(generation, born, CellView.STATE_ALIVE)
+        self.__record(generation, died, CellView.STATE_DEAD)
+
+    def __record(self, generation, cells, state):
+        """Writes the transitions of cells inside the viewport to the log, in
+        cell order so that the log does not depend on set iteration order, and
+        counts the others.
+        """
+        rows = self.rows
+        cols = self.cols
+        ids = sorted((r * cols) + c for r, c in cells if 0 <= r < rows and
+                     0 <= c < cols)
+        self.outside_transitions += len(cells) - len(ids)
+        self.log.extend(generation, ids, state)
+
+    def get_population(self):
+        """:return: the number of living cells"""
+        return len(self.live)
+
+    def get_alive_flags(self):
+        """:return: one byte per cell of the viewport in row-major order, 1 if
+          alive and 0 otherwise
+        """
+        flags = bytearray(self.lifeform_count)
+        for r, c in self.live:
+            if 0 <= r < self.rows and 0 <= c < self.cols:
+                flags[(r * self.cols) + c] = 1
+        return bytes(flags)
+
+    def pack_cells(self):
+        """:return: the living cells: the viewport packed one bit per cell
+          when bounded, otherwise the coordinates of every living cell as
+          signed 64-bit pairs
+        """
+        if self.bounded:
+            return pack_flags(self.get_alive_flags())
+        coords = array('q')
+        for r, c in sorted(self.live):
+            coords.append(r)
+            coords.append(c)
+        return coords.tobytes()
+
+    def unpack_cells(self, data):
+        """Restores the living cells from pack_cells() output without
+        recording any transitions.
+
+        :param data: bytes returned by pack_cells()
+        """
+        if self.bounded:
+            flags = unpack_flags(data, self.lifeform_count)
+            cols = self.cols
+            self.live = {divmod(i, cols) for i, flag in enumerate(flags)
+                         if flag}
+        else:
+            coords = array('q')
+            coords.frombytes(data)
+            self.live = set(zip(coords[0::2], coords[1::2]))
+        self.__seeded = True
+
+    def get_cell_transitions(self, row, col):
+        """:return: the (generation, state) transitions recorded for one cell
+          of the viewport
+        """
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.log.cell_history((row * self.cols) + col)
+        return []
+
+    def get_transition_count(self):
+        """Gets the total count of life/death transitions that have occurred
+          during the lifetime of the universe, inside the viewport or not.
+
+        :return: the total number of life/death transitions that have occurred
+          so far in the simulation
+        """
+        return len(self.log) + self.outside_transitions
+
+    def __repr__(self):
+        selfname = self.__class__.__name__
+        return "{}[rows={}, cols={}, population={}, bounded={}]".format(
+            selfname, self.rows, self.cols, len(self.live), self.bounded)
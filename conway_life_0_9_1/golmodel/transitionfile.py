@@ -0,0 +1,341 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_right
+
+from golmodel.transitionlog import TransitionChunk, TransitionLog
+
+
+class TransitionFile(object):
+    """Layout of a transition log file. After the header, the file is a
+    sequence of blocks, each holding one TransitionLog chunk column by column:
+
+      count (uint64), generations (count x uint32), cells (count x uint32),
+      states (count x int8), zero padding to a multiple of 8 bytes
+
+    Integers are in the byte order of the machine which wrote the file.
+    """
+
+    MAGIC = b'GOLTLOG1'
+    HEADER = struct.Struct('=8sB7x')     # magic, 1 if little endian
+    BLOCK = struct.Struct('=Q')
+
+    @classmethod
+    def block_size(cls, count):
+        """:return: bytes taken by a block of count transitions"""
+        size = cls.BLOCK.size + (9 * count)
+        return size + (-size % 8)
+
+
+class StreamingTransitionLog(TransitionLog):
+    """A TransitionLog which appends every full chunk to a binary file and
+    then forgets it, so memory stays flat however long the simulation runs.
+    Iteration reads the file back through a TransitionLogReader. Per-cell
+    lookups share one open reader whose per-cell index is built on the first
+    lookup after the log has grown, so asking for every cell's history reads
+    the file once.
+    """
+
+    def __init__(self, path, offset=None, count=0):
+        """:param path: the file to write
+        :param offset: if given, the existing file is truncated to this many
+          bytes and appended to (used to resume from a checkpoint), otherwise
+          it is overwritten
+        :param count: number of transitions held in the first offset bytes
+        """
+        TransitionLog.__init__(self)
+        self.path = path
+        self.__history = None       # indexed reader for per-cell lookups
+        if offset is None:
+            self.__file = open(path, 'wb')
+            self.__file.write(TransitionFile.HEADER.pack(
+                TransitionFile.MAGIC, sys.byteorder == 'little'))
+        else:
+            self.__file = open(path, 'r+b')
+            self.__file.truncate(offset)
+            self.__file.seek(offset)
+            self.count = count
+
+    def tell(self):
+        """Flushes the log.
+
+        :return: the size of the file, which is the offset to resume from
+        """
+        self.flush()
+        return self.__file.tell()
+
+    def chunk_full(self, chunk):
+        """Writes the full chunk to the file and starts an empty one."""
+        self.__write(chunk)
+        self.chunks = [TransitionChunk()]
+        return self.chunks[0]
+
+    def __write(self, chunk):
+        """Appends one chunk to the file as a single block."""
+        count = len(chunk)
+        if count == 0:
+            return
+        f = self.__file
+        f.write(TransitionFile.BLOCK.pack(count))
+        chunk.generations.tofile(f)
+        chunk.cells.tofile(f)
+        chunk.states.tofile(f)
+        f.write(bytes(-(TransitionFile.BLOCK.size + (9 * count)) % 8))
+
+    def flush(self):
+        """Writes the partly filled chunk to the file."""
+        if self.__file.closed:
+            return
+        self.chunk_full(self.chunks[-1])
+        self.__file.flush()
+
+    def close(self):
+        """Flushes the log and closes the file, and the reader used for
+        per-cell lookups.
+        """
+        self.flush()
+        self.__file.close()
+        if self.__history is not None:
+            self.__history.close()
+            self.__history = None
+
+    def reader(self):
+        """:return: a new TransitionLogReader over everything recorded so far
+        """
+        self.flush()
+        return TransitionLogReader(self.path)
+
+    def __iter__(self):
+        reader = self.reader()
+        yield from reader
+        reader.close()
+
+    def __indexed_reader(self):
+        """:return: a TransitionLogReader whose per-cell index covers
+          everything recorded so far, opened again only if the log has grown
+        """
+        history = self.__history
+        if history is None or history.count != self.count:
+            if history is not None:
+                history.close()
+            history = self.reader()
+            history.build_index()
+            self.__history = history
+        return history
+
+    def cell_transitions(self, cell):
+        """:return: (generations, states) typed arrays of one cell's
+          transitions
+        """
+        return self.__indexed_reader().cell_transitions(cell)
+
+    def cell_history(self, cell):
+        """:return: the (generation, state) transitions of one cell"""
+        return self.__indexed_reader().cell_history(cell)
+
+    def get_transition_count(self, cell=None):
+        """:param cell: if given, count only this cell's transitions
+        :return: the number of transitions recorded
+        """
+        if cell is None:
+            return self.count
+        return self.__indexed_reader().get_transition_count(cell)
+
+
+class TransitionLogReader(object):
+    """Reads a transition log file through a memory map. The blocks are
+    exposed as typed memoryviews onto the map, so records are only turned
+    into Python objects one at a time as they are consumed.
+
+    Per-cell lookups go through an index built in two passes over the file:
+    for every cell id the offset of its first transition, and the position
+    of every transition in the file sorted by cell id. Only the offsets are
+    held in memory; the positions are written to a temporary file next to
+    the log and mapped, and generations and states are read through the
+    log's own map, so memory stays flat however long the log is. Lookups
+    need the reader open.
+    """
+
+    def __init__(self, path):
+        """:param path: a file written by StreamingTransitionLog"""
+        self.path = path
+        self.__file = open(path, 'rb')
+        size = self.__file.seek(0, 2)
+        self.__map = None
+        self.blocks = []            # (offset, count) of every block
+        self.__offsets = None
+        self.__index_file = None
+        self.__index_map = None
+        self.__positions = None     # record positions sorted by cell id
+        self.__starts = None        # position of every block's first record
+        self.__columns = None       # (generations, states) of every block
+        if size <= TransitionFile.HEADER.size:
+            self.count = 0
+            return
+        self.__map = mmap.mmap(self.__file.fileno(), 0,
+                               access=mmap.ACCESS_READ)
+        magic, little = TransitionFile.HEADER.unpack_from(self.__map, 0)
+        if magic != TransitionFile.MAGIC:
+            raise Exception("%s is not a transition log" % path)
+        if bool(little) != (sys.byteorder == 'little'):
+            raise Exception("%s was written with a different byte order" %
+                            path)
+        offset = TransitionFile.HEADER.size
+        total = 0
+        while offset < size:
+            count, = TransitionFile.BLOCK.unpack_from(self.__map, offset)
+            self.blocks.append((offset, count))
+            total += count
+            offset += TransitionFile.block_size(count)
+        self.count = total
+
+    def __len__(self):
+        return self.count
+
+    def iter_blocks(self):
+        """Yields (generations, cells, states) memoryviews for every block, in
+        the order they were written.
+        """
+        view = memoryview(self.__map) if self.__map is not None else None
+        for offset, count in self.blocks:
+            start = offset + TransitionFile.BLOCK.size
+            gens = view[start:start + (4 * count)].cast(
+                TransitionLog.GENERATION_TYPE)
+            start += 4 * count
+            cells = view[start:start + (4 * count)].cast(
+                TransitionLog.CELL_TYPE)
+            start += 4 * count
+            states = view[start:start + count].cast(TransitionLog.STATE_TYPE)
+            yield gens, cells, states
+
+    def __iter__(self):
+        """Yields every (generation, cell, state) in the order recorded."""
+        for gens, cells, states in self.iter_blocks():
+            yield from zip(gens, cells, states)
+
+    def build_index(self):
+        """Builds the per-cell index, if it has not been built yet."""
+        if self.__offsets is not None:
+            return
+        if self.__file.closed:
+            raise Exception("%s has been closed" % self)
+        offsets = array(TransitionLog.INDEX_TYPE, [0])
+        starts = []
+        columns = []
+        pos = 0
+        for gens, cells, states in self.iter_blocks():
+            if cells:
+                size = max(cells) + 2
+                if size > len(offsets):
+                    offsets.extend([0] * (size - len(offsets)))
+            for cell in cells:
+                offsets[cell + 1] += 1
+            starts.append(pos)
+            columns.append((gens, states))
+            pos += len(cells)
+            cells.release()
+        for cell in range(len(offsets) - 1):
+            offsets[cell + 1] += offsets[cell]
+        self.__starts = starts
+        self.__columns = columns
+        self.__offsets = offsets
+        if self.count == 0:
+            return
+        self.__index_file = tempfile.TemporaryFile(
+            dir=os.path.dirname(os.path.abspath(self.path)))
+        self.__index_file.truncate(4 * self.count)
+        self.__index_map = mmap.mmap(self.__index_file.fileno(), 0)
+        positions = memoryview(self.__index_map).cast(
+            TransitionLog.INDEX_TYPE)
+        fill = array(TransitionLog.INDEX_TYPE, offsets)
+        pos = 0
+        for gens, cells, states in self.iter_blocks():
+            for cell in cells:
+                positions[fill[cell]] = pos
+                fill[cell] += 1
+                pos += 1
+            gens.release()
+            cells.release()
+            states.release()
+        self.__positions = positions
+
+    def __cell_range(self, cell):
+        """:return: (start, end) of the cell's transitions in the index"""
+        self.build_index()
+        if cell + 1 >= len(self.__offsets):
+            return 0, 0
+        return self.__offsets[cell], self.__offsets[cell + 1]
+
+    def cell_transitions(self, cell):
+        """:return: (generations, states) typed arrays of one cell's
+          transitions
+        """
+        start, end = self.__cell_range(cell)
+        generations = array(TransitionLog.GENERATION_TYPE)
+        states = array(TransitionLog.STATE_TYPE)
+        if start == end:
+            return generations, states
+        starts = self.__starts
+        columns = self.__columns
+        for pos in self.__positions[start:end]:
+            i = bisect_right(starts, pos) - 1
+            block_gens, block_states = columns[i]
+            pos -= starts[i]
+            generations.append(block_gens[pos])
+            states.append(block_states[pos])
+        return generations, states
+
+    def cell_history(self, cell):
+        """:return: the (generation, state) transitions of one cell"""
+        return list(zip(*self.cell_transitions(cell)))
+
+    def get_transition_count(self, cell):
+        """:return: the number of transitions of one cell"""
+        start, end = self.__cell_range(cell)
+        return end - start
+
+    def close(self):
+        """Releases the memory maps and the index."""
+        if self.__positions is not None:
+            self.__positions.release()
+            self.__positions = None
+        if self.__index_map is not None:
+            self.__index_map.close()
+            self.__index_file.close()
+            self.__index_map = None
+        for gens, states in self.__columns or ():
+            gens.release()
+            states.release()
+        self.__columns = None
+        self.__offsets = None
+        if self.__map is not None:
+            try:
+                self.__map.close()
+            except BufferError:
+                pass    # blocks are still in use; freed along with them
+            self.__map = None
+        self.__file.close()
+
+    def __repr__(self):
+        return "{}[path={}, transitions={}, blocks={}]".format(
+            self.__class__.__name__, self.path, self.count, len(self.blocks))
@@ -0,0 +1,233 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+from array import array
+from bisect import bisect_right
+
+
+class TransitionChunk(object):
+    """One block of the transition log: three parallel typed arrays."""
+
+    __slots__ = ('generations', 'cells', 'states')
+
+    def __init__(self):
+        self.generations = array(TransitionLog.GENERATION_TYPE)
+        self.cells = array(TransitionLog.CELL_TYPE)
+        self.states = array(TransitionLog.STATE_TYPE)
+
+    def __len__(self):
+        return len(self.cells)
+
+
+class TransitionLog(object):
+    """Universe-wide record of every dead/alive transition, stored column-wise
+    in typed arrays (generation, cell id, new state) at 9 bytes per
+    transition. The arrays grow in chunks of roughly CHUNK_SIZE records so
+    that long runs never copy one huge array on growth.
+
+    Per-cell lookups go through an index which is built on first use after
+    the log has grown: a counting sort of record positions by cell id.
+
+    Listeners are called with (generation, cells, states) for every batch of
+    transitions recorded, so that other components can follow the changes
+    without reading the log back.
+    """
+
+    GENERATION_TYPE = 'I'
+    CELL_TYPE = 'I'
+    STATE_TYPE = 'b'
+    INDEX_TYPE = 'I'
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self):
+        self.chunks = [TransitionChunk()]
+        self.count = 0
+        self.listeners = []
+        self.__index = None
+        self.__offsets = None
+        self.__starts = None
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Yields every (generation, cell, state) in the order recorded."""
+        for chunk in self.chunks:
+            yield from zip(chunk.generations, chunk.cells, chunk.states)
+
+    def __current_chunk(self):
+        """:return: the chunk which new records are appended to"""
+        chunk = self.chunks[-1]
+        if len(chunk) >= self.CHUNK_SIZE:
+            chunk = self.chunk_full(chunk)
+        return chunk
+
+    def chunk_full(self, chunk):
+        """Called when the last chunk reaches CHUNK_SIZE records.
+
+        :param chunk: the chunk which is full
+        :return: the chunk to append to from now on
+        """
+        chunk = TransitionChunk()
+        self.chunks.append(chunk)
+        return chunk
+
+    def append(self, generation, cell, state):
+        """Records a single transition.
+
+        :param generation: the generation in which the transition happens
+        :param cell: id of the cell (LifeForm.lfid)
+        :param state: the cell's new state
+        """
+        chunk = self.__current_chunk()
+        chunk.generations.append(generation)
+        chunk.cells.append(cell)
+        chunk.states.append(state)
+        self.count += 1
+        self.__index = None
+        for listener in self.listeners:
+            listener(generation, (cell,), (state,))
+
+    def extend(self, generation, cells, states):
+        """Records many transitions of one generation at once.
+
+        :param generation: the generation in which the transitions happen
+        :param cells: cell ids; either a sequence or a buffer of 4-byte
+          unsigned ints such as a uint32 NumPy array
+        :param states: new states, matching cells; either a sequence, a buffer
+          of signed bytes, or a single state shared by every cell
+        """
+        cells = self.__as_array(self.CELL_TYPE, cells)
+        if not cells:
+            return
+        if isinstance(states, int):
+            states = array(self.STATE_TYPE, [states]) * len(cells)
+        else:
+            states = self.__as_array(self.STATE_TYPE, states)
+        chunk = self.__current_chunk()
+        chunk.generations.extend(
+            array(self.GENERATION_TYPE, [generation]) * len(cells))
+        chunk.cells.extend(cells)
+        chunk.states.extend(states)
+        self.count += len(cells)
+        self.__index = None
+        for listener in self.listeners:
+            listener(generation, cells, states)
+
+    @staticmethod
+    def __as_array(typecode, values):
+        """:return: values as an array of the given type, copying buffers
+          byte for byte rather than element by element
+        """
+        if isinstance(values, array) and values.typecode == typecode:
+            return values
+        result = array(typecode)
+        try:
+            result.frombytes(memoryview(values).cast('B'))
+        except TypeError:
+            result.extend(values)
+        return result
+
+    def __build_index(self):
+        """Builds the per-cell index: record positions sorted by cell id, and
+        for every cell id the offset of its first position.
+        """
+        size = 1 + max((max(chunk.cells) for chunk in self.chunks if chunk),
+                       default=-1)
+        offsets = array(self.INDEX_TYPE, [0]) * (size + 1)
+        for chunk in self.chunks:
+            for cell in chunk.cells:
+                offsets[cell + 1] += 1
+        for cell in range(size):
+            offsets[cell + 1] += offsets[cell]
+        fill = array(self.INDEX_TYPE, offsets)
+        index = array(self.INDEX_TYPE, [0]) * self.count
+        pos = 0
+        for chunk in self.chunks:
+            for cell in chunk.cells:
+                index[fill[cell]] = pos
+                fill[cell] += 1
+                pos += 1
+        starts = []
+        pos = 0
+        for chunk in self.chunks:
+            starts.append(pos)
+            pos += len(chunk)
+        self.__starts = starts
+        self.__offsets = offsets
+        self.__index = index
+
+    def __cell_range(self, cell):
+        """:return: (start, end) of the cell's positions in the index"""
+        if self.__index is None:
+            self.__build_index()
+        if cell + 1 >= len(self.__offsets):
+            return 0, 0
+        return self.__offsets[cell], self.__offsets[cell + 1]
+
+    def cell_transitions(self, cell):
+        """:return: (generations, states) typed arrays of one cell's
+          transitions, in the order they were recorded
+        """
+        start, end = self.__cell_range(cell)
+        chunks = self.chunks
+        starts = self.__starts
+        generations = array(self.GENERATION_TYPE)
+        states = array(self.STATE_TYPE)
+        for pos in self.__index[start:end]:
+            i = bisect_right(starts, pos) - 1
+            chunk = chunks[i]
+            pos -= starts[i]
+            generations.append(chunk.generations[pos])
+            states.append(chunk.states[pos])
+        return generations, states
+
+    def cell_history(self, cell):
+        """:return: the (generation, state) transitions of one cell, in the
+          order they were recorded
+        """
+        return list(zip(*self.cell_transitions(cell)))
+
+    def get_transition_count(self, cell=None):
+        """:param cell: if given, count only this cell's transitions
+        :return: the number of transitions recorded
+        """
+        if cell is None:
+            return self.count
+        start, end = self.__cell_range(cell)
+        return end - start
+
+    def flush(self):
+        """Makes sure every transition recorded so far has been stored. The
+        in-memory log has nothing to do.
+        """
+        pass
+
+    def close(self):
+        """Called once the simulation has finished recording."""
+        self.flush()
+
+    def tell(self):
+        """:return: the size of the file backing the log, or -1 as this log
+          is held in memory
+        """
+        return -1
+
+    def __repr__(self):
+        return "{}[transitions={}, chunks={}]".format(self.__class__.__name__,
+                                                      self.count,
+                                                      len(self.chunks))
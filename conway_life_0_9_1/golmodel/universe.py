@@ -16,33 +16,45 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 import random
+from array import array
+from itertools import compress
 
 from golmodel.lifeform import LifeForm
+from golmodel.packing import ALIVE_FLAGS, pack_flags, unpack_flags
+from golmodel.transitionlog import TransitionLog
 
 
 class Universe(object):
     """A 'Universe' is an iterable, 2D grid of LifeForm objects. When iterating
     over the universe, lifeforms are yielded in row-major form (so every
     LifeForm in row 0 is returned, followed by every LifeForm in row 1, etc).
+
+    The state of every LifeForm is held in two byte arrays owned by the
+    universe (one byte per cell for the current state, one for the next), and
+    LifeForms are flyweight views onto them which are created on demand.
     """
 
-    def __init__(self, rows=10, cols=10):
+    def __init__(self, rows=10, cols=10, log=None):
+        """:param log: the TransitionLog to record transitions in (a new one
+          is created if not given)
+        """
         self.rows = rows
         self.cols = cols
         self.lifeform_count = rows * cols
-        self.lifeforms = []         # 1D list representation of 2D grid
+        self.log = log if log is not None else TransitionLog()
+        self.random_field = None    # a RandomField to randomize from
         self.__make_universe()
 
     def __iter__(self):
-        return iter(self.lifeforms)
+        for i in range(self.lifeform_count):
+            yield LifeForm(self, i)
 
     def __make_universe(self):
-        """Instantiates all the LifeForm objects in the Universe."""
-        for i in range(self.lifeform_count):
-            # 'simulate' 2D grid with math
-            row = i // self.cols
-            col = i % self.cols
-            self.lifeforms.append(LifeForm(i, row, col))
+        """Allocates the state arrays for all the LifeForms in the Universe.
+        The arrays are 1D and 'simulate' the 2D grid with math.
+        """
+        self.states = array('b', [LifeForm.STATE_NONE]) * self.lifeform_count
+        self.next_states = array('b', self.states)
 
     def randomize(self, thresh=0.4, do_kills=True):
         """Randomly kill or birth life forms in the universe.
@@ -52,7 +64,20 @@ class Universe(object):
         :param do_kills: if True, LifeForms that we randomly selected for death
           will be killed, otherwise they are left alone (used to randomly
           rebirth a portion of the population rather than a complete reset)
+
+        When random_field is set, the whole layout is drawn from it at once
+        instead of from the random module.
         """
+        if self.random_field is not None:
+            born = self.random_field.next_flags(thresh, self.lifeform_count)
+            if do_kills:
+                self.__replace(array('b', born))
+            else:
+                states = array('b', self.states)
+                for i in compress(range(self.lifeform_count), born):
+                    states[i] = LifeForm.STATE_ALIVE
+                self.__replace(states)
+            return
         for lf in self:
             if random.random() > thresh:
                 if do_kills:
@@ -61,6 +86,30 @@ class Universe(object):
                 lf.birth(0)
             lf.commit()
 
+    def load_runs(self, runs):
+        """Replaces the layout with the given runs of cells, every other cell
+        being dead, and records the cells which change as randomize() does.
+
+        :param runs: (row, col, length, state) of every run of cells which are
+          not dead, such as golmodel.pattern.PatternReader.runs() yields
+        """
+        states = array('b', [LifeForm.STATE_DEAD]) * self.lifeform_count
+        cols = self.cols
+        for row, col, length, state in runs:
+            start = (row * cols) + col
+            states[start:start + length] = array('b', [state]) * length
+        self.__replace(states)
+
+    def __replace(self, states):
+        """Makes states the current layout, recording the cells which change
+        as generation 0 transitions.
+        """
+        changed = [i for i, (old, new) in enumerate(zip(self.states, states))
+                   if old != new]
+        self.log.extend(0, changed, [states[i] for i in changed])
+        self.states[:] = states
+        self.next_states[:] = states
+
     def get_life_form(self, row, col):
         """Gets the LifeForm at the given position in the grid.
 
@@ -68,8 +117,7 @@ class Universe(object):
         :param col: desired LifeForm's column
         :return: the LifeForm at row x column
         """
-        index = (row * self.cols) + col
-        return self.lifeforms[index]
+        return LifeForm(self, (row * self.cols) + col)
 
     def get_neighbour_count(self, lf):
         """Gets the living neighbour count for the box surrounding the given
@@ -78,33 +126,60 @@ class Universe(object):
         :param lf: the LifeForm whose neighbour count is desired
         """
         cnt = 0
-        if lf.row > 0:
-            cnt += self.__get_neighbour_count_for_row(lf.row - 1, lf.col)
-        cnt += self.__get_neighbour_count_for_row(lf.row, lf.col, True)
-        if lf.row < self.rows - 1:
-            cnt += self.__get_neighbour_count_for_row(lf.row + 1, lf.col)
+        row = lf.lfid // self.cols
+        col = lf.lfid - (row * self.cols)
+        if row > 0:
+            cnt += self.__get_neighbour_count_for_row(lf.lfid - self.cols, col)
+        cnt += self.__get_neighbour_count_for_row(lf.lfid, col, True)
+        if row < self.rows - 1:
+            cnt += self.__get_neighbour_count_for_row(lf.lfid + self.cols, col)
         return cnt
 
-    def __get_neighbour_count_for_row(self, row, col, is_home=False):
-        """Gets the neighbour count for the given row and surrounding columns.
-        If is_home is true, then the center column is not considered.
+    def __get_neighbour_count_for_row(self, index, col, is_home=False):
+        """Gets the neighbour count for the given cell and the cells either
+        side of it. If is_home is true, then the center cell is not considered.
 
-        :param row: the desired row of analysis
-        :param col: the desired column of analysis
-        :param is_home: if True, the column is not counted as a neighbour
+        :param index: index of the cell at the center of the analysis
+        :param col: column of that cell
+        :param is_home: if True, the center cell is not counted as a neighbour
         :return: neighbour count for the given row and column
         """
+        states = self.states
+        alive = LifeForm.STATE_ALIVE
         cnt = 0
-        if col > 0:
-            if self.get_life_form(row, col - 1).is_alive():
-                cnt += 1
-        if (is_home is False) and self.get_life_form(row, col).is_alive():
+        if col > 0 and states[index - 1] == alive:
+            cnt += 1
+        if (is_home is False) and states[index] == alive:
+            cnt += 1
+        if col < self.cols - 1 and states[index + 1] == alive:
             cnt += 1
-        if col < self.cols - 1:
-            if self.get_life_form(row, col + 1).is_alive():
-                cnt += 1
         return cnt
 
+    def commit(self):
+        """Commits every LifeForm at once by copying the next states over the
+        current ones.
+        """
+        self.states[:] = self.next_states
+
+    def get_alive_flags(self):
+        """:return: one byte per LifeForm in row-major order, 1 if alive and 0
+          otherwise
+        """
+        return self.states.tobytes().translate(ALIVE_FLAGS)
+
+    def pack_cells(self):
+        """:return: the state of every LifeForm packed one bit per cell"""
+        return pack_flags(self.get_alive_flags())
+
+    def unpack_cells(self, data):
+        """Restores the state of every LifeForm from pack_cells() output
+        without recording any transitions.
+
+        :param data: bytes returned by pack_cells()
+        """
+        self.states = array('b', unpack_flags(data, self.lifeform_count))
+        self.next_states = array('b', self.states)
+
     def get_transition_count(self):
         """Gets the total count of life/death transitions that have occurred
           during the lifetime of the universe.
@@ -112,12 +187,10 @@ class Universe(object):
         :return: the total number of life/death transitions that have occurred
           so far in the simulation
         """
-        total = 0
         for lf in self:
-            print("%d: %d %s" % (lf.lfid, len(lf.transitions),
+            print("%d: %d %s" % (lf.lfid, lf.get_transition_count(),
                                  lf.transitions_to_string()))
-            total += lf.get_transition_count()
-        return total
+        return len(self.log)
 
     def __repr__(self):
         selfname = self.__class__.__name__
@@ -0,0 +1,57 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+from golmodel.bakefile import Bake
+
+from .golrenderer import GOLRenderer
+
+
+class BakeRenderer(GOLRenderer):
+    """Renders the whole simulation to a bake file once it has finished, so
+    that it can be run headless and keyframed in Blender later with
+    BlenderRenderer.from_bake().
+    """
+
+    def __init__(self, path, engine, generations, seed):
+        """:param path: the bake file to write
+        :param engine: name of the engine in use
+        :param generations: number of generations the run is configured for
+        :param seed: the RandomSeed setting, as a string
+        """
+        print("BAKE RENDERER")
+        self.path = path
+        self.engine = engine
+        self.generations = generations
+        self.seed = seed
+        self.universe = None
+
+    def render(self, universe):
+        """The transition log holds everything needed, so nothing is written
+        until close().
+
+        :param universe: the Conway universe object
+        """
+        self.universe = universe
+
+    def close(self):
+        """Writes the bake file."""
+        if self.universe is None:
+            return
+        bake = Bake.from_log(self.engine, self.universe, self.generations,
+                             self.seed)
+        bake.write(self.path)
+        print("baked %d transitions to %s" % (len(bake.states), self.path))
@@ -22,6 +22,15 @@ import random
 class BlenderLifeForm(object):
     """Wraps a standard golmodel.lifeform.LifeForm in a class that knows how to
     visually represent a LifeForm in Blender.
+
+    With [MeshSetup] SharedData enabled, every LifeForm's light plane uses one
+    shared mesh and one shared material, and its cell links the OriginalCell
+    mesh rather than copying it. Origins are computed rather than set with
+    operators, so construction makes no bpy.ops calls and triggers no scene
+    updates; the objects are left for BlenderRenderer to link in one batch.
+    The shared material reads the light's brightness from the object's
+    pass_index (1 alive, 0 dead) through an Object Info node, and pass_index
+    is what gets keyframed.
     """
 
     # Blender requires a 20-element tuple of booleans to describe which layer
@@ -31,6 +40,14 @@ class BlenderLifeForm(object):
     LIGHT_PRE = "LightPlane_"
     CELL_PRE = "Cell_"
     LIGHT_MAT_SUFF = "_PlaneMat"
+    SHARED_LIGHT_MESH = "GOLLightPlane"
+    SHARED_LIGHT_MAT = "GOLLightPlaneMat"
+    ALIVE_INDEX = 1
+    DEAD_INDEX = 0
+
+    shared = False
+    shared_light_mesh = None
+    shared_light_mat = None
 
     def __init__(self, lf):
         """:param lf: the LifeForm to wrap"""
@@ -47,8 +64,12 @@ class BlenderLifeForm(object):
         self.plane_mat = None
         self.cell_obj = None
 
-        self.__realize_plane()
-        self.__realize_cell()
+        if self.shared:
+            self.__realize_shared_plane()
+            self.__realize_shared_cell()
+        else:
+            self.__realize_plane()
+            self.__realize_cell()
         self.__update()
 
     @classmethod
@@ -78,6 +99,77 @@ class BlenderLifeForm(object):
 
         cls.lightsZPlane = cfg.getfloat('MeshSetup', 'LightsZPlane')
         cls.cellsZPlane = cfg.getfloat('MeshSetup', 'CellsZPlane')
+        cls.shared = cfg.getboolean('MeshSetup', 'SharedData', fallback=False)
+
+    @classmethod
+    def create_shared_data(cls):
+        """Creates the light plane mesh and material shared by every LifeForm
+        when SharedData is enabled. The mesh is centred on its origin. The
+        material's emission strength is
+        deadStrength + pass_index * (aliveStrength - deadStrength).
+        """
+        half = cls.cellCageLightSz / 2.0
+        verts = [(-half, -half, 0.0), (-half, half, 0.0), (half, half, 0.0),
+                 (half, -half, 0.0)]
+        cls.shared_light_mesh = bpy.data.meshes.new(cls.SHARED_LIGHT_MESH)
+        cls.shared_light_mesh.from_pydata(verts, [], [(0, 1, 2, 3)])
+        cls.shared_light_mesh.update(calc_edges=True)
+
+        mat = bpy.data.materials.new(cls.SHARED_LIGHT_MAT)
+        mat.use_nodes = True
+        nodes = mat.node_tree.nodes
+        links = mat.node_tree.links
+        output = nodes.get("Material Output") or \
+            nodes.new("ShaderNodeOutputMaterial")
+        info = nodes.new("ShaderNodeObjectInfo")
+        scale = nodes.new("ShaderNodeMath")
+        scale.operation = 'MULTIPLY'
+        scale.inputs[1].default_value = cls.aliveStrength - cls.deadStrength
+        offset = nodes.new("ShaderNodeMath")
+        offset.operation = 'ADD'
+        offset.inputs[1].default_value = cls.deadStrength
+        emission = nodes.new("ShaderNodeEmission")
+        emission.inputs['Color'].default_value = (1.0, 1.0, 1.0, 1.0)
+        links.new(info.outputs["Object Index"], scale.inputs[0])
+        links.new(scale.outputs["Value"], offset.inputs[0])
+        links.new(offset.outputs["Value"], emission.inputs["Strength"])
+        links.new(emission.outputs["Emission"], output.inputs["Surface"])
+        cls.shared_light_mat = mat
+        cls.shared_light_mesh.materials.append(mat)
+
+    def __realize_shared_plane(self):
+        """Creates the LifeForm's light plane as an instance of the shared
+        mesh, placed where __realize_plane() would put its origin.
+        """
+        half = self.cellCageLightSz / 2.0
+        x = (self.lf.col * self.cellCageSz) + self.cellCagePad + half
+        y = (self.lf.row * self.cellCageSz) + self.cellCagePad + half
+        self.light_obj = bpy.data.objects.new(self.light_obj_name,
+                                              self.shared_light_mesh)
+        self.light_obj.location = (x, y, self.lightsZPlane)
+        self.light_obj.cycles_visibility.camera = False
+        self.light_mesh = self.shared_light_mesh
+        self.plane_mat = self.shared_light_mat
+
+    def __realize_shared_cell(self):
+        """Creates the LifeForm's cell as a linked duplicate of the
+        OriginalCell, without selecting anything.
+        """
+        x = self.lf.col * self.cellCageSz
+        y = self.lf.row * self.cellCageSz
+        loc = (x + self.cellXInCage, y + self.cellYInCage, self.cellsZPlane)
+        rot = (random.randrange(0, 359), random.randrange(0, 359),
+               random.randrange(0, 359))
+        original = bpy.data.objects['OriginalCell']
+        self.cell_obj = bpy.data.objects.new(self.cell_obj_name, original.data)
+        self.cell_obj.scale = original.scale
+        self.cell_obj.location = loc
+        self.cell_obj.delta_rotation_euler = rot
+        self.cell_obj.layers = self.cell_layers
+
+    def objects(self):
+        """:return: the Blender objects which represent the LifeForm"""
+        return self.light_obj, self.cell_obj
 
     def __realize_plane(self):
         """Creates a new plane object, positioned above the LifeForm which is
@@ -176,21 +268,26 @@ class BlenderLifeForm(object):
 
     def __set_alive(self):
         """Sets values which visually indicate the LifeForm has been birthed."""
-        self.__set_strength(self.aliveStrength)
+        self.__set_strength(self.aliveStrength, self.ALIVE_INDEX)
         self.light_obj.scale = self.aliveSizeVector
 
     def __set_dead(self):
         """Sets values which visually indicate the LifeForm has died."""
-        self.__set_strength(self.deadStrength)
+        self.__set_strength(self.deadStrength, self.DEAD_INDEX)
         self.light_obj.scale = self.deadSizeVector
 
-    def __set_strength(self, strength):
+    def __set_strength(self, strength, index):
         """Logically encapsulates the notion of setting a light strength.
 
         :param strength: a normalized floating point value indicating the
           strength of the light
+        :param index: the pass_index which gives that strength through the
+          shared material
         """
-        self.emission_node.inputs['Strength'].default_value = strength
+        if self.shared:
+            self.light_obj.pass_index = index
+        else:
+            self.emission_node.inputs['Strength'].default_value = strength
 
     def update_to_state(self, state):
         """Visually updates the LifeForm to be either alive or dead.
@@ -219,9 +316,75 @@ class BlenderLifeForm(object):
 
         :param curr_frame: the frame at which to set the keyframes
         """
-        self.emission_node.inputs['Strength'].\
-            keyframe_insert(data_path="default_value", frame=curr_frame)
+        if self.shared:
+            self.light_obj.keyframe_insert('pass_index', frame=curr_frame)
+        else:
+            self.emission_node.inputs['Strength'].\
+                keyframe_insert(data_path="default_value", frame=curr_frame)
         self.light_obj.keyframe_insert('scale', frame=curr_frame)
 
+    def set_keyframes(self, frames, states):
+        """Lays down every keyframe of the LifeForm at once, with the same
+        values as calling update_to_state() and set_keys() for each frame in
+        turn. The F-curves are created directly and their points written in
+        bulk with keyframe_points.add() and foreach_set(), rather than by one
+        keyframe_insert() call per key. Any keys already on the F-curves are
+        replaced.
+
+        :param frames: frame numbers in increasing order
+        :param states: the state at each frame
+        :return: the number of keyframe points written
+        """
+        alive = self.lf.STATE_ALIVE
+        sizes = [self.aliveSize if state == alive else self.deadSize
+                 for state in states]
+        self.__write_fcurves(self.light_obj, 'scale', 3, frames, sizes,
+                             "%sAction" % self.light_obj_name)
+        if self.shared:
+            indices = [self.ALIVE_INDEX if state == alive
+                       else self.DEAD_INDEX for state in states]
+            self.__write_fcurves(self.light_obj, 'pass_index', 1, frames,
+                                 indices, "%sAction" % self.light_obj_name)
+        else:
+            strengths = [self.aliveStrength if state == alive
+                         else self.deadStrength for state in states]
+            path = self.emission_node.inputs['Strength'].path_from_id(
+                'default_value')
+            self.__write_fcurves(self.plane_mat.node_tree, path, 1, frames,
+                                 strengths, "%sAction" % self.plane_mat.name)
+        self.update_to_state(states[-1])
+        return 4 * len(frames)
+
+    @staticmethod
+    def __write_fcurves(owner, data_path, length, frames, values, name):
+        """Replaces the F-curves which animate a property with ones holding
+        the given keys.
+
+        :param owner: the ID block which owns the property
+        :param data_path: path to the property from owner
+        :param length: number of array elements of the property, each of
+          which gets its own F-curve with the same keys
+        :param frames: the key frames
+        :param values: the key values
+        :param name: name for the action, if one has to be created
+        """
+        if owner.animation_data is None:
+            owner.animation_data_create()
+        action = owner.animation_data.action
+        if action is None:
+            action = bpy.data.actions.new(name)
+            owner.animation_data.action = action
+        co = [0.0] * (2 * len(frames))
+        co[0::2] = frames
+        co[1::2] = values
+        for index in range(length):
+            fcurve = action.fcurves.find(data_path, index=index)
+            if fcurve is not None:
+                action.fcurves.remove(fcurve)
+            fcurve = action.fcurves.new(data_path, index=index)
+            fcurve.keyframe_points.add(len(frames))
+            fcurve.keyframe_points.foreach_set('co', co)
+            fcurve.update()
+
     def __repr__(self):
         return "{}[{}]".format(self.__class__.__name__, self.lf)
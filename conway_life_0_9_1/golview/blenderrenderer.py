@@ -15,10 +15,14 @@
 #  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 #
 # ##### END GPL LICENSE BLOCK #####
+import bpy
 import configparser
 import os
 import sys
 
+from golmodel.bakefile import Bake
+from golmodel.universe import Universe
+
 from .blenderlifeform import BlenderLifeForm
 from .golrenderer import GOLRenderer
 
@@ -37,6 +41,7 @@ class BlenderRenderer(GOLRenderer):
 
         self.universe = universe
         self.curr_frame = self.cfg.getint('Time', 'StartFrame')
+        self.keyframe_count = 0
 
         self.__setup()
 
@@ -53,8 +58,21 @@ class BlenderRenderer(GOLRenderer):
         self.blender_life_forms = []
         BlenderRenderer.set_origin_geometry_for_original()
         BlenderLifeForm.set_config_values(self.cfg)
+        if BlenderLifeForm.shared:
+            BlenderLifeForm.create_shared_data()
         for lf in self.universe:
             self.blender_life_forms.append(BlenderLifeForm(lf))
+        if BlenderLifeForm.shared:
+            self.link_objects()
+
+    def link_objects(self):
+        """Links every life form's objects into the scene in one pass, once
+        they have all been built.
+        """
+        link = bpy.context.scene.objects.link
+        for blf in self.blender_life_forms:
+            for obj in blf.objects():
+                link(obj)
 
     @staticmethod
     def set_origin_geometry_for_original():
@@ -67,19 +85,91 @@ class BlenderRenderer(GOLRenderer):
         bpy.ops.object.select_all(action='DESELECT')
 
     def render(self, universe):
-        """Performs a render of the simulation that sets all the keyframes to
-        make a beautiful Conway animation.
+        """The transition log holds the whole history of the simulation, so
+        the keyframes are laid down from it once, by close(), when the
+        simulation has finished; rendering it every generation would rewrite
+        every earlier keyframe each time.
 
         :param universe: the Conway universe object
         """
+        self.universe = universe
+
+    def close(self):
+        """Sets all the keyframes to make a beautiful Conway animation."""
         self.depth_first_render()
 
+    @classmethod
+    def from_bake(cls, path):
+        """Builds the scene for a bake file and keyframes it, without running
+        the simulation. Bakes are written headless by golbake.py or the bake
+        renderer.
+
+        :param path: the bake file to import
+        :return: the renderer
+        """
+        bake = Bake.read(path)
+        print("importing %s" % bake)
+        renderer = cls(Universe(bake.rows, bake.cols))
+        renderer.render_bake(bake)
+        return renderer
+
+    def render_bake(self, bake):
+        """Keyframes every life form from a bake's transitions.
+
+        :param bake: a golmodel.bakefile.Bake the size of the universe
+        """
+        if bake.rows != self.universe.rows or bake.cols != self.universe.cols:
+            raise Exception("bake is %dx%d but the universe is %dx%d" %
+                            (bake.rows, bake.cols, self.universe.rows,
+                             self.universe.cols))
+        self.render_histories(bake.cell_history(blf.lf.lfid)
+                              for blf in self.blender_life_forms)
+
     def depth_first_render(self):
-        """Depth-first render which only lays down keyframes which a life form's
-        state transitions.
+        """Depth-first render which only lays down keyframes where a life
+        form's state transitions. Each life form's transitions are fetched
+        from the universe's transition log through its per-cell index, as
+        typed arrays, one life form at a time, so only one life form's
+        history is held at once.
         """
-        for blf in self.blender_life_forms:
-            BlenderRenderer.df_render_life_form(blf)
+        log = self.universe.log
+        self.render_histories(log.cell_transitions(blf.lf.lfid)
+                              for blf in self.blender_life_forms)
+
+    def render_histories(self, histories):
+        """Writes the keyframes of every life form in bulk with
+        BlenderLifeForm.set_keyframes().
+
+        :param histories: a (generations, states) pair of transitions for
+          each life form, in order
+        """
+        self.keyframe_count = 0
+        for blf, (gens, states) in zip(self.blender_life_forms, histories):
+            if len(gens) < 1:
+                sys.exit("INVALID: lifeform %s has no transitions" % blf)
+            frames, key_states = self.hold_keys(gens, states)
+            self.keyframe_count += blf.set_keyframes(frames, key_states)
+
+    @staticmethod
+    def hold_keys(generations, states):
+        """Works out the keyframes of one life form, which are the same as
+        df_render_life_form() lays down: one at every transition, and one on
+        the frame before holding the previous state, unless that frame is
+        already keyed.
+
+        :param generations: the generations of the life form's transitions
+        :param states: the state of each transition
+        :return: (frames, states) of the keyframes
+        """
+        frames = []
+        key_states = []
+        for generation, state in zip(generations, states):
+            if frames and frames[-1] != generation - 1:
+                frames.append(generation - 1)
+                key_states.append(key_states[-1])
+            frames.append(generation)
+            key_states.append(state)
+        return frames, key_states
 
     @staticmethod
     def df_render_life_form(blf):
@@ -88,19 +178,16 @@ class BlenderRenderer(GOLRenderer):
 
         :param blf: the BlenderLifeForm to render
         """
-        if len(blf.lifeform.transitions) < 1:
+        transitions = blf.lf.transitions    # one lookup in the TransitionLog
+        if len(transitions) < 1:
             sys.exit("INVALID: lifeform %s has no transitions" % blf)
-        tr = blf.lifeform.transitions[0]
+        tr = transitions[0]
         curr_gen = tr[0]
         curr_state = tr[1]
         blf.update_to_state(curr_state)
         blf.set_keys(curr_gen)
-        first = True
 
-        for tr in blf.lifeform.transitions:
-            if first:
-                first = False
-                continue
+        for tr in transitions[1:]:
             curr_gen = tr[0]
             curr_state = tr[1]
             blf.set_keys(curr_gen - 1)
@@ -15,36 +15,121 @@
 #  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 #
 # ##### END GPL LICENSE BLOCK #####
+import sys
 
 from .golrenderer import GOLRenderer
 
 
 class ConsoleRenderer(GOLRenderer):
-    """Renders the simulation to stdout"""
+    """Renders the simulation to stdout.
+
+    In "plain" mode every generation prints the whole board. In "ansi" mode
+    the board is drawn once and each later frame only moves the cursor to
+    the cells whose state changed since the previous frame, using ANSI
+    escape codes, so large boards can be watched without flicker or
+    scrolling. Each ansi frame, status lines included, is sent to the
+    terminal in a single write.
+    """
 
     FRAME_DELAY = 0.0417  # for 24fps
     ALIVE_CHAR = "*"
     DEAD_CHAR = " "
+    MODES = ("plain", "ansi")
+
+    CLEAR_SCREEN = "\x1b[2J"
+    CLEAR_LINE = "\x1b[K"
+    CLEAR_BELOW = "\x1b[J"
+    HIDE_CURSOR = "\x1b[?25l"
+    SHOW_CURSOR = "\x1b[?25h"
+    MOVE_CURSOR = "\x1b[%d;%dH"
 
-    def __init__(self):
+    def __init__(self, mode="plain"):
+        """:param mode: "plain" or "ansi" """
         print("CONSOLE RENDERER")
+        if mode not in self.MODES:
+            raise Exception("unsupported console mode '%r'" % mode)
+        self.mode = mode
+        self.chars = bytes.maketrans(
+            b"\x00\x01", (self.DEAD_CHAR + self.ALIVE_CHAR).encode())
+        self.cells = (self.DEAD_CHAR + " ", self.ALIVE_CHAR + " ")
+        self.previous = None
+        self.status_lines = []
 
     def render(self, universe):
         """Renders the simulation to the console.
 
         :param universe: the Conway universe object
         """
-        for x in range(0, universe.rows):
-            row = ""
-            for y in range(0, universe.cols):
-                lf = universe.get_life_form(x, y)
-                if lf.state == lf.STATE_ALIVE:
-                    row += self.ALIVE_CHAR
-                elif lf.state == lf.STATE_DEAD:
-                    row += self.DEAD_CHAR
-                row += " "
+        if self.mode == "ansi":
+            self.__render_changes(universe)
+            return
+        for row in self.__rows(universe, universe.get_alive_flags()):
             print(row)
-    
+
+    def __rows(self, universe, flags):
+        """:return: the text of every row of the board, each cell followed by
+          a space
+        """
+        chars = flags.translate(self.chars).decode()
+        cols = universe.cols
+        return [" ".join(chars[start:start + cols]) + " "
+                for start in range(0, universe.rows * cols, cols)]
+
+    def __render_changes(self, universe):
+        """Draws the whole board on the first frame, and afterwards only the
+        cells which differ from the previous frame. Runs of changed cells
+        along a row are written after a single cursor move.
+        """
+        flags = universe.get_alive_flags()
+        previous = self.previous
+        parts = []
+        if previous is None or len(previous) != len(flags):
+            parts.append(self.HIDE_CURSOR + self.CLEAR_SCREEN)
+            for x, row in enumerate(self.__rows(universe, flags)):
+                parts.append(self.MOVE_CURSOR % (x + 1, 1))
+                parts.append(row)
+        else:
+            cols = universe.cols
+            cells = self.cells
+            changed = (int.from_bytes(previous, 'little') ^
+                       int.from_bytes(flags, 'little')).to_bytes(
+                len(flags), 'little')
+            last = -2
+            pos = changed.find(1)
+            while pos >= 0:
+                col = pos % cols
+                if pos != last + 1 or col == 0:
+                    parts.append(self.MOVE_CURSOR %
+                                 (pos // cols + 1, (2 * col) + 1))
+                parts.append(cells[flags[pos]])
+                last = pos
+                pos = changed.find(1, pos + 1)
+        self.previous = flags
+
+        parts.append(self.MOVE_CURSOR % (universe.rows + 1, 1))
+        for line in self.status_lines:
+            parts.append(line + self.CLEAR_LINE + "\n")
+        parts.append(self.CLEAR_BELOW)
+        self.status_lines = []
+        sys.stdout.write("".join(parts))
+        sys.stdout.flush()
+
+    def status(self, text):
+        """In ansi mode status text is held back and drawn below the board
+        with the next frame, so it neither scrolls the board nor is drawn
+        over.
+        """
+        if self.mode == "ansi":
+            self.status_lines.extend(text.strip("\n").split("\n"))
+        else:
+            print(text)
+
+    def close(self):
+        """Gives the terminal its cursor back in ansi mode."""
+        if self.mode == "ansi" and self.previous is not None:
+            sys.stdout.write(self.SHOW_CURSOR)
+            sys.stdout.flush()
+
     def get_frame_delay(self):
         """Override the simulation delay so that it does not go by so fast that
         it cannot be observed.
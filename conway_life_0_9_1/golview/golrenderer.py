@@ -25,7 +25,19 @@ class GOLRenderer(object):
     def render(self, universe):
         """Called by the driver to render one generation of the sim"""
         raise NotImplementedError
-    
+
+    def status(self, text):
+        """Shows a line of progress information (generation, births and
+        deaths). Printed by default.
+
+        :param text: the text to show
+        """
+        print(text)
+
+    def close(self):
+        """Called by the driver once the simulation has finished."""
+        pass
+
     def get_frame_delay(self):
         """Optional simulation delay to prevent the simulation from running too
         fast to be visible.
@@ -0,0 +1,271 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import struct
+import threading
+import zlib
+
+from golmodel.packing import FLAGS_TO_DIGITS
+
+from .golrenderer import GOLRenderer
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# a PNG scanline's filter type byte (0, none) written as eight flags
+FILTER_FLAGS = bytes(8)
+
+
+def png_chunk(kind, data):
+    """:return: a PNG chunk: length, type, data and CRC"""
+    return b"".join((struct.pack(">I", len(data)), kind, data,
+                     struct.pack(">I", zlib.crc32(kind + data))))
+
+
+def interleave(planes):
+    """Interleaves equally sized byte strings, one byte of each in turn.
+
+    :param planes: the byte strings
+    :return: a bytearray holding planes[0][0], planes[1][0], ...,
+      planes[0][1], planes[1][1], ...
+    """
+    step = len(planes)
+    out = bytearray(len(planes[0]) * step)
+    for i, plane in enumerate(planes):
+        out[i::step] = plane
+    return out
+
+
+class AnimatedPng(object):
+    """Writes frames to a single animated PNG (APNG) as they arrive. The frame
+    count, which APNG wants up front, is patched in by close().
+    """
+
+    def __init__(self, path, frame_rate=24):
+        """:param path: the file to write, replaced if it exists
+        :param frame_rate: frames per second on playback
+        """
+        self.path = path
+        self.frame_rate = frame_rate
+        self.file = None
+        self.frames = 0
+        self.sequence = 0
+        self.width = 0
+        self.height = 0
+        self.__header = None
+        self.__control = 0
+
+    def write(self, header, palette, width, height, data):
+        """Appends one frame.
+
+        :param header: the IHDR chunk data, the same for every frame
+        :param palette: the PLTE chunk data, or None
+        :param width: frame width in pixels
+        :param height: frame height in pixels
+        :param data: the zlib-compressed scanlines
+        """
+        if self.file is None:
+            self.file = open(self.path, 'wb')
+            self.file.write(PNG_SIGNATURE + png_chunk(b"IHDR", header))
+            self.__header = header
+            self.width = width
+            self.height = height
+            self.__control = self.file.tell()
+            self.file.write(png_chunk(b"acTL", struct.pack(">II", 0, 0)))
+            if palette is not None:
+                self.file.write(png_chunk(b"PLTE", palette))
+        elif header != self.__header:
+            raise Exception("every frame of an animation must be the same size")
+        self.file.write(png_chunk(b"fcTL", struct.pack(
+            ">IIIIIHHBB", self.sequence, width, height, 0, 0, 1,
+            self.frame_rate, 0, 0)))
+        self.sequence += 1
+        if self.frames == 0:
+            self.file.write(png_chunk(b"IDAT", data))
+        else:
+            self.file.write(png_chunk(b"fdAT", struct.pack(
+                ">I", self.sequence) + data))
+            self.sequence += 1
+        self.frames += 1
+
+    def close(self):
+        """Ends the file and fills in the frame count."""
+        if self.file is None:
+            return
+        self.file.write(png_chunk(b"IEND", b""))
+        self.file.seek(self.__control)
+        self.file.write(png_chunk(b"acTL", struct.pack(">II", self.frames, 0)))
+        self.file.close()
+        self.file = None
+
+
+class ImageRenderer(GOLRenderer):
+    """Renders generations to image files, for previews on machines without
+    Blender or a display.
+
+    Frames are built from the universe's alive flags a whole plane at a time:
+    the flags are mapped to pixel values with bytes.translate() and scaled
+    and interleaved into channels with slice assignment, so no Python code
+    runs per pixel. PNG frames are two-colour palette images packed one bit
+    per pixel, so zlib has an eighth of the data to compress; PPM and PGM
+    frames are written raw, a byte per channel.
+
+    render() only takes a copy of the flags; encoding and writing happen on
+    a background thread, overlapping the next generation. At most one frame
+    is in flight, which keeps frames in order and memory bounded.
+    """
+
+    FORMATS = ("png", "ppm", "pgm")
+    ALIVE_COLOUR = (255, 255, 255)
+    DEAD_COLOUR = (0, 0, 0)
+    ZLIB_LEVEL = 1
+
+    def __init__(self, path="", fmt="png", scale=1, stride=1, animation="",
+                 frame_rate=24):
+        """:param path: path pattern of the frame files; %d is replaced by the
+          frame number, 0 being the initial layout. May be empty if only an
+          animation is wanted.
+        :param fmt: "png", "ppm" or "pgm"
+        :param scale: width and height in pixels of each cell
+        :param stride: only every stride-th frame is written
+        :param animation: optional path of an animated PNG to also write every
+          frame to (png format only)
+        :param frame_rate: frames per second of the animation
+        """
+        print("IMAGE RENDERER")
+        if fmt not in self.FORMATS:
+            raise Exception("unsupported image format '%r'" % fmt)
+        if scale < 1 or stride < 1:
+            raise Exception("image scale and stride must be at least 1")
+        if not path and not animation:
+            raise Exception("an image path or an animation path is needed")
+        if animation and fmt != "png":
+            raise Exception("animations can only be written in png format")
+        self.path = path
+        self.fmt = fmt
+        self.scale = scale
+        self.stride = stride
+        self.frame = 0
+        self.__thread = None
+        self.animation = AnimatedPng(animation, frame_rate) \
+            if animation else None
+
+        dead = self.DEAD_COLOUR
+        alive = self.ALIVE_COLOUR
+        if fmt == "ppm":
+            self.channels = [bytes.maketrans(b"\x00\x01", bytes((d, a)))
+                             for d, a in zip(dead, alive)]
+        elif fmt == "pgm":
+            self.channels = [bytes.maketrans(
+                b"\x00\x01", bytes((sum(dead) // 3, sum(alive) // 3)))]
+        else:
+            # palette indices are the flags themselves, packed in png_data()
+            self.channels = [None]
+        self.palette = bytes(dead + alive)
+
+    def render(self, universe):
+        """Starts writing the frame if it falls on the stride.
+
+        :param universe: the Conway universe object
+        """
+        frame = self.frame
+        self.frame += 1
+        if frame % self.stride != 0:
+            return
+        flags = universe.get_alive_flags()
+        self.wait()
+        self.__thread = threading.Thread(
+            target=self.write_frame,
+            args=(frame, flags, universe.rows, universe.cols))
+        self.__thread.start()
+
+    def wait(self):
+        """Blocks until the frame being written (if any) is on disk."""
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def write_frame(self, frame, flags, rows, cols):
+        """Encodes and writes one frame.
+
+        :param frame: the frame number
+        :param flags: the universe's get_alive_flags()
+        :param rows: rows in the universe
+        :param cols: columns in the universe
+        """
+        width = cols * self.scale
+        height = rows * self.scale
+        rows = self.scanlines(flags, cols)
+        if self.fmt == "png":
+            header = struct.pack(">IIBBBBB", width, height, 1, 3, 0, 0, 0)
+            data = zlib.compress(self.png_data(rows), self.ZLIB_LEVEL)
+            if self.path:
+                with open(self.path % frame, 'wb') as f:
+                    f.write(b"".join((PNG_SIGNATURE,
+                                      png_chunk(b"IHDR", header),
+                                      png_chunk(b"PLTE", self.palette),
+                                      png_chunk(b"IDAT", data),
+                                      png_chunk(b"IEND", b""))))
+            if self.animation is not None:
+                self.animation.write(header, self.palette, width, height,
+                                     data)
+        else:
+            magic = b"P6" if self.fmt == "ppm" else b"P5"
+            with open(self.path % frame, 'wb') as f:
+                f.write(b"%s\n%d %d\n255\n" % (magic, width, height))
+                f.write(b"".join(rows))
+
+    def scanlines(self, flags, cols):
+        """:param flags: the universe's get_alive_flags()
+        :param cols: columns in the universe
+        :return: the pixel rows, scaled
+        """
+        planes = [flags if table is None else flags.translate(table)
+                  for table in self.channels]
+        scale = self.scale
+        if scale > 1 or len(planes) > 1:
+            pixels = interleave(planes * scale)
+        else:
+            pixels = planes[0]
+        line = cols * scale * len(planes)
+        rows = []
+        for start in range(0, len(pixels), line):
+            rows.extend([pixels[start:start + line]] * scale)
+        return rows
+
+    @staticmethod
+    def png_data(rows):
+        """Packs rows of flags into PNG scanlines of one bit per pixel, most
+        significant bit first, each preceded by its filter type byte. Every
+        row is padded to a whole byte and given eight zero flags for the
+        filter byte, and the lot is packed at once by int() parsing it as a
+        string of binary digits.
+
+        :param rows: the flag rows from scanlines()
+        :return: the uncompressed image data
+        """
+        pad = bytes(-len(rows[0]) % 8)
+        flags = FILTER_FLAGS + (pad + FILTER_FLAGS).join(rows) + pad
+        digits = flags.translate(FLAGS_TO_DIGITS)
+        return int(digits, 2).to_bytes(len(flags) // 8, 'big')
+
+    def close(self):
+        """Waits for the last frame and finishes the animation, if one is being
+        written.
+        """
+        self.wait()
+        if self.animation is not None:
+            self.animation.close()
@@ -0,0 +1,351 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+"""Live streaming of frames to other processes. The stream is MAGIC followed
+by messages, each a HEADER (kind, frame number, payload length) and a
+payload:
+
+  KEYFRAME  rows, cols (2 x uint32), then the runs of living cells
+  DELTA     the runs of cells which changed since the previous frame
+  END       nothing; the run has finished
+
+Runs are pairs of unsigned LEB128 varints, (gap, length): the number of cells
+between the end of the previous run (or the first cell) and the run, then
+the number of cells in it, counting cells in row-major order. Integers are
+little endian.
+"""
+import asyncio
+import collections
+import os
+import re
+import struct
+import threading
+
+from golcontrol.pipeline import Frame
+
+from .golrenderer import GOLRenderer
+
+MAGIC = b'GOLSTRM1'
+HEADER = struct.Struct('<BII')
+SIZE = struct.Struct('<II')
+KEYFRAME = 0
+DELTA = 1
+END = 2
+
+RUNS = re.compile(b'\x01+')
+TOGGLE = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
+def parse_address(address):
+    """:param address: "unix:<path>" or "tcp:<host>:<port>"
+    :return: ("unix", path) or ("tcp", host, port)
+    """
+    kind, _, rest = address.partition(':')
+    if kind == "unix" and rest:
+        return kind, rest
+    if kind == "tcp":
+        host, _, port = rest.rpartition(':')
+        if port.isdigit():
+            return kind, host or "127.0.0.1", int(port)
+    raise Exception("unsupported stream address '%s'" % address)
+
+
+def encode_runs(flags, out):
+    """Appends the runs of 1 flags as (gap, length) varint pairs.
+
+    :param flags: bytes of 0/1 flags, one per cell
+    :param out: the bytearray to append to
+    """
+    end = 0
+    for match in RUNS.finditer(flags):
+        start = match.start()
+        for value in (start - end, match.end() - start):
+            while value > 0x7F:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        end = match.end()
+
+
+def decode_runs(data, pos=0):
+    """Yields the (start, length) of every run written by encode_runs().
+
+    :param data: the encoded runs
+    :param pos: offset of the first run in data
+    """
+    end = 0
+    size = len(data)
+    values = []
+    while pos < size:
+        value = 0
+        shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        values.append(value)
+        if len(values) == 2:
+            start = end + values[0]
+            end = start + values[1]
+            values = []
+            yield start, end - start
+
+
+class StreamRenderer(GOLRenderer):
+    """Streams every frame over a Unix or TCP socket to any number of local
+    subscribers, as a keyframe every keyframe_interval frames and a delta of
+    the cells which changed otherwise (see golwatch.py for a subscriber).
+
+    The sockets are served by an asyncio event loop on a thread of its own.
+    render() only encodes the frame and hands it to the loop, so the
+    simulation never waits for a subscriber. Each subscriber has its own
+    queue; one which falls more than backlog messages behind has its queue
+    replaced by the latest keyframe and the deltas since, which is also
+    what a new subscriber starts from.
+    """
+
+    CLOSE_TIMEOUT = 1.0     # seconds allowed to send the last frames
+
+    def __init__(self, address="unix:golstream.sock", keyframe_interval=30,
+                 backlog=8):
+        """:param address: "unix:<path>" or "tcp:<host>:<port>" to listen on
+        :param keyframe_interval: frames between keyframes
+        :param backlog: messages a subscriber may fall behind by before it
+          skips to the latest keyframe
+        """
+        print("STREAM RENDERER")
+        self.address = address
+        self.__address = parse_address(address)
+        self.keyframe_interval = max(keyframe_interval, 1)
+        self.backlog = max(backlog, 1)
+        self.frame = 0
+        self.previous = None
+        self.subscriber_count = 0
+        self.skips = 0
+        self.__latest = []      # the latest keyframe and the deltas since
+        self.__subscribers = set()
+        self.__server = None
+        self.__loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(target=self.__loop.run_forever,
+                                         daemon=True)
+        self.__thread.start()
+        try:
+            self.__call(self.__listen())
+        except BaseException:
+            self.__stop_loop()
+            raise
+
+    def __call(self, coro):
+        """Runs a coroutine on the event loop and waits for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.__loop).result()
+
+    def __stop_loop(self):
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__loop.close()
+
+    async def __listen(self):
+        if self.__address[0] == "unix":
+            path = self.__address[1]
+            if os.path.exists(path):
+                os.remove(path)
+            self.__server = await asyncio.start_unix_server(self.__serve,
+                                                            path)
+        else:
+            self.__server = await asyncio.start_server(
+                self.__serve, self.__address[1], self.__address[2])
+            # the port actually bound, in case port 0 asked for any
+            port = self.__server.sockets[0].getsockname()[1]
+            self.address = "tcp:%s:%d" % (self.__address[1], port)
+        print("streaming on %s" % self.address)
+
+    async def __serve(self, reader, writer):
+        """Sends the stream to one subscriber until the run ends or the
+        subscriber goes away.
+        """
+        subscriber = Subscriber(self.__latest)
+        self.__subscribers.add(subscriber)
+        self.subscriber_count += 1
+        try:
+            writer.write(MAGIC)
+            while True:
+                while subscriber.pending:
+                    writer.write(subscriber.pending.popleft())
+                await writer.drain()
+                if subscriber.pending:
+                    continue
+                if subscriber.ended:
+                    break
+                subscriber.ready.clear()
+                await subscriber.ready.wait()
+        except (ConnectionError, asyncio.CancelledError):
+            pass    # gone away, or still behind when the run ended
+        finally:
+            self.__subscribers.discard(subscriber)
+            self.skips += subscriber.skips
+            writer.close()
+
+    def __publish(self, message, kind):
+        """Queues a message for every subscriber. Called on the loop."""
+        if kind == KEYFRAME:
+            self.__latest = [message]
+        else:
+            self.__latest.append(message)
+        for subscriber in self.__subscribers:
+            subscriber.send(message, kind, self.__latest, self.backlog)
+
+    def render(self, universe):
+        """Encodes the frame, as a keyframe or a delta from the previous
+        frame, and publishes it.
+
+        :param universe: the Conway universe object
+        """
+        flags = universe.get_alive_flags()
+        previous = self.previous
+        payload = bytearray()
+        if previous is None or len(previous) != len(flags) or \
+                self.frame % self.keyframe_interval == 0:
+            kind = KEYFRAME
+            payload += SIZE.pack(universe.rows, universe.cols)
+            encode_runs(flags, payload)
+        else:
+            kind = DELTA
+            changed = (int.from_bytes(previous, 'little') ^
+                       int.from_bytes(flags, 'little')).to_bytes(
+                len(flags), 'little')
+            encode_runs(changed, payload)
+        message = HEADER.pack(kind, self.frame, len(payload)) + payload
+        self.__loop.call_soon_threadsafe(self.__publish, message, kind)
+        self.previous = flags
+        self.frame += 1
+
+    async def __shutdown(self):
+        """Sends END to every subscriber, gives them CLOSE_TIMEOUT seconds to
+        receive what they are owed and closes the server.
+        """
+        self.__publish(HEADER.pack(END, self.frame, 0), END)
+        self.__server.close()
+        tasks = [subscriber.task for subscriber in self.__subscribers]
+        if tasks:
+            await asyncio.wait(tasks, timeout=self.CLOSE_TIMEOUT)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        path = self.__address[1]
+        if self.__address[0] == "unix" and os.path.exists(path):
+            os.remove(path)
+
+    def close(self):
+        """Ends the stream and stops serving."""
+        self.__call(self.__shutdown())
+        self.__stop_loop()
+        print("streamed %d frames to %d subscribers, %d skipped to a "
+              "keyframe" % (self.frame, self.subscriber_count, self.skips))
+
+
+class Subscriber(object):
+    """The messages waiting to be sent to one subscriber. Only used on the
+    StreamRenderer's event loop.
+    """
+
+    def __init__(self, latest):
+        """:param latest: the latest keyframe and the deltas since, which the
+          subscriber starts from
+        """
+        self.pending = collections.deque(latest)
+        self.ready = asyncio.Event()
+        self.ended = False
+        self.skips = 0
+        self.task = asyncio.current_task()
+
+    def send(self, message, kind, latest, backlog):
+        """Queues a message, or skips to the latest keyframe if the subscriber
+        has fallen more than backlog messages behind.
+
+        :param message: the encoded message
+        :param kind: KEYFRAME, DELTA or END
+        :param latest: the latest keyframe and the deltas since, message
+          included
+        :param backlog: the most messages which may be waiting
+        """
+        if kind == END:
+            self.pending.append(message)
+            self.ended = True
+        elif len(self.pending) >= backlog:
+            self.pending = collections.deque(latest)
+            self.skips += 1
+        else:
+            self.pending.append(message)
+        self.ready.set()
+
+
+class StreamDecoder(object):
+    """Rebuilds frames from the bytes of a stream, for subscribers. Deltas
+    which arrive before the first keyframe are ignored.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.flags = None
+        self.rows = 0
+        self.cols = 0
+        self.ended = False
+        self.__started = False
+
+    def feed(self, data):
+        """Yields a golcontrol.pipeline.Frame for every whole frame received.
+
+        :param data: bytes read from the socket
+        """
+        buffer = self.buffer
+        buffer += data
+        pos = 0
+        if not self.__started:
+            if len(buffer) < len(MAGIC):
+                return
+            if buffer[:len(MAGIC)] != MAGIC:
+                raise Exception("not a Game of Life stream")
+            pos = len(MAGIC)
+            self.__started = True
+        while len(buffer) - pos >= HEADER.size:
+            kind, frame, size = HEADER.unpack_from(buffer, pos)
+            start = pos + HEADER.size
+            if len(buffer) - start < size:
+                break
+            payload = bytes(buffer[start:start + size])
+            pos = start + size
+            if kind == END:
+                self.ended = True
+                break
+            if kind == KEYFRAME:
+                self.rows, self.cols = SIZE.unpack_from(payload, 0)
+                flags = bytearray(self.rows * self.cols)
+                for run, length in decode_runs(payload, SIZE.size):
+                    flags[run:run + length] = b'\x01' * length
+                self.flags = flags
+            elif self.flags is None:
+                continue
+            else:
+                flags = self.flags
+                for run, length in decode_runs(payload):
+                    flags[run:run + length] = \
+                        flags[run:run + length].translate(TOGGLE)
+            yield Frame(frame, self.rows, self.cols, self.flags)
+        del buffer[:pos]
@@ -0,0 +1,93 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import socket
+import sys
+
+from golview.consolerenderer import ConsoleRenderer
+from golview.streamrenderer import StreamDecoder, parse_address
+
+"""Used only to watch a simulation streamed by the stream renderer from
+another process, drawing it in the terminal.
+"""
+
+
+def usage():
+    print("usage: python %s <address> [plain|ansi]" % sys.argv[0])
+    print("where:")
+    print("\taddress - the [Stream] Address of the run, unix:<path> or "
+          "tcp:<host>:<port>")
+    print("\tplain|ansi - console mode to draw in (default ansi)")
+    sys.exit("invalid arguments")
+
+
+def connect(address):
+    """Opens a socket to a stream renderer.
+
+    :param address: "unix:<path>" or "tcp:<host>:<port>"
+    :return: the connected socket
+    """
+    address = parse_address(address)
+    if address[0] == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address[1])
+        return sock
+    return socket.create_connection(address[1:])
+
+
+def watch(address, mode="ansi"):
+    """Draws every frame received until the run ends or the connection is
+    closed.
+
+    :param address: "unix:<path>" or "tcp:<host>:<port>"
+    :param mode: the ConsoleRenderer mode
+    :return: the number of frames drawn
+    """
+    renderer = ConsoleRenderer(mode)
+    decoder = StreamDecoder()
+    frames = 0
+    sock = connect(address)
+    try:
+        while not decoder.ended:
+            data = sock.recv(1 << 16)
+            if not data:
+                break
+            for frame in decoder.feed(data):
+                renderer.status("frame %d" % frame.generation)
+                renderer.render(frame)
+                frames += 1
+    finally:
+        sock.close()
+        renderer.close()
+    return frames
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        usage()
+    mode = sys.argv[2] if len(sys.argv) == 3 else "ansi"
+    try:
+        frames = watch(sys.argv[1], mode)
+    except KeyboardInterrupt:
+        return
+    except OSError as e:
+        sys.exit("cannot watch {}: {}".format(sys.argv[1], e))
+    print("watched %d frames" % frames)
+
+
+if __name__ == '__main__':
+    main()
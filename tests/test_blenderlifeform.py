@@ -0,0 +1,225 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import configparser
+import os
+import types
+
+import pytest
+
+from golbench import stubbpy
+
+stubbpy.install()
+
+from golmodel.lifeform import LifeForm  # noqa: E402
+from golmodel.transitionfile import StreamingTransitionLog  # noqa: E402
+from golmodel.transitionlog import TransitionLog  # noqa: E402
+from golview import blenderlifeform  # noqa: E402
+from golview.blenderlifeform import BlenderLifeForm  # noqa: E402
+from golview.blenderrenderer import BlenderRenderer  # noqa: E402
+
+TRANSITIONS = [(0, LifeForm.STATE_ALIVE), (1, LifeForm.STATE_DEAD),
+               (5, LifeForm.STATE_ALIVE), (6, LifeForm.STATE_DEAD),
+               (7, LifeForm.STATE_ALIVE), (12, LifeForm.STATE_DEAD)]
+
+
+class FakeKeyframePoints(object):
+    """Keyframe points of an F-curve, as (frame, value) pairs."""
+
+    def __init__(self):
+        self.co = []
+
+    def add(self, count):
+        self.co.extend([(0.0, 0.0)] * count)
+
+    def foreach_set(self, attr, seq):
+        assert attr == 'co' and len(seq) == 2 * len(self.co)
+        self.co = list(zip(seq[0::2], seq[1::2]))
+
+    def insert(self, frame, value):
+        self.co = [co for co in self.co if co[0] != frame]
+        self.co.append((frame, value))
+        self.co.sort()
+
+
+class FakeFCurve(object):
+    def __init__(self, data_path, index):
+        self.data_path = data_path
+        self.array_index = index
+        self.keyframe_points = FakeKeyframePoints()
+
+    def update(self):
+        self.keyframe_points.co.sort()
+
+
+class FakeFCurves(list):
+    def find(self, data_path, index=0):
+        for fcurve in self:
+            if (fcurve.data_path, fcurve.array_index) == (data_path, index):
+                return fcurve
+        return None
+
+    def new(self, data_path, index=0):
+        assert self.find(data_path, index) is None
+        fcurve = FakeFCurve(data_path, index)
+        self.append(fcurve)
+        return fcurve
+
+
+class FakeAction(object):
+    def __init__(self, name):
+        self.name = name
+        self.fcurves = FakeFCurves()
+
+
+class FakeID(object):
+    """An ID block whose keyframe_insert() keys its action's F-curves the
+    way Blender does.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.animation_data = None
+
+    def animation_data_create(self):
+        self.animation_data = types.SimpleNamespace(action=None)
+        return self.animation_data
+
+    def insert_key(self, data_path, value, frame):
+        if self.animation_data is None:
+            self.animation_data_create()
+        if self.animation_data.action is None:
+            self.animation_data.action = FakeAction(self.name + "Action")
+        fcurves = self.animation_data.action.fcurves
+        values = value if isinstance(value, tuple) else (value,)
+        for index, value in enumerate(values):
+            fcurve = fcurves.find(data_path, index) or \
+                fcurves.new(data_path, index)
+            fcurve.keyframe_points.insert(frame, value)
+
+    def keyframe_insert(self, data_path, frame):
+        self.insert_key(data_path, getattr(self, data_path), frame)
+
+    def curves(self):
+        """:return: {(data_path, index): [(frame, value), ...]}"""
+        if self.animation_data is None:
+            return {}
+        return {(fcurve.data_path, fcurve.array_index):
+                fcurve.keyframe_points.co
+                for fcurve in self.animation_data.action.fcurves}
+
+
+class FakeSocket(object):
+    def __init__(self, tree, path):
+        self.tree = tree
+        self.path = path
+        self.default_value = 0.0
+
+    def path_from_id(self, prop):
+        return "%s.%s" % (self.path, prop)
+
+    def keyframe_insert(self, data_path, frame):
+        self.tree.insert_key(self.path_from_id(data_path),
+                             getattr(self, data_path), frame)
+
+
+@pytest.fixture(autouse=True)
+def fake_bpy(monkeypatch):
+    monkeypatch.setattr(blenderlifeform, 'bpy', types.SimpleNamespace(
+        data=types.SimpleNamespace(actions=types.SimpleNamespace(
+            new=FakeAction))))
+    cfg = configparser.RawConfigParser()
+    cfg.read(os.path.join(os.path.dirname(blenderlifeform.__file__),
+                          "blenderrenderer.cfg"))
+    BlenderLifeForm.set_config_values(cfg)
+
+
+def make_life_form(shared):
+    """:return: a BlenderLifeForm over fake objects, without building a
+      scene
+    """
+    blf = BlenderLifeForm.__new__(BlenderLifeForm)
+    blf.shared = shared
+    blf.lf = types.SimpleNamespace(lfid=0, transitions=TRANSITIONS,
+                                   STATE_ALIVE=LifeForm.STATE_ALIVE,
+                                   STATE_DEAD=LifeForm.STATE_DEAD)
+    blf.light_obj_name = "LightPlane_0"
+    blf.light_obj = FakeID(blf.light_obj_name)
+    blf.light_obj.pass_index = 0
+    blf.light_obj.scale = (1.0, 1.0, 1.0)
+    tree = FakeID("0_PlaneMat")
+    blf.plane_mat = types.SimpleNamespace(name="0_PlaneMat", node_tree=tree)
+    socket = FakeSocket(tree, 'nodes["Emission"].inputs[1]')
+    blf.emission_node = types.SimpleNamespace(inputs={'Strength': socket})
+    return blf
+
+
+@pytest.mark.parametrize("shared", [True, False])
+def test_set_keyframes_matches_set_keys(shared):
+    keyed = make_life_form(shared)
+    BlenderRenderer.df_render_life_form(keyed)
+    bulk = make_life_form(shared)
+    gens, states = zip(*TRANSITIONS)
+    frames, key_states = BlenderRenderer.hold_keys(gens, states)
+    count = bulk.set_keyframes(frames, key_states)
+
+    assert bulk.light_obj.curves() == keyed.light_obj.curves()
+    assert bulk.plane_mat.node_tree.curves() == \
+        keyed.plane_mat.node_tree.curves()
+    assert count == sum(len(points) for points in
+                        bulk.light_obj.curves().values()) + \
+        sum(len(points) for points in
+            bulk.plane_mat.node_tree.curves().values())
+    assert bulk.light_obj.scale == keyed.light_obj.scale
+    assert bulk.light_obj.pass_index == keyed.light_obj.pass_index
+    socket = bulk.emission_node.inputs['Strength']
+    assert socket.default_value == \
+        keyed.emission_node.inputs['Strength'].default_value
+
+
+def test_set_keyframes_replaces_existing_keys():
+    blf = make_life_form(True)
+    blf.set_keyframes([0, 1, 2], [1, 1, 0])
+    blf.set_keyframes([3, 4], [0, 1])
+    curves = blf.light_obj.curves()
+    assert curves[('pass_index', 0)] == [(3, 0), (4, 1)]
+    assert [frame for frame, _ in curves[('scale', 2)]] == [3, 4]
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_depth_first_render_keys_every_cell_from_its_history(tmp_path,
+                                                             streamed):
+    if streamed:
+        log = StreamingTransitionLog(str(tmp_path / "log.bin"))
+        log.CHUNK_SIZE = 2
+    else:
+        log = TransitionLog()
+    log.extend(0, [0, 1, 2], [1, 0, 1])
+    log.extend(1, [2, 0], [0, 0])
+    log.extend(4, [0], [1])
+    renderer = BlenderRenderer.__new__(BlenderRenderer)
+    renderer.universe = types.SimpleNamespace(log=log)
+    renderer.blender_life_forms = [make_life_form(True) for _ in range(3)]
+    for lfid, blf in enumerate(renderer.blender_life_forms):
+        blf.lf.lfid = lfid
+    renderer.depth_first_render()
+
+    for lfid, blf in enumerate(renderer.blender_life_forms):
+        gens, states = zip(*log.cell_history(lfid))
+        frames, key_states = BlenderRenderer.hold_keys(gens, states)
+        assert blf.light_obj.curves()[('pass_index', 0)] == \
+            list(zip(frames, key_states))
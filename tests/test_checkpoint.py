@@ -0,0 +1,56 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import configparser
+
+import pytest
+
+from golcontrol.checkpoint import Checkpoint
+from goldriver import GOLDriver
+
+
+def make_config(tmp_path, engine, log):
+    cfg = configparser.RawConfigParser()
+    cfg.read_dict({'Universe': dict(GenerationCount='40', Size='12',
+                                    Engine=engine, RandomSeed='3',
+                                    Bounded='no',
+                                    TransitionLogPath=str(tmp_path / log)),
+                   'Rendering': dict(Renderer='console',
+                                     PauseAfterRandomize='0'),
+                   'Checkpoint': dict(Interval='20', Path=str(
+                       tmp_path / ("%s_%%d.bin" % log)))})
+    return cfg
+
+
+def run(cfg, checkpoint=None):
+    driver = GOLDriver(cfg, checkpoint)
+    driver.pause = lambda seconds: None
+    driver.go()
+    return driver
+
+
+@pytest.mark.parametrize("engine", ["sparse", "hashlife"])
+def test_unbounded_resume_counts_the_same_transitions(tmp_path, engine):
+    whole = run(make_config(tmp_path, engine, "a"))
+    path = str(tmp_path / "a_20.bin")
+    assert Checkpoint.read(path).outside_transitions > 0
+    with open(tmp_path / "a", 'rb') as f:
+        (tmp_path / "b").write_bytes(f.read())
+    resumed = run(make_config(tmp_path, engine, "b"), path)
+    assert resumed.universe.live == whole.universe.live
+    assert resumed.universe.get_transition_count() == \
+        whole.universe.get_transition_count()
@@ -0,0 +1,137 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import configparser
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from goldriver import GOLDriver  # noqa: E402
+from golmodel.rule import Rule  # noqa: E402
+
+SIZE = 16
+GENERATIONS = 12
+SEEDS = ("1", "2")
+
+# engine name -> extra Universe settings
+ENGINES = {
+    'object': {},
+    'tiled': dict(Engine='object', TileSize='4'),
+    'numpy': {},
+    'parallel': dict(Workers='2'),
+    'sparse': dict(Bounded='yes'),
+    'bitpacked': {},
+    # the unbounded engines are checked against each other
+    'unbounded': dict(Engine='sparse', Bounded='no'),
+    'hashlife': {},
+}
+STANDARD = ('object', 'tiled', 'numpy', 'parallel')
+UNBOUNDED = ('unbounded', 'hashlife')
+RULES = {
+    'B3/S23': STANDARD + ('sparse', 'bitpacked') + UNBOUNDED,
+    'B36/S23': STANDARD + ('sparse',) + UNBOUNDED,
+    'B2/S345/C4': STANDARD,
+    'R2,C0,M0,S5..8,B5..6,NM': ('object', 'numpy', 'parallel'),
+    'R2,C3,M1,S4..9,B5..7,NN': ('object', 'numpy', 'parallel'),
+}
+
+
+def brute_force(rule, states, rows, cols):
+    """Advances a board one generation the slow, obvious way: every cell's
+    living neighbours are counted one by one.
+
+    :param rule: the golmodel.rule.Rule to apply
+    :param states: one state per cell in row-major order
+    :return: the next states and the (cell, state) of every cell which
+      changed
+    """
+    offsets = rule.neighbourhood.offsets()
+    following = []
+    changes = []
+    for row in range(rows):
+        for col in range(cols):
+            count = 0
+            for dr, dc in offsets:
+                r, c = row + dr, col + dc
+                if 0 <= r < rows and 0 <= c < cols and \
+                        states[(r * cols) + c] == 1:
+                    count += 1
+            cell = (row * cols) + col
+            state = rule.next_state(max(states[cell], 0), count)
+            if state != max(states[cell], 0):
+                changes.append((cell, state))
+            following.append(state)
+    return following, changes
+
+
+def run(engine, rule, seed):
+    """:return: the alive flags after each generation, the transitions
+      recorded after the random layout, sorted within each generation, and
+      the total transition count
+    """
+    settings = dict(GenerationCount=str(GENERATIONS), Size=str(SIZE),
+                    Engine=engine, Rule=rule, RandomSeed=seed)
+    settings.update(ENGINES[engine])
+    cfg = configparser.RawConfigParser()
+    cfg.read_dict({'Universe': settings,
+                   'Rendering': dict(Renderer='console')})
+    driver = GOLDriver(cfg)
+    universe = driver.universe
+    universe.randomize()
+    boards = [universe.get_alive_flags()]
+    try:
+        for _ in range(GENERATIONS):
+            driver.simulation.advance()
+            boards.append(universe.get_alive_flags())
+    finally:
+        driver.simulation.close()
+    log = sorted(record for record in universe.log if record[0] > 0)
+    return boards, log, universe.get_transition_count()
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("rule", sorted(RULES))
+def test_engines_agree_with_brute_force(rule, seed):
+    boards, log, count = run('object', rule, seed)
+    parsed = Rule.parse(rule)
+    states = list(boards[0])
+    expected = []
+    for generation in range(1, GENERATIONS + 1):
+        states, changes = brute_force(parsed, states, SIZE, SIZE)
+        assert bytes(s == 1 for s in states) == boards[generation]
+        expected.extend((generation, cell, state) for cell, state in changes)
+    assert log == expected
+    for engine in RULES[rule]:
+        if engine not in UNBOUNDED:
+            assert run(engine, rule, seed) == (boards, log, count), engine
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("rule", ['B3/S23', 'B36/S23'])
+def test_unbounded_engines_agree(rule, seed):
+    assert run('hashlife', rule, seed) == run('unbounded', rule, seed)
+    # the layouts grow past the board, so the edges are exercised
+    assert run('unbounded', rule, seed) != run('object', rule, seed)
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_unsupported_rules_are_rejected(engine):
+    for rule, engines in RULES.items():
+        if engine not in engines:
+            with pytest.raises(Exception):
+                run(engine, rule, SEEDS[0])
@@ -0,0 +1,44 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import configparser
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from golcontrol.ensemble import Ensemble  # noqa: E402
+from goldriver import GOLDriver  # noqa: E402
+
+
+@pytest.mark.parametrize("randomizer", ["sequential", "counter"])
+def test_runs_start_from_the_drivers_board(randomizer):
+    cfg = configparser.RawConfigParser()
+    cfg.read_dict({'Universe': dict(GenerationCount='1', Size='12',
+                                    Engine='numpy', RandomSeed='7',
+                                    Randomizer=randomizer),
+                   'Rendering': dict(Renderer='console')})
+    driver = GOLDriver(cfg)
+    driver.universe.randomize(0.3)
+    ensemble = Ensemble(["7"], [12], [0.3], 1, randomizer=randomizer)
+    cells = ensemble.runs[0].seed_cells()
+    assert cells.tobytes() == driver.universe.get_alive_flags()
+
+
+def test_unknown_randomizer_is_rejected():
+    with pytest.raises(Exception):
+        Ensemble(["7"], [12], [0.3], 1, randomizer="other")
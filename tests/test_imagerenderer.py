@@ -0,0 +1,66 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import pytest
+
+from golview.imagerenderer import ImageRenderer
+
+
+class FakeUniverse(object):
+    def __init__(self, rows, cols, flags):
+        self.rows = rows
+        self.cols = cols
+        self.flags = flags
+
+    def get_alive_flags(self):
+        return self.flags
+
+
+def read_pnm(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, size, maxval, pixels = data.split(b"\n", 3)
+    width, height = map(int, size.split())
+    return magic, width, height, int(maxval), pixels
+
+
+@pytest.mark.parametrize("scale", [1, 2])
+def test_pgm_pixels_are_black_and_white(tmp_path, scale):
+    flags = bytes([1, 0, 0, 1, 1, 0])
+    renderer = ImageRenderer(str(tmp_path / "frame%d.pgm"), "pgm", scale)
+    renderer.render(FakeUniverse(2, 3, flags))
+    renderer.close()
+    magic, width, height, maxval, pixels = read_pnm(tmp_path / "frame0.pgm")
+    assert (magic, width, height, maxval) == (b"P5", 3 * scale, 2 * scale,
+                                              255)
+    assert len(pixels) == width * height
+    expected = bytearray()
+    for row in range(2):
+        line = bytearray()
+        for flag in flags[row * 3:(row + 1) * 3]:
+            line += bytes([255 * flag]) * scale
+        expected += line * scale
+    assert pixels == expected
+
+
+def test_ppm_pixels_are_black_and_white(tmp_path):
+    renderer = ImageRenderer(str(tmp_path / "frame%d.ppm"), "ppm")
+    renderer.render(FakeUniverse(1, 2, bytes([0, 1])))
+    renderer.close()
+    magic, width, height, maxval, pixels = read_pnm(tmp_path / "frame0.ppm")
+    assert (magic, width, height, maxval) == (b"P6", 2, 1, 255)
+    assert pixels == bytes([0, 0, 0, 255, 255, 255])
@@ -0,0 +1,62 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import threading
+
+from golcontrol.profiler import CallbackSink, Profiler
+
+
+class Work(object):
+    def advance(self):
+        pass
+
+    def render(self):
+        pass
+
+
+def test_other_threads_counters_are_recorded_when_handed_over():
+    records = []
+    profiler = Profiler([CallbackSink(records.append)])
+    work = Work()
+    profiler.instrument(work, 'advance')
+    profiler.instrument(work, 'render')
+    taken = []
+
+    def produce():
+        for _ in range(3):
+            work.advance()
+            taken.append(profiler.take())
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    producer.join()
+    work.render()
+    profiler.record(1, taken=taken[:1])
+    profiler.record(2, taken=taken[1:])
+
+    assert [r['advance_calls'] for r in records] == [1, 2]
+    assert [r['render_calls'] for r in records] == [1, 0]
+    assert profiler.summary()['advance']['calls'] == 3
+
+
+def test_record_marks_extrapolated_generations():
+    records = []
+    profiler = Profiler([CallbackSink(records.append)])
+    profiler.record(1, births=3)
+    profiler.record(2, births=1, deaths=2, extrapolated=True)
+    assert [(r['population'], r['extrapolated']) for r in records] == \
+        [(3, False), (2, True)]
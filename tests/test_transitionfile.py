@@ -0,0 +1,66 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+import pytest
+
+from golmodel.transitionfile import StreamingTransitionLog
+from golmodel.transitionlog import TransitionLog
+
+
+def record(log):
+    log.extend(0, [0, 1, 2, 3], 1)
+    log.extend(1, [2, 0], [0, 0])
+    log.append(2, 0, 1)
+    log.extend(3, [5], [1])
+
+
+def test_cell_history_matches_memory_log(tmp_path):
+    memory = TransitionLog()
+    streamed = StreamingTransitionLog(str(tmp_path / "log.bin"))
+    streamed.CHUNK_SIZE = 3
+    for log in (memory, streamed):
+        record(log)
+    for cell in range(8):
+        assert streamed.cell_history(cell) == memory.cell_history(cell)
+        assert streamed.get_transition_count(cell) == \
+            memory.get_transition_count(cell)
+
+
+def test_cell_history_follows_growth_and_close(tmp_path):
+    log = StreamingTransitionLog(str(tmp_path / "log.bin"))
+    log.extend(0, [4], 1)
+    assert log.cell_history(4) == [(0, 1)]
+    log.extend(1, [4, 7], [0, 1])
+    log.close()
+    assert log.cell_history(4) == [(0, 1), (1, 0)]
+    assert log.get_transition_count(7) == 1
+    assert len(list(log)) == 3
+
+
+def test_reader_index_reads_through_the_map(tmp_path):
+    memory = TransitionLog()
+    streamed = StreamingTransitionLog(str(tmp_path / "log.bin"))
+    streamed.CHUNK_SIZE = 2
+    for log in (memory, streamed):
+        record(log)
+    reader = streamed.reader()
+    for cell in range(8):
+        assert reader.cell_transitions(cell) == memory.cell_transitions(cell)
+    reader.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["log.bin"]
+    with pytest.raises(Exception):
+        reader.cell_history(0)